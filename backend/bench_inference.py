@@ -0,0 +1,375 @@
+"""
+Micro-benchmark for the local RoBERTa inference hot path.
+
+Sweeps model variant, torch thread count, input length and batch size, and
+for every combination measures tokenization, the forward pass and
+end-to-end latency (predict_bias for batch size 1, predict_bias_batch
+otherwise) separately as p50/p95/p99, plus throughput and peak RSS. Input
+texts come from data/abim_bias_balanced_3Bias.csv, bucketed by their token
+count. The result cache is disabled so every call does the full work.
+
+Variants are configured through environment variables that predict.py reads
+at import, so each (variant, threads) pair runs in its own subprocess; its
+peak RSS covers the model load and every measurement in that process.
+
+    python bench_inference.py --output bench/baseline.json
+    python bench_inference.py --variants adapter,merged,int8 --threads 1,4 --baseline bench/baseline.json
+    python bench_inference.py --compare bench/baseline.json bench/candidate.json
+
+Options:
+    --variants LIST       adapter, merged, int8, bf16, onnx (default: adapter)
+    --threads LIST        Torch / ONNX Runtime intra-op threads (default: 1 and all cores)
+    --lengths LIST        Upper token-count edges of the length buckets; the last
+                          bucket also holds longer (truncated) texts (default: 32,64,128)
+    --batch-sizes LIST    Texts per call (default: 1,8,32)
+    --iterations N        Timed calls per combination (default: 50)
+    --warmup N            Untimed calls per combination (default: 3)
+    --seed N              Text sampling seed (default: 13)
+    --output PATH         Write the results as JSON
+    --baseline PATH       Compare this run against a stored result file
+    --compare BASE CUR    Compare two stored result files without running
+    --threshold FRACTION  Allowed slowdown before a metric is a regression (default: 0.10)
+
+Exit code 1 when the comparison finds a regression.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+DATASET_PATH = Path(__file__).parent / "data" / "abim_bias_balanced_3Bias.csv"
+SRC_PATH = Path(__file__).parent / "src"
+
+# Model variants: predict.py environment overrides
+VARIANTS = {
+    "adapter": {"INFERENCE_BACKEND": "torch", "INFERENCE_MODE": "adapter", "MODEL_PRECISION": "fp32"},
+    "merged": {"INFERENCE_BACKEND": "torch", "INFERENCE_MODE": "merged", "MODEL_PRECISION": "fp32"},
+    "int8": {"INFERENCE_BACKEND": "torch", "INFERENCE_MODE": "adapter", "MODEL_PRECISION": "int8"},
+    "bf16": {"INFERENCE_BACKEND": "torch", "INFERENCE_MODE": "adapter", "MODEL_PRECISION": "bf16"},
+    "onnx": {"INFERENCE_BACKEND": "onnx", "INFERENCE_MODE": "adapter", "MODEL_PRECISION": "fp32"},
+}
+
+# Compared metrics: (path in a result, True if higher is better)
+COMPARED_METRICS = [
+    (("end_to_end_ms", "p50"), False),
+    (("end_to_end_ms", "p95"), False),
+    (("forward_ms", "p50"), False),
+    (("tokenize_ms", "p50"), False),
+    (("throughput_items_per_s",), True),
+    (("peak_rss_mb",), False),
+]
+
+
+def int_list(value: str) -> list:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark local RoBERTa inference")
+    parser.add_argument("--variants", default="adapter")
+    parser.add_argument("--threads", type=int_list, default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--lengths", type=int_list, default=[32, 64, 128])
+    parser.add_argument("--batch-sizes", type=int_list, default=[1, 8, 32])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-threads", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def percentiles_ms(samples: list) -> dict:
+    samples = sorted(samples)
+
+    def pick(p):
+        return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3) if samples else 0.0
+
+    return {
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "mean": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0
+    }
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (None where resource is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def length_buckets(tokenizer, edges: list, seed: int) -> dict:
+    """Dataset texts grouped by untruncated token count, shuffled with seed."""
+    with open(DATASET_PATH, newline="", encoding="utf-8") as f:
+        texts = [row["text_clean"] for row in csv.DictReader(f) if row.get("text_clean")]
+
+    counts = [len(ids) for ids in tokenizer(texts, truncation=False)["input_ids"]]
+    edges = sorted(edges)
+    buckets = {edge: [] for edge in edges}
+    for text, count in zip(texts, counts):
+        edge = next((edge for edge in edges if count <= edge), edges[-1])
+        buckets[edge].append(text)
+
+    rng = random.Random(seed)
+    for bucket in buckets.values():
+        rng.shuffle(bucket)
+    return buckets
+
+
+def run_worker(args) -> dict:
+    """Measure one (variant, threads) pair; runs in its own process."""
+    sys.path.insert(0, str(SRC_PATH))
+    import torch
+    import predict
+
+    torch.set_num_threads(args.worker_threads)
+
+    load_start = time.perf_counter()
+    predict.load_model(warmup=True)
+    load_seconds = time.perf_counter() - load_start
+    rss_after_load = peak_rss_mb()
+
+    tokenizer = predict.tokenizer
+    buckets = length_buckets(tokenizer, args.lengths, args.seed)
+
+    def tokenize(batch):
+        if len(batch) == 1:
+            return tokenizer(batch[0], return_tensors="pt", truncation=True, max_length=predict.MAX_LENGTH)
+        return tokenizer(batch, return_tensors="pt", padding=True, truncation=True, max_length=predict.MAX_LENGTH)
+
+    def end_to_end(batch):
+        if len(batch) == 1:
+            return predict.predict_bias(batch[0])
+        return predict.predict_bias_batch(batch, chunk_size=len(batch))
+
+    results = []
+    for edge, texts in buckets.items():
+        if not texts:
+            print(f"⚠️ No dataset texts in the {edge}-token bucket, skipping it.")
+            continue
+
+        for batch_size in args.batch_sizes:
+            batches = [
+                [texts[(i * batch_size + j) % len(texts)] for j in range(batch_size)]
+                for i in range(args.warmup + args.iterations)
+            ]
+            for batch in batches[:args.warmup]:
+                predict._classify_encoded(tokenize(batch))
+                end_to_end(batch)
+
+            tokenize_times, forward_times, total_times, token_counts = [], [], [], []
+            for batch in batches[args.warmup:]:
+                start = time.perf_counter()
+                inputs = tokenize(batch)
+                tokenize_times.append(time.perf_counter() - start)
+                token_counts.append(int(inputs["attention_mask"].sum()) / len(batch))
+
+                start = time.perf_counter()
+                predict._classify_encoded(inputs)
+                forward_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                end_to_end(batch)
+                total_times.append(time.perf_counter() - start)
+
+            results.append({
+                "variant": args.worker,
+                "threads": args.worker_threads,
+                "length_bucket": edge,
+                "batch_size": batch_size,
+                "iterations": args.iterations,
+                "mean_tokens": round(sum(token_counts) / len(token_counts), 1),
+                "tokenize_ms": percentiles_ms(tokenize_times),
+                "forward_ms": percentiles_ms(forward_times),
+                "end_to_end_ms": percentiles_ms(total_times),
+                "throughput_items_per_s": round(batch_size * len(total_times) / sum(total_times), 2),
+                "peak_rss_mb": peak_rss_mb()
+            })
+            print(f"  {args.worker} threads={args.worker_threads} len<={edge} batch={batch_size}: "
+                  f"p50 {results[-1]['end_to_end_ms']['p50']} ms, {results[-1]['throughput_items_per_s']} items/s")
+
+    return {
+        "variant": args.worker,
+        "threads": args.worker_threads,
+        "inference": predict.get_inference_info(),
+        "load_seconds": round(load_seconds, 2),
+        "rss_after_load_mb": rss_after_load,
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results
+    }
+
+
+def run_sweep(args) -> dict:
+    """Run one worker process per (variant, threads) pair and collect their results."""
+    variants = [name.strip() for name in args.variants.split(",") if name.strip()]
+    unknown = [name for name in variants if name not in VARIANTS]
+    if unknown:
+        raise SystemExit(f"Unknown variant(s): {', '.join(unknown)}. Choose from {', '.join(VARIANTS)}.")
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "lengths": args.lengths,
+            "batch_sizes": args.batch_sizes,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "seed": args.seed
+        },
+        "runs": [],
+        "results": []
+    }
+
+    for variant in variants:
+        for threads in args.threads:
+            print(f"🧪 Benchmarking {variant} with {threads} thread(s)...")
+            env = dict(os.environ, **VARIANTS[variant])
+            env.update({"RESULT_CACHE_ENABLED": "0", "ORT_NUM_THREADS": str(threads), "MULTI_ADAPTER": "0"})
+
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+                worker_output = f.name
+            try:
+                command = [
+                    sys.executable, __file__, "--worker", variant, "--worker-threads", str(threads),
+                    "--worker-output", worker_output,
+                    "--lengths", ",".join(map(str, args.lengths)),
+                    "--batch-sizes", ",".join(map(str, args.batch_sizes)),
+                    "--iterations", str(args.iterations), "--warmup", str(args.warmup), "--seed", str(args.seed)
+                ]
+                completed = subprocess.run(command, env=env)
+                if completed.returncode != 0:
+                    print(f"❌ {variant} with {threads} thread(s) failed (exit code {completed.returncode})")
+                    report["runs"].append({"variant": variant, "threads": threads, "error": completed.returncode})
+                    continue
+
+                run = json.loads(Path(worker_output).read_text(encoding="utf-8"))
+            finally:
+                os.unlink(worker_output)
+
+            report["results"].extend(run.pop("results"))
+            report["runs"].append(run)
+
+    return report
+
+
+def _result_key(result: dict) -> tuple:
+    return (result["variant"], result["threads"], result["length_bucket"], result["batch_size"])
+
+
+def _metric(result: dict, path: tuple):
+    value = result
+    for name in path:
+        value = value.get(name) if isinstance(value, dict) else None
+    return value
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> dict:
+    """
+    Compare two result files combination by combination.
+
+    A metric regresses when it is worse than the baseline by more than
+    threshold (relative): slower latency, lower throughput or higher RSS.
+
+    Returns:
+        Dictionary with the regressions, improvements and unmatched combinations
+    """
+    baseline_results = {_result_key(result): result for result in baseline.get("results", [])}
+    regressions, improvements, unmatched = [], [], []
+
+    for result in current.get("results", []):
+        key = _result_key(result)
+        reference = baseline_results.get(key)
+        if reference is None:
+            unmatched.append(list(key))
+            continue
+
+        for path, higher_is_better in COMPARED_METRICS:
+            old, new = _metric(reference, path), _metric(result, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            entry = {
+                "variant": key[0], "threads": key[1], "length_bucket": key[2], "batch_size": key[3],
+                "metric": ".".join(path), "baseline": old, "current": new, "change": round(change, 4)
+            }
+            if worse > threshold:
+                regressions.append(entry)
+            elif worse < -threshold:
+                improvements.append(entry)
+
+    return {
+        "threshold": threshold,
+        "regressions": regressions,
+        "improvements": improvements,
+        "unmatched": unmatched
+    }
+
+
+def print_comparison(comparison: dict):
+    for title, entries in (("⚠️ Regressions", comparison["regressions"]), ("✅ Improvements", comparison["improvements"])):
+        print(f"{title} (>{comparison['threshold']:.0%}): {len(entries)}")
+        for entry in entries:
+            print(f"  {entry['variant']} threads={entry['threads']} len<={entry['length_bucket']} "
+                  f"batch={entry['batch_size']} {entry['metric']}: {entry['baseline']} -> {entry['current']} "
+                  f"({entry['change']:+.1%})")
+    if comparison["unmatched"]:
+        print(f"ℹ️ {len(comparison['unmatched'])} combination(s) not in the baseline")
+
+
+def main():
+    args = parse_args()
+
+    if args.worker:
+        run = run_worker(args)
+        Path(args.worker_output).write_text(json.dumps(run), encoding="utf-8")
+        return 0
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.compare)
+        comparison = compare(baseline, current, args.threshold)
+        print_comparison(comparison)
+        return 1 if comparison["regressions"] else 0
+
+    report = run_sweep(args)
+    if args.baseline:
+        report["comparison"] = compare(json.loads(Path(args.baseline).read_text(encoding="utf-8")), report, args.threshold)
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if "comparison" in report:
+        print_comparison(report["comparison"])
+        return 1 if report["comparison"]["regressions"] else 0
+    return 0 if all("error" not in run for run in report["runs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
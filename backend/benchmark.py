@@ -0,0 +1,207 @@
+"""
+Offline quality/latency benchmark: few-shot GPT pipeline vs. RoBERTa.
+
+Classifies a stratified sample of data/abim_bias_balanced_3Bias.csv and
+reports accuracy per bias_label and source_type, tokens per item, estimated
+cost, errors and latency percentiles for each pipeline. LLM calls go through
+the record/replay cassette (src/llm_cassette.py): record once against the
+API, then replay the same sample without network access or cost. A replay
+after a prompt or model change reports the requests that were not recorded
+as errors (cassette misses).
+
+    python benchmark.py --mode record --limit 200      # needs OPENAI_API_KEY
+    python benchmark.py --mode replay --limit 200      # offline, deterministic
+
+The persistent LLM response cache is disabled for the run, so every few-shot
+request reaches the provider (or the cassette).
+
+Options:
+    --limit N                 Rows in the stratified sample (default: 200)
+    --seed N                  Sampling seed (default: 13)
+    --mode MODE               Cassette mode: record, replay or off (default: replay)
+    --cassette PATH           Cassette file (default: LLM_CASSETTE_PATH or data/cassettes/llm.jsonl.gz)
+    --replay-latency          Sleep for the recorded latency on replay
+    --pipelines LIST          Comma-separated: fewshot,roberta (default: both)
+    --concurrency N           Few-shot requests in flight (default: 4)
+    --input-price USD         Price per 1M input tokens (default: 0.15, gpt-4o-mini)
+    --output-price USD        Price per 1M output tokens (default: 0.60, gpt-4o-mini)
+    --output PATH             Also write the report as JSON
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+DATASET_PATH = Path(__file__).parent / "data" / "abim_bias_balanced_3Bias.csv"
+SRC_PATH = Path(__file__).parent / "src"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the few-shot pipeline against RoBERTa")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--mode", choices=["record", "replay", "off"], default="replay")
+    parser.add_argument("--cassette")
+    parser.add_argument("--replay-latency", action="store_true")
+    parser.add_argument("--pipelines", default="fewshot,roberta")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--input-price", type=float, default=0.15)
+    parser.add_argument("--output-price", type=float, default=0.60)
+    parser.add_argument("--output")
+    return parser.parse_args()
+
+
+def stratified_sample(limit: int, seed: int) -> list:
+    """Round-robin over (bias_label, source_type) groups, shuffled with seed."""
+    with open(DATASET_PATH, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("text_clean")]
+
+    rng = random.Random(seed)
+    groups = {}
+    for row in rows:
+        groups.setdefault((row["bias_label"], row["source_type"]), []).append(row)
+    queues = [groups[key] for key in sorted(groups)]
+    for queue in queues:
+        rng.shuffle(queue)
+
+    sample = []
+    while len(sample) < limit and any(queues):
+        for queue in queues:
+            if queue and len(sample) < limit:
+                sample.append(queue.pop())
+    return sample
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def accuracy_by(results: list, field: str) -> dict:
+    groups = {}
+    for item in results:
+        stats = groups.setdefault(item["row"][field], {"total": 0, "correct": 0})
+        stats["total"] += 1
+        stats["correct"] += item["predicted"] == item["row"]["bias_label"]
+    return {key: round(stats["correct"] / stats["total"], 4) for key, stats in sorted(groups.items())}
+
+
+def summarize(results: list, seconds: float) -> dict:
+    total = len(results) or 1
+    latencies = [item["seconds"] for item in results if not item["error"]]
+    return {
+        "items": len(results),
+        "seconds": round(seconds, 2),
+        "errors": sum(1 for item in results if item["error"]),
+        "accuracy": round(sum(item["predicted"] == item["row"]["bias_label"] for item in results) / total, 4),
+        "accuracy_by_bias_label": accuracy_by(results, "bias_label"),
+        "accuracy_by_source_type": accuracy_by(results, "source_type"),
+        "latency_ms": {
+            name: round(percentile(latencies, p) * 1000, 1)
+            for name, p in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        }
+    }
+
+
+def run_fewshot(sample: list, concurrency: int, input_price: float, output_price: float) -> dict:
+    from few_shot_classifier import classify_bias_few_shot, get_model_info
+    from llm_cassette import cassette
+
+    def classify(row):
+        cassette.reset_last_call()
+        start = time.perf_counter()
+        result = classify_bias_few_shot(row["text_clean"], use_cache=False)
+        seconds = time.perf_counter() - start
+
+        call = cassette.last_call() or {}
+        recorded_latency = call.get("latency")
+        return {
+            "row": row,
+            "predicted": result.get("primary_category"),
+            "error": result.get("error"),
+            # Replay without --replay-latency reports the recorded provider latency
+            "seconds": recorded_latency if call.get("source") == "replay" and not cassette.replay_latency and recorded_latency is not None else seconds,
+            "usage": call.get("usage") or {}
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        results = list(pool.map(classify, sample))
+    report = summarize(results, time.perf_counter() - start)
+
+    info = get_model_info()
+    prompt_tokens = sum(item["usage"].get("prompt_tokens", 0) for item in results)
+    completion_tokens = sum(item["usage"].get("completion_tokens", 0) for item in results)
+    cost = prompt_tokens / 1e6 * input_price + completion_tokens / 1e6 * output_price
+    items = len(results) or 1
+    report.update({
+        "model": info["model"],
+        "prompt_template_version": info["prompt_template"].get("version"),
+        "example_selection": info["example_selection"].get("mode"),
+        "tokens_per_item": {
+            "prompt": round(prompt_tokens / items, 1),
+            "completion": round(completion_tokens / items, 1),
+            "estimated": any(item["usage"].get("estimated") for item in results)
+        },
+        "estimated_cost_usd": {"total": round(cost, 4), "per_1k_items": round(cost / items * 1000, 4)},
+        "cassette": cassette.stats()
+    })
+    return report
+
+
+def run_roberta(sample: list) -> dict:
+    import predict
+
+    predict.load_model()
+    results = []
+    start = time.perf_counter()
+    for row in sample:
+        item_start = time.perf_counter()
+        try:
+            predicted, _ = predict.predict_bias(row["text_clean"])
+            error = None
+        except Exception as e:
+            predicted, error = None, str(e)
+        results.append({"row": row, "predicted": predicted, "error": error, "seconds": time.perf_counter() - item_start})
+
+    report = summarize(results, time.perf_counter() - start)
+    report["model"] = predict.MODEL_SOURCE
+    return report
+
+
+def main():
+    args = parse_args()
+
+    # Configure the LLM modules before they read the environment at import
+    os.environ["LLM_CACHE_ENABLED"] = "0"
+    os.environ["LLM_CASSETTE_MODE"] = args.mode
+    os.environ["LLM_CASSETTE_REPLAY_LATENCY"] = "1" if args.replay_latency else "0"
+    if args.cassette:
+        os.environ["LLM_CASSETTE_PATH"] = args.cassette
+    sys.path.insert(0, str(SRC_PATH))
+
+    pipelines = [name.strip() for name in args.pipelines.split(",") if name.strip()]
+    sample = stratified_sample(args.limit, args.seed)
+    print(f"🧪 Benchmarking {', '.join(pipelines)} on {len(sample)} rows (cassette: {args.mode})...")
+
+    report = {"rows": len(sample), "seed": args.seed, "pipelines": {}}
+    if "fewshot" in pipelines:
+        report["pipelines"]["fewshot"] = run_fewshot(sample, args.concurrency, args.input_price, args.output_price)
+    if "roberta" in pipelines:
+        report["pipelines"]["roberta"] = run_roberta(sample)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
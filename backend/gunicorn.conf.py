@@ -0,0 +1,160 @@
+"""
+Gunicorn configuration for production serving
+
+The master process imports the app (preload_app) and waits until the RoBERTa
+model has loaded, then forks the workers. Model weights live in pages that
+the workers share copy-on-write, so adding workers adds their private memory
+only, not another copy of the model.
+
+Each worker pins torch's intra-op and inter-op thread pools to its share of
+the available cores so workers do not oversubscribe the CPU, and logs its
+memory at startup (RSS, plus PSS / shared / private where /proc allows).
+
+Waiting in the master is deliberate: the weights must be loaded before fork
+for the workers to share them, so no worker accepts requests until the model
+is ready and /health never answers 503 "loading" under gunicorn. Platform
+health checks need a grace period that covers the load (see fly.toml). If
+the load fails or takes longer than MODEL_LOAD_TIMEOUT_SECONDS the master
+exits instead of hanging.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py
+
+Environment variables:
+    PORT                  - Port to bind (default: 8000)
+    WEB_WORKERS           - Worker processes (default: one per available core)
+    WEB_THREADS           - Request threads per worker (default: 4)
+    TORCH_THREADS         - Intra-op threads per worker (default: cores // workers)
+    TORCH_INTEROP_THREADS - Inter-op threads per worker (default: 1)
+    MODEL_LOAD_TIMEOUT_SECONDS - Give up on the model load after this long (default: 600)
+    CASCADE_DEFERRAL_SECRET - Deferral-token key (default: generated here, before fork)
+"""
+
+import os
+import gc
+import time
+import secrets
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects CPU affinity / cgroup pinning)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+CORES = available_cores()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+chdir = SRC_DIR
+wsgi_app = "app:app"
+
+workers = int(os.environ.get("WEB_WORKERS", str(CORES)))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "4"))
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", str(max(1, CORES // max(1, workers)))))
+TORCH_INTEROP_THREADS = int(os.environ.get("TORCH_INTEROP_THREADS", "1"))
+MODEL_LOAD_TIMEOUT_SECONDS = float(os.environ.get("MODEL_LOAD_TIMEOUT_SECONDS", "600"))
+
+# One deferral-token key for every worker: without it each worker that imports
+# the app on its own would sign tokens the others reject.
+os.environ.setdefault("CASCADE_DEFERRAL_SECRET", secrets.token_hex(32))
+
+# Keep the master single-threaded while it loads and warms up the model:
+# an OpenMP pool started before fork() is not usable in the children.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+
+def memory_report(pid: int = None) -> dict:
+    """
+    Return memory figures in MB for a process.
+
+    RSS counts shared weight pages in every worker; PSS splits them between
+    the processes sharing them, so the sum of PSS is the real footprint.
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    for path in (f"/proc/{pid}/smaps_rollup", f"/proc/{pid}/status"):
+        try:
+            with open(path) as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    parts = value.split()
+                    if len(parts) == 2 and parts[1] == "kB":
+                        fields.setdefault(name, int(parts[0]) / 1024)
+        except OSError:
+            continue
+
+    if "Rss" not in fields and "VmRSS" not in fields:
+        import resource
+        fields["VmRSS"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    report = {"rss_mb": round(fields.get("Rss", fields.get("VmRSS", 0.0)), 1)}
+    if "Pss" in fields:
+        report["pss_mb"] = round(fields["Pss"], 1)
+        report["shared_mb"] = round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1)
+        report["private_mb"] = round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1)
+    return report
+
+
+def wait_for_model(predict, timeout: float = MODEL_LOAD_TIMEOUT_SECONDS, poll: float = 1.0):
+    """
+    Block until the background model load finishes.
+
+    Raises RuntimeError if the load fails or is still running after timeout
+    seconds, so a broken model stops the master instead of hanging it.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        status = predict.get_load_status()
+        if status["status"] == "ready":
+            return
+        if status["status"] == "error":
+            raise RuntimeError(f"Model failed to load: {status['error']}")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError(f"Model still {status['status']} after {timeout:g}s (MODEL_LOAD_TIMEOUT_SECONDS)")
+        predict.wait_until_ready(min(poll, remaining))
+
+
+def when_ready(server):
+    """Master: block until the model is loaded, then freeze the heap before forking."""
+    import torch
+    import predict
+
+    torch.set_num_threads(1)
+    server.log.info("Waiting for the model to load in the master process...")
+    wait_for_model(predict)
+
+    # Move every loaded object to the permanent generation so the garbage
+    # collector does not write to (and un-share) pages in the workers.
+    gc.collect()
+    gc.freeze()
+
+    server.log.info(
+        f"Master {os.getpid()} ready: {memory_report()} | "
+        f"{workers} workers x {threads} threads, {TORCH_THREADS} torch threads each ({CORES} cores)"
+    )
+
+
+def post_fork(server, worker):
+    """Worker: pin torch thread pools to this worker's share of the cores."""
+    import torch
+
+    torch.set_num_threads(TORCH_THREADS)
+    try:
+        torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+    except RuntimeError:
+        pass # Already fixed for this process
+
+
+def post_worker_init(worker):
+    """Worker: startup memory report."""
+    worker.log.info(f"Worker {os.getpid()} memory: {memory_report()}")
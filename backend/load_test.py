@@ -0,0 +1,307 @@
+"""
+Load test for the bias checker API.
+
+Drives one or more endpoints with payloads sampled from the labeled dataset
+and reports, per endpoint and load step, throughput, status codes, error
+rate, latency percentiles and a latency histogram, plus the saturation point
+of each sweep.
+
+Two load models:
+    closed  Fixed concurrency: N clients each send the next request as soon as
+            the previous one returns (--concurrency 1,2,4,8 sweeps N).
+    open    Fixed arrival rate: requests start on a fixed schedule no matter
+            how slowly the server answers (--rate 1,2,4 sweeps requests/second).
+            Latency is measured from the scheduled start, so queueing in front
+            of a saturated server shows up in the percentiles.
+
+Repeated texts are answered from the server's caches (RoBERTa results,
+GPT explanations, LLM responses) unless --no-cache is given; the report lists
+which caches were active for the run, read from GET /stats.
+
+A step meets the SLO when its p95 latency is within --slo-p95-ms and its error
+rate is within --slo-error-rate. A sweep is saturated at the first step that
+misses the SLO, or where more load no longer buys throughput: less than 10%
+more than the previous closed-loop step, or less than 95% of the offered
+open-loop rate.
+
+Pair it with the offline OpenAI stand-in (src/mock_llm_server.py) or a
+replayed cassette (LLM_CASSETTE_MODE=replay) to exercise the LLM paths
+without network access or quota:
+
+    python src/mock_llm_server.py --port 8100 &
+    OPENAI_API_KEY=mock LLM_BASE_URL=http://localhost:8100/v1 gunicorn -c gunicorn.conf.py &
+    python load_test.py --endpoints /predict,/predict-batch,/predict-fewshot,/health --concurrency 1,2,4,8,16
+    python load_test.py --mode open --endpoints /predict --rate 1,2,4,8 --duration 30 --output sizing.json
+
+Options:
+    --url URL             API base URL (default: http://localhost:8000)
+    --endpoints LIST      Comma-separated endpoints (default: /predict); --endpoint is an alias
+    --mode MODE           closed or open (default: closed)
+    --concurrency LIST    Closed loop: clients per step (default: 8)
+    --requests N          Closed loop: requests per step (default: 200)
+    --rate LIST           Open loop: requests/second per step (default: 2)
+    --duration SECONDS    Open loop: length of each step (default: 30)
+    --max-in-flight N     Open loop: requests in flight before new ones are dropped (default: 256)
+    --batch-size N        Texts per /predict-batch request (default: 8)
+    --seed N              Payload sampling seed (default: 13)
+    --slo-p95-ms MS       p95 latency objective (default: 1000)
+    --slo-error-rate F    Error-rate objective (default: 0.01)
+    --no-cache            Send "no_cache": true so requests bypass the result and LLM caches
+                          (every request runs the classifier and reaches the LLM)
+    --output PATH         Also write the report as JSON
+
+Exit code 1 when an endpoint misses the SLO at every step.
+"""
+
+import sys
+import csv
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+DATASET_PATH = Path(__file__).parent / "data" / "abim_bias_balanced_3Bias.csv"
+
+# Upper edges (ms) of the latency histogram buckets; the last bucket is open-ended
+HISTOGRAM_EDGES_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# Endpoints answered with GET; everything else is POSTed a JSON payload
+GET_ENDPOINTS = ("/health", "/model-info", "/stats")
+
+
+def load_texts() -> list:
+    with open(DATASET_PATH, newline="", encoding="utf-8") as f:
+        return [row["text_clean"] for row in csv.DictReader(f) if row.get("text_clean")]
+
+
+def make_payloads(endpoint: str, texts: list, count: int, rng: random.Random, batch_size: int, no_cache: bool) -> list:
+    """Request bodies for endpoint (None = GET), sampled from the dataset."""
+    if endpoint in GET_ENDPOINTS:
+        return [None] * count
+    if endpoint.endswith("-batch"):
+        return [{"texts": rng.sample(texts, batch_size), "no_cache": no_cache} for _ in range(count)]
+    return [{"text": rng.choice(texts), "no_cache": no_cache} for _ in range(count)]
+
+
+def cache_states(base_url: str, no_cache: bool) -> dict:
+    """
+    Server caches and whether requests could hit them: "active", "bypassed"
+    (--no-cache), "disabled" on the server, or "unknown" if /stats failed.
+    """
+    try:
+        with urllib.request.urlopen(base_url.rstrip("/") + "/stats", timeout=10) as response:
+            stats = json.loads(response.read())
+    except (urllib.error.URLError, TimeoutError, ConnectionError, ValueError):
+        stats = {}
+
+    def state(enabled):
+        if enabled is None:
+            return "unknown"
+        if not enabled:
+            return "disabled"
+        return "bypassed" if no_cache else "active"
+
+    result_cache = stats.get("result_cache", {})
+    return {
+        "classification": state(result_cache.get("classification", {}).get("enabled")),
+        "explanation": state(result_cache.get("explanation", {}).get("enabled")),
+        "llm": state(stats.get("llm_cache", {}).get("enabled"))
+    }
+
+
+def send(url: str, payload: dict):
+    """Returns (status, seconds)."""
+    if payload is None:
+        request = urllib.request.Request(url)
+    else:
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"}
+        )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError, ConnectionError):
+        status = "connection_error"
+    return status, time.perf_counter() - start
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def histogram(latencies: list) -> dict:
+    counts = {f"<={edge}ms": 0 for edge in HISTOGRAM_EDGES_MS}
+    counts[f">{HISTOGRAM_EDGES_MS[-1]}ms"] = 0
+    for seconds in latencies:
+        ms = seconds * 1000
+        edge = next((edge for edge in HISTOGRAM_EDGES_MS if ms <= edge), None)
+        counts[f"<={edge}ms" if edge is not None else f">{HISTOGRAM_EDGES_MS[-1]}ms"] += 1
+    return counts
+
+
+def run_closed(url: str, payloads: list, concurrency: int):
+    """Returns (results, seconds) with concurrency requests in flight."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda payload: send(url, payload), payloads))
+    return results, time.perf_counter() - start
+
+
+def run_open(url: str, payloads: list, rate: float, max_in_flight: int):
+    """
+    Start one request every 1/rate seconds; latency counts from the scheduled start.
+
+    Returns:
+        (results, seconds); requests dropped because max_in_flight were
+        already pending are reported with status "dropped", and requests
+        that raised with status "exception:<ExceptionType>"
+    """
+    results = []
+    lock = threading.Lock()
+    in_flight = threading.Semaphore(max_in_flight)
+
+    def issue(payload, scheduled):
+        try:
+            status, _ = send(url, payload)
+        except Exception as e:
+            # The pool would keep this in an unread future; count it as a failed request instead
+            status = f"exception:{type(e).__name__}"
+        finally:
+            in_flight.release()
+        with lock:
+            results.append((status, time.perf_counter() - scheduled))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i, payload in enumerate(payloads):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not in_flight.acquire(blocking=False):
+                with lock:
+                    results.append(("dropped", 0.0))
+                continue
+            pool.submit(issue, payload, scheduled)
+    return results, time.perf_counter() - start
+
+
+def summarize(results: list, seconds: float, slo_p95_ms: float, slo_error_rate: float) -> dict:
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [latency for status, latency in results if status == 200]
+    errors = len(results) - len(ok)
+    error_rate = errors / len(results) if results else 0.0
+
+    latency_ms = {
+        name: round(percentile(ok, p) * 1000, 1)
+        for name, p in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+    }
+    return {
+        "requests": len(results),
+        "seconds": round(seconds, 2),
+        "throughput_rps": round(len(ok) / seconds, 2) if seconds else 0.0,
+        "status_codes": statuses,
+        "error_rate": round(error_rate, 4),
+        "latency_ms": latency_ms,
+        "histogram": histogram(ok),
+        "meets_slo": bool(ok) and latency_ms["p95"] <= slo_p95_ms and error_rate <= slo_error_rate
+    }
+
+
+def find_saturation(steps: list, mode: str) -> dict:
+    """Highest load within the SLO and the first step where the server saturates."""
+    within_slo = None
+    saturated_at = None
+    previous = None
+    for step in steps:
+        if step["meets_slo"]:
+            within_slo = step["load"]
+        if saturated_at is None:
+            if not step["meets_slo"]:
+                saturated_at = step["load"]
+            elif mode == "open" and step["throughput_rps"] < 0.95 * step["load"]:
+                saturated_at = step["load"]
+            elif mode == "closed" and previous and step["throughput_rps"] < 1.10 * previous["throughput_rps"]:
+                saturated_at = step["load"]
+        previous = step
+    return {"max_load_within_slo": within_slo, "saturated_at": saturated_at}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the bias checker API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoints", "--endpoint", default="/predict")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", default="8")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", default="2")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--slo-p95-ms", type=float, default=1000)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    loads = [int(n) for n in args.concurrency.split(",")] if args.mode == "closed" else [float(r) for r in args.rate.split(",")]
+    texts = load_texts()
+    caches = cache_states(args.url, args.no_cache)
+    print("🗄️ Caches: " + ", ".join(f"{name} {state}" for name, state in caches.items()))
+
+    report = {
+        "url": args.url,
+        "mode": args.mode,
+        "seed": args.seed,
+        "slo": {"p95_ms": args.slo_p95_ms, "error_rate": args.slo_error_rate},
+        "caches": caches,
+        "endpoints": {}
+    }
+    for endpoint in endpoints:
+        url = args.url.rstrip("/") + endpoint
+        rng = random.Random(args.seed)
+        steps = []
+        for load in loads:
+            count = args.requests if args.mode == "closed" else max(1, int(load * args.duration))
+            payloads = make_payloads(endpoint, texts, count, rng, args.batch_size, args.no_cache)
+
+            if args.mode == "closed":
+                print(f"🚀 {endpoint}: {count} requests, {load} concurrent...")
+                results, seconds = run_closed(url, payloads, load)
+            else:
+                print(f"🚀 {endpoint}: {load} requests/s for {args.duration:.0f}s...")
+                results, seconds = run_open(url, payloads, load, args.max_in_flight)
+
+            step = {"load": load, **summarize(results, seconds, args.slo_p95_ms, args.slo_error_rate)}
+            steps.append(step)
+            print(f"   {step['throughput_rps']} req/s, p50 {step['latency_ms']['p50']} ms, "
+                  f"p95 {step['latency_ms']['p95']} ms, errors {step['error_rate']:.1%}"
+                  f"{'' if step['meets_slo'] else '  ⚠️ SLO missed'}")
+
+        report["endpoints"][endpoint] = {"steps": steps, **find_saturation(steps, args.mode)}
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Report written to {args.output}")
+
+    missed = [endpoint for endpoint, result in report["endpoints"].items() if result["max_load_within_slo"] is None]
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,232 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
 import sys
+import json
+from concurrent.futures import TimeoutError as FutureTimeoutError
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from predict import predict_bias
-from few_shot_classifier import classify_bias_few_shot, get_model_info
+from predict import (
+    predict_bias, predict_bias_many, predict_bias_batch, predict_bias_long, get_inference_info,
+    start_background_loading, wait_until_ready, get_load_status, get_cached_prediction,
+    load_adapter, unload_adapter, list_adapters, resolve_adapter_name, AdapterError
+)
+from result_cache import get_cache_stats
+from cascade import cascade_policy
+from llm_cache import llm_cache
+from llm_resilience import get_resilience_stats
+from llm_client import get_client_info
+from llm_cassette import cassette
+from explanation_jobs import explanation_jobs
+import request_metrics
+from request_metrics import stage, render_samples
+from micro_batcher import MicroBatcher, ENABLED as MICROBATCH_ENABLED, TIMEOUT_SECONDS as MICROBATCH_TIMEOUT
+from few_shot_classifier import classify_bias_few_shot, classify_batch_few_shot, stream_bias_few_shot, get_model_info
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that reports request parsing and response serialization as stages"""
+
+    def loads(self, s, **kwargs):
+        with stage("parse"):
+            return super().loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        with stage("serialize"):
+            return super().dumps(obj, **kwargs)
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all origins
+app.json = TimedJSONProvider(app)
+CORS(app, expose_headers=["Server-Timing"])  # Enable CORS for all origins (the frontend reads Server-Timing)
+
+# Concurrent /predict calls share padded forward passes
+# (/predict checks the result cache itself before submitting)
+batcher = MicroBatcher(lambda texts, adapter: predict_bias_many(texts, lookup=False, adapter=adapter))
+
+# Shared secret for the /admin endpoints (they are disabled when unset)
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# Default for /predict's "async_explanation" flag
+EXPLANATION_ASYNC = os.environ.get("EXPLANATION_ASYNC", "0") == "1"
+
+# Largest list accepted by /predict-fewshot-batch
+FEWSHOT_BATCH_MAX_ITEMS = int(os.environ.get("FEWSHOT_BATCH_MAX_ITEMS", "500"))
+
+# Seconds a RoBERTa request may wait for the background model load before a 503
+MODEL_LOAD_WAIT_SECONDS = float(os.environ.get("MODEL_LOAD_WAIT_SECONDS", "30"))
+
+# Load the model in the background so the server can bind its port right away
+start_background_loading()
+
+def model_not_ready_response():
+    """503 response returned by RoBERTa endpoints while the model is loading."""
+    load_status = get_load_status()
+    return jsonify({
+        "error": "Model is still loading, please retry shortly" if load_status["status"] != "error"
+                 else f"Model failed to load: {load_status['error']}",
+        "status": load_status["status"]
+    }), 503
+
+@app.before_request
+def start_request_timer():
+    request_metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    """Per-stage timings of this request as a Server-Timing header"""
+    timer = request_metrics.current_timer()
+    if timer is not None:
+        timer.status = response.status_code
+        if request_metrics.SERVER_TIMING:
+            response.headers["Server-Timing"] = timer.server_timing()
+            response.headers["Timing-Allow-Origin"] = "*"
+    return response
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    # Runs after a streamed response has finished, so stream stages are included
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    request_metrics.finish_request(endpoint, request.method)
+
+def compute_audit_score(predicted_label, confidence):
+    """Audit score (1-10) for a RoBERTa label/confidence (logic migrated from frontend)"""
+    if predicted_label == 'no_bias':
+        return min(10, round(8 + confidence * 2))
+    return max(1, round((1 - confidence) * 10))
+
+def get_compliance_rating(audit_score):
+    """Map an audit score to its compliance rating"""
+    if audit_score >= 9: return 'Excellent'
+    elif audit_score >= 7: return 'Good'
+    elif audit_score >= 5: return 'Fair'
+    elif audit_score >= 3: return 'Needs Improvement'
+    else: return 'High Risk'
+
+def admin_auth_error():
+    """Return an error response unless the request carries the admin token"""
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (set ADMIN_TOKEN)"}), 403
+    if request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({"error": "Invalid or missing X-Admin-Token header"}), 401
+    return None
+
+def fewshot_audit_score(bias_level):
+    """Audit score for a few-shot bias level"""
+    level_scores = {"NONE": 10, "LOW": 7, "MODERATE": 5, "HIGH": 3, "CRITICAL": 1}
+    return level_scores.get(bias_level, 5)
+
+def format_fewshot_response(text, result):
+    """Add audit score, compliance rating and backward compatible fields to a few-shot result"""
+    # Calculate Audit Score based on bias level
+    bias_level = result.get("overall_bias_level", "NONE")
+    with stage("audit_score"):
+        audit_score = fewshot_audit_score(bias_level)
+        
+        # Determine Compliance Rating
+        compliance_rating = get_compliance_rating(audit_score)
+    
+    # Extract flags (problematic texts) for backward compatibility
+    biases = result.get("biases_found", [])
+    flags = [b.get("problematic_text", "") for b in biases if b.get("problematic_text")]
+    
+    # Calculate average confidence
+    if biases:
+        avg_confidence = sum(b.get("confidence", 0) for b in biases) / len(biases)
+    else:
+        avg_confidence = 0.95 if result.get("primary_category") == "no_bias" else 0.0
+    
+    return {
+        # Pipeline response format
+        "bias_detected": result.get("bias_detected", False),
+        "primary_category": result.get("primary_category", "unknown"),
+        "overall_bias_level": result.get("overall_bias_level", "NONE"),
+        "biases_found": biases,
+        "bias_free_sections": result.get("bias_free_sections", []),
+        "summary": result.get("summary", ""),
+        
+        # Backward compatible fields
+        "text": text,
+        "predicted_label": result.get("primary_category", "unknown"),
+        "confidence": round(avg_confidence, 4),
+        "audit_score": audit_score,
+        "compliance_rating": compliance_rating,
+        "rationale": result.get("summary", ""),
+        "flags": flags,
+        
+        # Metadata
+        "model_type": "few-shot-gpt",
+        "num_biases": len(biases)
+    }
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
-    return jsonify({"status": "Model is ready"}), 200
+    """Health check endpoint: 200 once the model is ready, 503 while loading (or failed)"""
+    load_status = get_load_status()
+    if load_status["status"] != "ready":
+        return jsonify({
+            "status": load_status["status"],
+            "message": "Model is loading" if load_status["status"] != "error" else "Model failed to load",
+            "error": load_status["error"]
+        }), 503
+
+    return jsonify({
+        "status": "ready",
+        "message": "Model is ready",
+        "load_seconds": load_status["load_seconds"],
+        **get_inference_info()
+    }), 200
 
 @app.route('/model-info', methods=['GET'])
 def model_info():
-    """Return information about the few-shot model configuration"""
+    """Return information about the few-shot and RoBERTa model configuration"""
     try:
         info = get_model_info()
+        info["roberta"] = get_inference_info()
         return jsonify(info), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Return serving counters (micro-batching, caches, explanation cascade and jobs, LLM calls)"""
+    return jsonify({
+        "micro_batching": batcher.stats(),
+        "result_cache": get_cache_stats(),
+        "cascade": cascade_policy.stats(),
+        "llm_cache": llm_cache.stats(),
+        "explanation_jobs": explanation_jobs.stats(),
+        "llm_resilience": get_resilience_stats(),
+        "llm_client": get_client_info(),
+        "llm_cassette": cassette.stats()
+    }), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics for this worker process: request and per-stage latency
+    histograms, request/error/in-flight counts and cache hits and misses.
+    """
+    caches = [
+        (name, stats["hits"], stats["misses"]) for name, stats in get_cache_stats().items()
+    ] + [("llm", llm_cache.hits, llm_cache.misses)]
+    extra = [
+        render_samples("bias_checker_cache_hits_total", "Cache hits", "counter", ("cache",),
+                       [((name,), hits) for name, hits, _ in caches]),
+        render_samples("bias_checker_cache_misses_total", "Cache misses", "counter", ("cache",),
+                       [((name,), misses) for name, _, misses in caches])
+    ]
+    return Response(request_metrics.render_metrics(extra), mimetype="text/plain; version=0.0.4")
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
     Predict bias label for input text using the fine-tuned RoBERTa model.
-    Expected JSON: {"text": "your clinical text here"}
+    Expected JSON: {"text": "your clinical text here", "adapter": "optional adapter name"}
+    "no_cache": true bypasses the cached classification and GPT explanation.
+    "async_explanation": true returns without waiting for GPT; the explanation
+    is then fetched from GET /explanations/<explanation_job_id>.
     """
     try:
         data = request.get_json()
@@ -43,28 +239,47 @@ def predict():
         if not isinstance(text, str) or len(text.strip()) == 0:
             return jsonify({"error": "Text must be a non-empty string"}), 400
         
+        if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+            return model_not_ready_response()
         
-        # Make prediction
-        predicted_label, confidence = predict_bias(text)
+        adapter = resolve_adapter_name(data.get('adapter'))
+        use_cache = not data.get('no_cache', False)
         
-        # Calculate Audit Score (Logic migrated from frontend)
-        if predicted_label == 'no_bias':
-            audit_score = min(10, round(8 + confidence * 2))
+        # Make prediction (cache hit, or micro-batched with concurrent requests)
+        cached = get_cached_prediction(text, adapter) if use_cache else None
+        if cached is not None:
+            predicted_label, confidence = cached
+        elif MICROBATCH_ENABLED:
+            try:
+                predicted_label, confidence = batcher.submit(text, adapter, timeout=MICROBATCH_TIMEOUT)
+            except FutureTimeoutError:
+                return jsonify({"error": "Classification queue is busy, please retry shortly"}), 503
         else:
-            audit_score = max(1, round((1 - confidence) * 10))
-            
-        # Determine Compliance Rating
-        if audit_score >= 9: compliance_rating = 'Excellent'
-        elif audit_score >= 7: compliance_rating = 'Good'
-        elif audit_score >= 5: compliance_rating = 'Fair'
-        elif audit_score >= 3: compliance_rating = 'Needs Improvement'
-        else: compliance_rating = 'High Risk'
+            predicted_label, confidence = predict_bias(text, adapter, lookup=use_cache)
+        
+        # Calculate Audit Score and Compliance Rating
+        with stage("audit_score"):
+            audit_score = compute_audit_score(predicted_label, confidence)
+            compliance_rating = get_compliance_rating(audit_score)
 
-        # Generate Explanation via OpenAI
-        from llm_service import generate_bias_explanation
-        explanation = generate_bias_explanation(text, predicted_label, confidence)
+        # Generate Explanation: local template, deferred, or via OpenAI (cascade policy)
+        explanation_tier = cascade_policy.decide(predicted_label, confidence)
+        job_id = None
+        if explanation_tier == "local":
+            explanation = cascade_policy.local_explanation(text, predicted_label, confidence)
+        elif explanation_tier == "deferred":
+            explanation = cascade_policy.deferred_explanation(text)
+        else:
+            if data.get('async_explanation', EXPLANATION_ASYNC):
+                # None when the background queue is full: explain inline instead
+                job_id = explanation_jobs.submit(text, predicted_label, confidence, use_cache)
+            if job_id is not None:
+                explanation = cascade_policy.deferred_explanation(text)
+            else:
+                from llm_service import generate_bias_explanation
+                explanation = generate_bias_explanation(text, predicted_label, confidence, use_cache=use_cache)
         
-        return jsonify({
+        response = {
             "text": text,
             "predicted_label": predicted_label,
             "confidence": round(confidence, 4),
@@ -72,9 +287,155 @@ def predict():
             "compliance_rating": compliance_rating,
             "rationale": explanation.get("rationale", ""),
             "flags": explanation.get("flags", []),
-            "recommended_revision": explanation.get("recommended_revision", text)
+            "recommended_revision": explanation.get("recommended_revision", text),
+            "explanation_tier": explanation_tier,
+            "adapter": adapter
+        }
+        if job_id is not None:
+            response.update({"explanation_job_id": job_id, "explanation_status": "pending"})
+        elif explanation_tier == "deferred":
+            response["deferral_token"] = cascade_policy.issue_deferral(text, predicted_label, confidence)
+        
+        return jsonify(response), 200
+    
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/explanations/<job_id>', methods=['GET'])
+def get_explanation(job_id):
+    """
+    Poll an asynchronous /predict explanation.
+    Optional ?wait=N long-polls up to N seconds (max 30) for a pending job.
+    
+    Returns the job status ("pending", "done" or "error"), plus rationale,
+    flags and recommended_revision once done.
+    """
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    
+    try:
+        job = explanation_jobs.get(job_id, wait=wait)
+        if job is None:
+            return jsonify({"error": f"Unknown or expired explanation job '{job_id}'"}), 404
+        return jsonify(job), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/explain', methods=['POST'])
+def explain():
+    """
+    Generate the GPT explanation for a classification.
+    Expected JSON: {"text": "...", "deferral_token": "..."} for a result /predict
+    deferred (the token carries its label and confidence), or
+    {"text": "...", "predicted_label": "...", "confidence": 0.97};
+    predicted_label/confidence may be omitted to classify the text first.
+    "no_cache": true bypasses the cached explanation.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({"error": "Missing 'text' field in request"}), 400
+        
+        text = data['text']
+        
+        if not isinstance(text, str) or len(text.strip()) == 0:
+            return jsonify({"error": "Text must be a non-empty string"}), 400
+        
+        token = data.get('deferral_token')
+        if token is not None:
+            deferred = cascade_policy.verify_deferral(token, text)
+            if deferred is None:
+                return jsonify({"error": "Invalid or expired deferral_token for this text"}), 400
+            predicted_label, confidence = deferred
+        else:
+            predicted_label = data.get('predicted_label')
+            confidence = data.get('confidence')
+        
+        if predicted_label is None or confidence is None:
+            if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+                return model_not_ready_response()
+            predicted_label, confidence = predict_bias(text, data.get('adapter'))
+        elif not isinstance(confidence, (int, float)):
+            return jsonify({"error": "confidence must be a number"}), 400
+        
+        from llm_service import generate_bias_explanation
+        explanation = generate_bias_explanation(
+            text, predicted_label, float(confidence), use_cache=not data.get('no_cache', False)
+        )
+        if token is not None:
+            cascade_policy.record_deferred_fetch(token)
+        
+        return jsonify({
+            "text": text,
+            "predicted_label": predicted_label,
+            "confidence": round(float(confidence), 4),
+            "rationale": explanation.get("rationale", ""),
+            "flags": explanation.get("flags", []),
+            "recommended_revision": explanation.get("recommended_revision", text),
+            "explanation_tier": "llm"
+        }), 200
+    
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predict-long', methods=['POST'])
+def predict_long():
+    """
+    Classify a long document with overlapping token windows (no truncation).
+    Expected JSON: {"text": "...", "aggregate": "max" | "weighted", "adapter": "optional adapter name"}
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({"error": "Missing 'text' field in request"}), 400
+        
+        text = data['text']
+        aggregate = data.get('aggregate', 'max')
+        
+        if not isinstance(text, str) or len(text.strip()) == 0:
+            return jsonify({"error": "Text must be a non-empty string"}), 400
+        if aggregate not in ('max', 'weighted'):
+            return jsonify({"error": "aggregate must be 'max' or 'weighted'"}), 400
+        
+        if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+            return model_not_ready_response()
+        
+        result = predict_bias_long(text, aggregate=aggregate, adapter=data.get('adapter'))
+        audit_score = compute_audit_score(result["predicted_label"], result["confidence"])
+        
+        return jsonify({
+            "text": text,
+            "predicted_label": result["predicted_label"],
+            "confidence": round(result["confidence"], 4),
+            "audit_score": audit_score,
+            "compliance_rating": get_compliance_rating(audit_score),
+            "aggregation": result["aggregation"],
+            "num_windows": result["num_windows"],
+            "windows": [
+                {
+                    **window,
+                    "confidence": round(window["confidence"], 4),
+                    "scores": {label: round(p, 4) for label, p in window["scores"].items()}
+                }
+                for window in result["windows"]
+            ],
+            "adapter": resolve_adapter_name(data.get('adapter'))
         }), 200
     
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -90,6 +451,8 @@ def predict_fewshot():
     - 5 Few-Shot Example Pairs
     
     Expected JSON: {"text": "your clinical text here"}
+    ("no_cache": true bypasses the persistent LLM response cache; "source_type":
+    "exam_vignette" | "feedback_snippet" restricts retrieved few-shot examples)
     
     Returns (Full Pipeline Response):
         - bias_detected: Boolean
@@ -112,57 +475,117 @@ def predict_fewshot():
         if not isinstance(text, str) or len(text.strip()) == 0:
             return jsonify({"error": "Text must be a non-empty string"}), 400
         
+        if not isinstance(data.get('source_type', ''), (str, type(None))):
+            return jsonify({"error": "source_type must be a string"}), 400
+        
         # Classify using few-shot prompting (full pipeline)
-        result = classify_bias_few_shot(text)
+        result = classify_bias_few_shot(
+            text, use_cache=not data.get('no_cache', False), source_type=data.get('source_type')
+        )
         
         # Check for errors
         if result.get("error"):
             return jsonify(result), 500
         
-        # Calculate Audit Score based on bias level
-        level_scores = {"NONE": 10, "LOW": 7, "MODERATE": 5, "HIGH": 3, "CRITICAL": 1}
-        bias_level = result.get("overall_bias_level", "NONE")
-        audit_score = level_scores.get(bias_level, 5)
+        return jsonify(format_fewshot_response(text, result)), 200
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predict-fewshot-stream', methods=['POST'])
+def predict_fewshot_stream():
+    """
+    Streaming variant of /predict-fewshot (Server-Sent Events).
+    Expected JSON: same as /predict-fewshot
+    
+    Events, each sent as soon as its part of the GPT response is complete:
+        - primary_category: {"primary_category": ...}
+        - overall_bias_level: {"overall_bias_level", "audit_score", "compliance_rating"}
+        - bias: {"index": i, "bias": {...}} for each element of biases_found
+        - result: the full /predict-fewshot response
+        - error: {"error": ..., ...} (replaces result on failure)
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or 'text' not in data:
+        return jsonify({"error": "Missing 'text' field in request"}), 400
+    
+    text = data['text']
+    
+    if not isinstance(text, str) or len(text.strip()) == 0:
+        return jsonify({"error": "Text must be a non-empty string"}), 400
+    
+    if not isinstance(data.get('source_type', ''), (str, type(None))):
+        return jsonify({"error": "source_type must be a string"}), 400
+    
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    def events():
+        for event, payload in stream_bias_few_shot(
+            text, use_cache=not data.get('no_cache', False), source_type=data.get('source_type')
+        ):
+            if event == "overall_bias_level":
+                audit_score = fewshot_audit_score(payload["overall_bias_level"])
+                payload = {**payload, "audit_score": audit_score, "compliance_rating": get_compliance_rating(audit_score)}
+            elif event == "result":
+                payload = format_fewshot_response(text, payload)
+                # Headers went out before the stream, so the timings travel with the result
+                timer = request_metrics.current_timer()
+                if timer is not None and request_metrics.SERVER_TIMING:
+                    payload["server_timing"] = timer.milliseconds()
+            yield sse(event, payload)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.route('/predict-fewshot-batch', methods=['POST'])
+def predict_fewshot_batch():
+    """
+    Few-shot GPT classification for many texts, sent concurrently
+    (at most FEWSHOT_MAX_CONCURRENCY requests in flight).
+    Expected JSON: {"texts": ["text1", "text2", ...], "no_cache": false, "source_type": null}
+    
+    Returns predictions in input order; a failed or invalid item gets its own
+    "error" without affecting the others.
+    """
+    try:
+        data = request.get_json()
         
-        # Determine Compliance Rating
-        if audit_score >= 9: compliance_rating = 'Excellent'
-        elif audit_score >= 7: compliance_rating = 'Good'
-        elif audit_score >= 5: compliance_rating = 'Fair'
-        elif audit_score >= 3: compliance_rating = 'Needs Improvement'
-        else: compliance_rating = 'High Risk'
-        
-        # Extract flags (problematic texts) for backward compatibility
-        biases = result.get("biases_found", [])
-        flags = [b.get("problematic_text", "") for b in biases if b.get("problematic_text")]
-        
-        # Calculate average confidence
-        if biases:
-            avg_confidence = sum(b.get("confidence", 0) for b in biases) / len(biases)
-        else:
-            avg_confidence = 0.95 if result.get("primary_category") == "no_bias" else 0.0
+        if not data or 'texts' not in data:
+            return jsonify({"error": "Missing 'texts' field in request"}), 400
         
-        return jsonify({
-            # Pipeline response format
-            "bias_detected": result.get("bias_detected", False),
-            "primary_category": result.get("primary_category", "unknown"),
-            "overall_bias_level": result.get("overall_bias_level", "NONE"),
-            "biases_found": biases,
-            "bias_free_sections": result.get("bias_free_sections", []),
-            "summary": result.get("summary", ""),
-            
-            # Backward compatible fields
-            "text": text,
-            "predicted_label": result.get("primary_category", "unknown"),
-            "confidence": round(avg_confidence, 4),
-            "audit_score": audit_score,
-            "compliance_rating": compliance_rating,
-            "rationale": result.get("summary", ""),
-            "flags": flags,
-            
-            # Metadata
-            "model_type": "few-shot-gpt",
-            "num_biases": len(biases)
-        }), 200
+        texts = data['texts']
+        
+        if not isinstance(texts, list):
+            return jsonify({"error": "Texts must be a list"}), 400
+        if len(texts) > FEWSHOT_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"At most {FEWSHOT_BATCH_MAX_ITEMS} texts per request"}), 400
+        if not isinstance(data.get('source_type', ''), (str, type(None))):
+            return jsonify({"error": "source_type must be a string"}), 400
+        
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and len(text.strip()) > 0]
+        classified = dict(zip(valid, classify_batch_few_shot(
+            [texts[i] for i in valid],
+            use_cache=not data.get('no_cache', False),
+            source_type=data.get('source_type')
+        )))
+        
+        results = []
+        for i, text in enumerate(texts):
+            if i not in classified:
+                results.append({"text": text, "error": "Text must be a non-empty string"})
+            elif classified[i].get("error"):
+                results.append({**classified[i], "text": text})
+            else:
+                results.append(format_fewshot_response(text, classified[i]))
+        
+        return jsonify({"predictions": results}), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -173,7 +596,8 @@ def predict_fewshot():
 def predict_batch():
     """
     Predict bias labels for multiple texts.
-    Expected JSON: {"texts": ["text1", "text2", ...]}
+    Expected JSON: {"texts": ["text1", "text2", ...], "adapter": "optional adapter name"}
+    "no_cache": true bypasses the cached classifications.
     """
     try:
         data = request.get_json()
@@ -186,10 +610,19 @@ def predict_batch():
         if not isinstance(texts, list):
             return jsonify({"error": "Texts must be a list"}), 400
         
+        if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+            return model_not_ready_response()
+        
+        # Classify every valid entry together; invalid ones keep their own error
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and len(text.strip()) > 0]
+        predictions = dict(zip(valid, predict_bias_batch(
+            [texts[i] for i in valid], adapter=data.get('adapter'), lookup=not data.get('no_cache', False)
+        )))
+
         results = []
-        for text in texts:
-            if isinstance(text, str) and len(text.strip()) > 0:
-                predicted_label, confidence = predict_bias(text)
+        for i, text in enumerate(texts):
+            if i in predictions:
+                predicted_label, confidence = predictions[i]
                 results.append({
                     "text": text,
                     "predicted_label": predicted_label,
@@ -203,6 +636,64 @@ def predict_batch():
         
         return jsonify({"predictions": results}), 200
     
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/adapters', methods=['GET'])
+def get_adapters():
+    """List the LoRA adapters attached to the shared base model"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    return jsonify({"adapters": list_adapters()}), 200
+
+
+@app.route('/admin/adapters', methods=['POST'])
+def post_adapter():
+    """
+    Load a LoRA adapter at runtime (multi-adapter serving).
+    Expected JSON: {"name": "checkpoint-642", "path": "optional path relative to ADAPTERS_DIR"}
+    """
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('name'), str) or not data['name'].strip():
+            return jsonify({"error": "Missing 'name' field in request"}), 400
+        
+        if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+            return model_not_ready_response()
+        
+        adapter = load_adapter(data['name'].strip(), data.get('path'))
+        return jsonify({"loaded": adapter, "adapters": list_adapters()}), 201
+    
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/admin/adapters/<name>', methods=['DELETE'])
+def delete_adapter(name):
+    """Unload a runtime-loaded LoRA adapter"""
+    auth_error = admin_auth_error()
+    if auth_error:
+        return auth_error
+    
+    try:
+        if not wait_until_ready(MODEL_LOAD_WAIT_SECONDS):
+            return model_not_ready_response()
+        
+        unload_adapter(name)
+        return jsonify({"unloaded": name, "adapters": list_adapters()}), 200
+    
+    except AdapterError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -213,9 +704,17 @@ if __name__ == '__main__':
     print("Endpoints:")
     print("  GET  /health          - Health check")
     print("  GET  /model-info      - Few-shot model configuration")
+    print("  GET  /stats           - Serving counters")
+    print("  GET  /metrics         - Prometheus request/stage/cache metrics")
     print("  POST /predict         - Fine-tuned RoBERTa classification")
+    print("  POST /explain         - GPT explanation for a (deferred) classification")
+    print("  GET  /explanations/<id> - Poll an asynchronous /predict explanation")
+    print("  POST /predict-long    - Sliding-window long-document classification")
     print("  POST /predict-fewshot - Few-shot GPT classification")
+    print("  POST /predict-fewshot-stream - Few-shot GPT classification (Server-Sent Events)")
     print("  POST /predict-batch   - Batch classification")
+    print("  POST /predict-fewshot-batch - Concurrent few-shot GPT classification")
+    print("  GET/POST/DELETE /admin/adapters - Manage LoRA adapters (multi-adapter serving)")
     print("=" * 60 + "\n")
     app.run(host='0.0.0.0', port=8000, debug=False)
 
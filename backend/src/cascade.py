@@ -0,0 +1,211 @@
+"""
+Confidence-Gated Explanation Cascade
+
+Decides, per /predict request, which tier produces the explanation that goes
+with the RoBERTa classification:
+
+- local:    the classifier is confident enough that a templated rationale is
+            returned without calling the LLM
+- deferred: no explanation is generated now; the response carries a signed
+            deferral_token the client can pass to POST /explain later
+- llm:      generate_bias_explanation() is called as before
+
+Thresholds are per label and compared against the classifier confidence.
+The local threshold is checked first, then the defer threshold; anything
+below both goes to the LLM. Only /explain calls that redeem a deferral token
+count as deferred fetches (once per token), so the avoided-call figures are
+not skewed by unrelated /explain traffic.
+
+Configuration (environment variables, JSON objects of label -> threshold):
+    CASCADE_ENABLED           - "1" turns the cascade on; otherwise every request
+                                goes to the LLM as before (default: "0")
+    CASCADE_LOCAL_THRESHOLDS  - default: {"no_bias": 0.9}
+    CASCADE_DEFER_THRESHOLDS  - default: {}
+    CASCADE_DEFERRAL_SECRET   - HMAC key for deferral tokens (default: random per
+                                start; gunicorn.conf.py picks one in the master
+                                so every worker shares it)
+    CASCADE_DEFERRAL_TTL_SECONDS - How long a deferral token stays valid (default: 86400)
+
+Usage:
+    from cascade import cascade_policy
+
+    tier = cascade_policy.decide(predicted_label, confidence)
+    if tier == "local":
+        explanation = cascade_policy.local_explanation(text, predicted_label, confidence)
+    elif tier == "deferred":
+        token = cascade_policy.issue_deferral(text, predicted_label, confidence)
+
+    # Later, in /explain
+    deferred = cascade_policy.verify_deferral(token, text)  # (label, confidence) or None
+"""
+
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+TIERS = ("llm", "local", "deferred")
+
+
+def _load_thresholds(env_name: str, default: dict) -> dict:
+    raw = os.environ.get(env_name)
+    if not raw:
+        return dict(default)
+    try:
+        thresholds = json.loads(raw)
+        return {label: float(value) for label, value in thresholds.items()}
+    except (ValueError, AttributeError) as e:
+        raise ValueError(f"{env_name} must be a JSON object of label -> threshold: {e}")
+
+
+ENABLED = os.environ.get("CASCADE_ENABLED", "0") == "1"
+LOCAL_THRESHOLDS = _load_thresholds("CASCADE_LOCAL_THRESHOLDS", {"no_bias": 0.9})
+DEFER_THRESHOLDS = _load_thresholds("CASCADE_DEFER_THRESHOLDS", {})
+DEFERRAL_SECRET = os.environ.get("CASCADE_DEFERRAL_SECRET") or secrets.token_hex(32)
+DEFERRAL_TTL = float(os.environ.get("CASCADE_DEFERRAL_TTL_SECONDS", "86400"))
+
+# Redeemed deferral tokens remembered per process (so a token is counted once)
+MAX_REDEEMED_TOKENS = 10000
+
+# Templated rationales for the local tier
+LOCAL_RATIONALES = {
+    "no_bias": "The fine-tuned classifier found no indication of demographic, stigmatizing or assessment bias ({confidence:.0%} confidence). The text appears to use neutral, clinically focused language.",
+    "demographic_bias": "The fine-tuned classifier flagged this text for demographic bias ({confidence:.0%} confidence): clinical reasoning may rely on patient demographics rather than clinical evidence.",
+    "clinical_stigma_bias": "The fine-tuned classifier flagged this text for clinical stigma bias ({confidence:.0%} confidence): the wording may stigmatize the patient or discount their reported experience.",
+    "assessment_bias": "The fine-tuned classifier flagged this text for assessment bias ({confidence:.0%} confidence): the evaluation may rely on subjective or stereotyped judgments."
+}
+
+
+class CascadePolicy:
+    """Per-label confidence thresholds plus counters of where requests went."""
+
+    def __init__(self, local_thresholds: dict, defer_thresholds: dict, enabled: bool = True,
+                 secret: str = DEFERRAL_SECRET, deferral_ttl: float = DEFERRAL_TTL):
+        self.local_thresholds = local_thresholds
+        self.defer_thresholds = defer_thresholds
+        self.enabled = enabled
+        self.deferral_ttl = deferral_ttl
+        self._secret = secret.encode("utf-8")
+
+        self._lock = threading.Lock()
+        self.decisions = {tier: 0 for tier in TIERS}
+        self.decisions_by_label = {}
+        self.deferred_fetched = 0
+        self._redeemed = OrderedDict()
+
+    def decide(self, predicted_label: str, confidence: float) -> str:
+        """
+        Pick the explanation tier for a classification.
+
+        Returns:
+            "local", "deferred" or "llm"
+        """
+        tier = "llm"
+        if self.enabled:
+            if confidence >= self.local_thresholds.get(predicted_label, float("inf")):
+                tier = "local"
+            elif confidence >= self.defer_thresholds.get(predicted_label, float("inf")):
+                tier = "deferred"
+
+        with self._lock:
+            self.decisions[tier] += 1
+            label_counts = self.decisions_by_label.setdefault(predicted_label, {t: 0 for t in TIERS})
+            label_counts[tier] += 1
+        return tier
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _sign(self, body: str) -> str:
+        return hmac.new(self._secret, body.encode("ascii"), hashlib.sha256).hexdigest()
+
+    def issue_deferral(self, text: str, predicted_label: str, confidence: float) -> str:
+        """Signed token tying a deferred /predict result to its text, label and confidence."""
+        payload = json.dumps({
+            "text": self._text_hash(text),
+            "label": predicted_label,
+            "confidence": round(float(confidence), 4),
+            "issued": int(time.time())
+        }, separators=(",", ":"))
+        body = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+        return f"{body}.{self._sign(body)}"
+
+    def verify_deferral(self, token, text: str):
+        """
+        Check a deferral token returned by /predict.
+
+        Returns:
+            Tuple of (predicted_label, confidence), or None if the token is
+            malformed, forged, expired or was issued for another text
+        """
+        if not isinstance(token, str) or token.count(".") != 1:
+            return None
+        body, signature = token.split(".")
+        try:
+            if not hmac.compare_digest(signature, self._sign(body)):
+                return None
+            payload = json.loads(base64.urlsafe_b64decode(body + "=" * (-len(body) % 4)))
+        except (ValueError, TypeError):
+            return None
+
+        if time.time() - payload["issued"] > self.deferral_ttl:
+            return None
+        if not hmac.compare_digest(payload["text"], self._text_hash(text)):
+            return None
+        return payload["label"], payload["confidence"]
+
+    def record_deferred_fetch(self, token: str):
+        """Count a deferred explanation generated through /explain (once per token)."""
+        with self._lock:
+            if token in self._redeemed:
+                return
+            self._redeemed[token] = True
+            if len(self._redeemed) > MAX_REDEEMED_TOKENS:
+                self._redeemed.popitem(last=False)
+            self.deferred_fetched += 1
+
+    @staticmethod
+    def local_explanation(text: str, predicted_label: str, confidence: float) -> dict:
+        """Minimal explanation built without the LLM (same fields as generate_bias_explanation)."""
+        template = LOCAL_RATIONALES.get(
+            predicted_label,
+            "The fine-tuned classifier labeled this text as {label} ({confidence:.0%} confidence)."
+        )
+        return {
+            "rationale": template.format(label=predicted_label, confidence=confidence),
+            "flags": [],
+            "recommended_revision": text
+        }
+
+    @staticmethod
+    def deferred_explanation(text: str) -> dict:
+        """Placeholder explanation for the deferred tier."""
+        return {
+            "rationale": "",
+            "flags": [],
+            "recommended_revision": text
+        }
+
+    def stats(self) -> dict:
+        """Return thresholds and how much LLM traffic the cascade avoided."""
+        total = sum(self.decisions.values())
+        avoided = max(0, self.decisions["local"] + self.decisions["deferred"] - self.deferred_fetched)
+        return {
+            "enabled": self.enabled,
+            "local_thresholds": self.local_thresholds,
+            "defer_thresholds": self.defer_thresholds,
+            "decisions": dict(self.decisions),
+            "decisions_by_label": {label: dict(counts) for label, counts in self.decisions_by_label.items()},
+            "deferred_fetched": self.deferred_fetched,
+            "llm_calls_avoided": avoided,
+            "llm_avoided_rate": round(avoided / total, 4) if total else 0.0
+        }
+
+
+cascade_policy = CascadePolicy(LOCAL_THRESHOLDS, DEFER_THRESHOLDS, enabled=ENABLED)
@@ -0,0 +1,296 @@
+"""
+Retrieval-Based Few-Shot Example Selection
+
+Instead of sending the same five long example pairs with every few-shot
+request, pick the labeled rows of data/abim_bias_balanced_3Bias.csv that are
+closest to the input. Rows are embedded once with the local fine-tuned
+RoBERTa encoder (predict.embed_texts) into a prebuilt index:
+
+    data/example_index/embeddings.npy   - float32 (rows, hidden), L2-normalized
+    data/example_index/examples.json    - label, source_type, text, rationale,
+                                          token estimate per row + build info
+
+The embeddings are memory-mapped, so the index costs page cache rather than
+heap, and preforked workers share it. For each input the k nearest rows are
+taken in order of cosine similarity while they fit the token budget,
+optionally restricted to one source_type (exam_vignette / feedback_snippet).
+
+Selection falls back to the static examples (returns None) whenever the index
+is missing or was built for another model, the model is not loaded yet, or
+the ONNX backend is serving (it only exposes logits).
+
+Configuration (environment variables):
+    FEWSHOT_EXAMPLE_SELECTION     - "static" (default) or "retrieval"
+    FEWSHOT_EXAMPLE_K             - Examples per request (default: 4)
+    FEWSHOT_EXAMPLE_TOKEN_BUDGET  - Token budget for the examples (default: 1000)
+    EXAMPLE_INDEX_PATH            - Index directory (default: backend/data/example_index)
+
+Usage:
+    # Build the index (once per model, PyTorch backend)
+    python src/example_selector.py --build
+
+    # Show the examples picked for a text
+    python src/example_selector.py "Patient claims 10/10 pain but appears comfortable."
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+EXAMPLE_SELECTION = os.environ.get("FEWSHOT_EXAMPLE_SELECTION", "static").lower()
+EXAMPLE_K = int(os.environ.get("FEWSHOT_EXAMPLE_K", "4"))
+EXAMPLE_TOKEN_BUDGET = int(os.environ.get("FEWSHOT_EXAMPLE_TOKEN_BUDGET", "1000"))
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DATASET_FILE = DATA_DIR / "abim_bias_balanced_3Bias.csv"
+INDEX_PATH = Path(os.environ.get("EXAMPLE_INDEX_PATH", str(DATA_DIR / "example_index")))
+EMBEDDINGS_FILE = "embeddings.npy"
+EXAMPLES_FILE = "examples.json"
+
+# Nearest rows considered before applying the token budget
+CANDIDATE_POOL = 64
+
+if EXAMPLE_SELECTION not in ("static", "retrieval"):
+    raise ValueError(f"FEWSHOT_EXAMPLE_SELECTION must be 'static' or 'retrieval', got '{EXAMPLE_SELECTION}'")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def format_example(example: dict) -> str:
+    """One labeled example as it appears in the prompt."""
+    return (
+        f"Source: {example['source_type']} | Label: {example['bias_label']}\n"
+        f"Text: {example['text']}\n"
+        f"Rationale: {example['rationale']}"
+    )
+
+
+def format_examples_message(examples: list) -> dict:
+    """System message carrying the selected examples (goes after the main system prompt)."""
+    blocks = "\n\n".join(f"[{i}] {format_example(example)}" for i, example in enumerate(examples, 1))
+    return {
+        "role": "system",
+        "content": (
+            "Labeled reference examples similar to the content you will analyze "
+            "(label and reviewer rationale). Use them to calibrate your classification "
+            "and respond in the JSON format defined above.\n\n" + blocks
+        )
+    }
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_index(csv_path: Path = DATASET_FILE, index_path: Path = INDEX_PATH, batch_size: int = 32) -> dict:
+    """
+    Embed every labeled row and write the index (run offline, model must be loaded).
+
+    Returns:
+        The index build info
+    """
+    import numpy as np
+    import predict
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("text_clean")]
+
+    examples = [
+        {
+            "bias_label": row["bias_label"],
+            "source_type": row.get("source_type", ""),
+            "text": row["text_clean"].strip(),
+            "rationale": (row.get("rationale") or "").strip()
+        }
+        for row in rows
+    ]
+    for example in examples:
+        example["tokens"] = estimate_tokens(format_example(example))
+
+    start = time.time()
+    embeddings = predict.embed_texts([example["text"] for example in examples], batch_size=batch_size)
+
+    info = {
+        "model_source": predict.MODEL_SOURCE,
+        "dataset_sha256": _file_sha256(csv_path),
+        "rows": len(examples),
+        "dim": int(embeddings.shape[1]),
+        "built_at": time.time(),
+        "build_seconds": round(time.time() - start, 1)
+    }
+
+    index_path = Path(index_path)
+    index_path.mkdir(parents=True, exist_ok=True)
+    np.save(index_path / EMBEDDINGS_FILE, embeddings.astype(np.float32))
+    with open(index_path / EXAMPLES_FILE, "w", encoding="utf-8") as f:
+        json.dump({"info": info, "examples": examples}, f, ensure_ascii=False)
+    return info
+
+
+class ExampleSelector:
+    """Nearest-neighbour selection of labeled examples over a memory-mapped index."""
+
+    def __init__(self, index_path: Path = INDEX_PATH, k: int = EXAMPLE_K, token_budget: int = EXAMPLE_TOKEN_BUDGET):
+        self.index_path = Path(index_path)
+        self.k = max(1, k)
+        self.token_budget = token_budget
+
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._embeddings = None
+        self._examples = None
+        self._by_source = {}
+        self.index_info = None
+        self.unavailable_reason = None
+
+        self.selections = 0
+        self.fallbacks = 0
+        self.examples_selected = 0
+        self.tokens_selected = 0
+
+    def _load(self):
+        """Open the index on first use; sets unavailable_reason when it cannot be used."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                import numpy as np
+                import predict
+
+                with open(self.index_path / EXAMPLES_FILE, encoding="utf-8") as f:
+                    data = json.load(f)
+                info = data["info"]
+                if info.get("model_source") != predict.MODEL_SOURCE:
+                    self.unavailable_reason = (
+                        f"index built for {info.get('model_source')}, serving {predict.MODEL_SOURCE}; "
+                        f"rebuild with: python src/example_selector.py --build"
+                    )
+                    return
+
+                self._embeddings = np.load(self.index_path / EMBEDDINGS_FILE, mmap_mode="r")
+                self._examples = data["examples"]
+                # Boolean masks, not row lists: indexing the memmap with a row
+                # list would copy those embeddings onto the heap on every query
+                sources = np.array([example["source_type"] for example in self._examples])
+                self._by_source = {name: sources == name for name in set(sources.tolist())}
+                self.index_info = info
+            except (OSError, ValueError, KeyError) as e:
+                self.unavailable_reason = f"example index not available at {self.index_path}: {e}"
+
+        if self.unavailable_reason:
+            print(f"⚠️ Warning: {self.unavailable_reason}. Using static few-shot examples.")
+
+    def _pick(self, query, exclude_text: str, source_type: str = None) -> list:
+        import numpy as np
+
+        mask = self._by_source.get(source_type) if source_type else None
+        if source_type and mask is None:
+            return []
+
+        # Score the whole memmapped index, then rule out other source types
+        scores = self._embeddings @ query
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+        pool = min(CANDIDATE_POOL, int(mask.sum()) if mask is not None else len(scores))
+        if pool == 0:
+            return []
+        top = np.argpartition(-scores, pool - 1)[:pool]
+        top = top[np.argsort(-scores[top])]
+
+        exclude = " ".join(exclude_text.split())
+        picked, used = [], 0
+        for position in top:
+            example = self._examples[int(position)]
+            # Skip the input itself when it comes from the dataset
+            if " ".join(example["text"].split()) == exclude:
+                continue
+            if used + example["tokens"] > self.token_budget:
+                continue
+            picked.append(example)
+            used += example["tokens"]
+            if len(picked) >= self.k:
+                break
+        return picked
+
+    def select_many(self, texts: list, source_type: str = None) -> list:
+        """
+        Returns:
+            One list of examples per text, or None for all of them when the
+            index cannot be used (callers fall back to the static examples)
+        """
+        import predict
+
+        # The index is checked against the serving model, so only open it once that is loaded
+        usable = predict.is_ready() and predict.INFERENCE_BACKEND != "onnx"
+        if usable:
+            self._load()
+        if not usable or self._embeddings is None:
+            with self._lock:
+                self.fallbacks += len(texts)
+            return None
+
+        queries = predict.embed_texts(list(texts))
+        selected = [self._pick(query, text, source_type) for query, text in zip(queries, texts)]
+
+        with self._lock:
+            self.selections += len(selected)
+            self.examples_selected += sum(len(examples) for examples in selected)
+            self.tokens_selected += sum(example["tokens"] for examples in selected for example in examples)
+        return selected
+
+    def select(self, text: str, source_type: str = None):
+        """Examples for one text, or None (see select_many)."""
+        selected = self.select_many([text], source_type)
+        return None if selected is None else selected[0]
+
+    def info(self) -> dict:
+        """Return configuration, index details and selection counters."""
+        return {
+            "mode": EXAMPLE_SELECTION,
+            "k": self.k,
+            "token_budget": self.token_budget,
+            "index_path": str(self.index_path),
+            "index": self.index_info,
+            "unavailable_reason": self.unavailable_reason,
+            "selections": self.selections,
+            "fallbacks": self.fallbacks,
+            "average_examples": round(self.examples_selected / self.selections, 2) if self.selections else 0.0,
+            "average_tokens": round(self.tokens_selected / self.selections, 1) if self.selections else 0.0
+        }
+
+
+example_selector = ExampleSelector()
+
+
+if __name__ == "__main__":
+    import predict
+
+    predict.load_model(warmup=False)
+
+    if "--build" in sys.argv:
+        print(f"⏳ Embedding {DATASET_FILE.name} into {INDEX_PATH}...")
+        print(json.dumps(build_index(), indent=2))
+    else:
+        text = " ".join(arg for arg in sys.argv[1:]) or "Patient claims he is in 10/10 pain but appears comfortable."
+        examples = example_selector.select(text)
+        if examples is None:
+            print(f"❌ {example_selector.unavailable_reason}")
+        else:
+            for example in examples:
+                print(format_example(example), end="\n\n")
+            print(f"{len(examples)} examples, ~{sum(e['tokens'] for e in examples)} tokens")
@@ -0,0 +1,242 @@
+"""
+Asynchronous Explanation Jobs
+
+Lets /predict return the RoBERTa classification right away and generate the
+GPT explanation in the background. Each job runs generate_bias_explanation()
+on a bounded thread pool; its status and result are kept in a small SQLite
+file so any Gunicorn worker can answer a poll, not only the worker that
+started the job.
+
+A job is "pending" until the explanation is ready, then "done" (or "error").
+Jobs are deleted EXPLANATION_JOB_TTL_SECONDS after they were created, including
+any left "pending" by a worker that died before storing the result.
+
+Configuration (environment variables):
+    EXPLANATION_WORKERS          - Concurrent explanation calls per process (default: 4)
+    EXPLANATION_MAX_PENDING      - Jobs queued or running per process before /predict
+                                   falls back to an inline explanation (default: 64)
+    EXPLANATION_JOB_TTL_SECONDS  - How long job results are kept (default: 3600)
+    EXPLANATION_JOBS_PATH        - SQLite file (default: backend/data/explanation_jobs.sqlite3)
+
+Usage:
+    from explanation_jobs import explanation_jobs
+
+    job_id = explanation_jobs.submit(text, predicted_label, confidence)
+    job = explanation_jobs.get(job_id, wait=10)   # long-poll up to 10 s
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import request_metrics
+
+WORKERS = int(os.environ.get("EXPLANATION_WORKERS", "4"))
+MAX_PENDING = int(os.environ.get("EXPLANATION_MAX_PENDING", "64"))
+JOB_TTL = float(os.environ.get("EXPLANATION_JOB_TTL_SECONDS", "3600"))
+DEFAULT_JOBS_PATH = Path(__file__).parent.parent / "data" / "explanation_jobs.sqlite3"
+JOBS_PATH = os.environ.get("EXPLANATION_JOBS_PATH", str(DEFAULT_JOBS_PATH))
+
+# Longest long-poll a client may ask for, and how often other workers' jobs are re-read
+MAX_WAIT_SECONDS = 30.0
+POLL_INTERVAL = 0.2
+
+
+class ExplanationJobs:
+    """Bounded background executor plus a SQLite job table shared across processes."""
+
+    def __init__(self, path: str, workers: int = WORKERS, max_pending: int = MAX_PENDING, ttl: float = JOB_TTL):
+        self.path = path
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.ttl = ttl
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._finished = {}  # job_id -> threading.Event for jobs started in this process
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )"""
+        )
+        conn.commit()
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        """Create the thread pool on first use (and again after a fork)."""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="explanation")
+            self._executor_pid = pid
+            self._pending = 0
+            self._finished = {}
+        return self._executor
+
+    def submit(self, text: str, predicted_label: str, confidence: float, use_cache: bool = True):
+        """
+        Queue an explanation.
+
+        Returns:
+            The job ID, or None when MAX_PENDING jobs are already queued in
+            this process (the caller should explain inline instead)
+        """
+        with self._lock:
+            executor = self._ensure_executor()
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            self._pending += 1
+            self.submitted += 1
+            job_id = uuid.uuid4().hex
+            self._finished[job_id] = threading.Event()
+
+        try:
+            conn = self._connection()
+            now = time.time()
+            # Expired jobs of any status, so rows orphaned as 'pending' do not pile up
+            conn.execute("DELETE FROM jobs WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, created_at) VALUES (?, 'pending', ?)", (job_id, now)
+            )
+            conn.commit()
+
+            executor.submit(self._run, job_id, text, predicted_label, confidence, use_cache, time.perf_counter())
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self.submitted -= 1
+                event = self._finished.pop(job_id, None)
+            if event is not None:
+                event.set()
+            raise
+        return job_id
+
+    def _run(self, job_id: str, text: str, predicted_label: str, confidence: float, use_cache: bool, queued: float):
+        from llm_service import generate_bias_explanation
+
+        with request_metrics.capture() as timer:
+            request_metrics.record("llm_queue", time.perf_counter() - queued)
+            try:
+                result = generate_bias_explanation(text, predicted_label, confidence, use_cache=use_cache)
+                # The explanation service reports its own failures as {"error": ...}
+                status = "error" if "error" in result else "done"
+            except Exception as e:
+                status, result = "error", {"error": str(e)}
+        request_metrics.observe_background("explanation_job", timer)
+
+        try:
+            self._store(job_id, status, result)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not store explanation job {job_id}: {e}")
+            status = "error"
+            # Retry with a short error result so pollers are not left waiting on 'pending'
+            try:
+                self._store(job_id, status, {"error": f"Could not store explanation: {e}"})
+            except sqlite3.Error as retry_error:
+                print(f"⚠️ Could not mark explanation job {job_id} as failed: {retry_error}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if status == "done":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                event = self._finished.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def _store(self, job_id: str, status: str, result: dict):
+        conn = self._connection()
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE job_id = ?",
+                (status, json.dumps(result), time.time(), job_id)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    def _read(self, job_id: str):
+        row = self._connection().execute(
+            "SELECT status, result, created_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, result, created_at, finished_at = row
+        job = {"job_id": job_id, "status": status, "created_at": created_at}
+        if finished_at is not None:
+            job["seconds"] = round(finished_at - created_at, 3)
+        if result is not None:
+            job.update(json.loads(result))
+        return job
+
+    def get(self, job_id: str, wait: float = 0):
+        """
+        Return the job (status plus explanation fields once done), or None if unknown/expired.
+
+        Args:
+            job_id: ID returned by submit()
+            wait: Seconds to wait for a pending job to finish (long-polling)
+        """
+        deadline = time.monotonic() + min(max(0.0, wait), MAX_WAIT_SECONDS)
+        while True:
+            job = self._read(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] != "pending" or remaining <= 0:
+                return job
+
+            # Jobs started here wake us directly; others are re-read periodically
+            event = self._finished.get(job_id)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(POLL_INTERVAL, remaining))
+
+    def stats(self) -> dict:
+        """Return configuration and counters for this process."""
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "ttl_seconds": self.ttl,
+            "pending": self._pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+
+explanation_jobs = ExplanationJobs(JOBS_PATH)
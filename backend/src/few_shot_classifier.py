@@ -13,29 +13,56 @@ The classifier identifies biases across:
 Usage:
     from few_shot_classifier import classify_bias_few_shot
     result = classify_bias_few_shot("Your clinical text here")
+
+    # Many texts concurrently (bounded by FEWSHOT_MAX_CONCURRENCY)
+    from few_shot_classifier import classify_batch_few_shot
+    results = classify_batch_few_shot(["text 1", "text 2"])
+
+    # Partial results while the completion streams in
+    from few_shot_classifier import stream_bias_few_shot
+    for event, data in stream_bias_few_shot("Your clinical text here"):
+        ...
+
+The static part of the prompt (system prompt + example pairs) is compiled once
+into a PromptTemplate and rebuilt automatically when few_shot_examples.json
+changes on disk; each request only appends its own user message. With
+FEWSHOT_EXAMPLE_SELECTION=retrieval the static example pairs are replaced by
+the nearest labeled rows of the dataset (see example_selector.py).
 """
 
 import os
 import json
 import time
+import asyncio
+import hashlib
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 
+from llm_client import get_llm_client, create_async_llm_client, has_llm_credentials
+from llm_cache import chat_completion, chat_completion_async, chat_completion_stream
+from incremental_json import IncrementalJSONParser
+from request_metrics import stage
+from example_selector import EXAMPLE_SELECTION, example_selector, format_examples_message
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Lazy-loaded client (initialized on first use)
-_client = None
-
 def get_openai_client():
-    """Get or create the OpenAI client (lazy initialization)."""
-    global _client
-    if _client is None:
-        from openai import OpenAI
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if api_key:
-            _client = OpenAI(api_key=api_key)
-    return _client
+    """Get the shared, pooled OpenAI client (see llm_client.py)."""
+    return get_llm_client()
+
+def get_async_openai_client():
+    """
+    Create an AsyncOpenAI client (None without an API key).
+
+    The async client's connection pool is bound to the event loop that uses
+    it, so callers create one per batch and close it when done.
+    """
+    return create_async_llm_client()
+
+# Maximum in-flight OpenAI requests per batch (keep below your rate limits)
+FEWSHOT_MAX_CONCURRENCY = int(os.environ.get("FEWSHOT_MAX_CONCURRENCY", "8"))
 
 # Model configuration (can be overridden via environment variable)
 # Options: gpt-4o (most accurate), gpt-4o-mini (faster/cheaper), gpt-4.1
@@ -45,6 +72,19 @@ MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 DATA_DIR = Path(__file__).parent.parent / "data"
 EXAMPLES_FILE = DATA_DIR / "few_shot_examples.json"
 
+# Seconds between checks of the examples file for changes (0 checks on every request)
+PROMPT_RELOAD_INTERVAL = float(os.environ.get("PROMPT_RELOAD_INTERVAL_SECONDS", "2"))
+
+# Per-request suffix; it always asks for JSON, as response_format json_object requires
+USER_PROMPT = "Analyze this medical content for bias and respond with a JSON object:\n\n{input_text}"
+
+FALLBACK_CONFIG = {
+    "system_prompt": "You are a medical bias detection expert.",
+    "categories": {},
+    "few_shot_examples": [],
+    "output_format": {}
+}
+
 def load_config():
     """Load the few-shot examples configuration."""
     try:
@@ -52,51 +92,195 @@ def load_config():
             return json.load(f)
     except FileNotFoundError:
         print(f"⚠️ Warning: {EXAMPLES_FILE} not found. Using fallback configuration.")
+        return dict(FALLBACK_CONFIG)
+
+
+def _count_tokens(text: str):
+    """
+    Returns:
+        Tuple of (token count, "tiktoken" or "estimate"); without tiktoken
+        installed the count is estimated at ~4 characters per token
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4, "estimate"
+    try:
+        encoding = tiktoken.encoding_for_model(MODEL)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text)), "tiktoken"
+
+
+class PromptTemplate:
+    """
+    The static prompt prefix: [System Prompt] + [Few-Shot Example Pairs].
+    
+    Built once per version of the examples file. The prefix messages are
+    byte-identical across requests, which also lets the provider reuse its
+    prompt cache for them.
+    """
+
+    def __init__(self, config: dict, file_signature=None):
+        self.config = config
+        self.file_signature = file_signature
+
+        messages = [{"role": "system", "content": config["system_prompt"]}]
+        for example in config.get("few_shot_examples", []):
+            content = example.get("content")
+            # If content is a dict (structured response), convert to JSON string
+            if isinstance(content, dict):
+                content = json.dumps(content)
+            messages.append({"role": example.get("role"), "content": content})
+
+        # Shared by every request: treat as read-only
+        self.messages = tuple(messages)
+
+        canonical = json.dumps(self.messages, sort_keys=True, ensure_ascii=False)
+        self.version = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+        self.chars = sum(len(m["content"] or "") for m in self.messages)
+        self.tokens, self.token_count_source = _count_tokens("".join(m["content"] or "" for m in self.messages))
+        self.loaded_at = time.time()
+
+    def render(self, input_text: str, examples: list = None) -> list:
+        """
+        Prefix messages plus the user message for input_text.
+        
+        With retrieved examples, only the system prompt is kept from the
+        prefix and the examples follow it as a second system message.
+        """
+        user_message = {"role": "user", "content": USER_PROMPT.format(input_text=input_text)}
+        if examples:
+            return [self.messages[0], format_examples_message(examples), user_message]
+        return [*self.messages, user_message]
+
+    def info(self) -> dict:
         return {
-            "system_prompt": "You are a medical bias detection expert.",
-            "categories": {},
-            "few_shot_examples": [],
-            "output_format": {}
+            "version": self.version,
+            "messages": len(self.messages),
+            "chars": self.chars,
+            "tokens": self.tokens,
+            "token_count_source": self.token_count_source,
+            "loaded_at": self.loaded_at
         }
 
-CONFIG = load_config()
 
+def _file_signature():
+    """(mtime_ns, size) of the examples file, or None when it is missing."""
+    try:
+        stat = EXAMPLES_FILE.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+_template = PromptTemplate(load_config(), _file_signature())
+_template_lock = threading.Lock()
+_next_reload_check = time.monotonic() + PROMPT_RELOAD_INTERVAL
+
+# Kept for callers that read the configuration directly (updated on reload)
+CONFIG = _template.config
 
-def build_few_shot_prompt(input_text: str) -> list:
+
+def get_prompt_template() -> PromptTemplate:
+    """
+    Return the current prompt template, rebuilding it if the examples file changed.
+    
+    A file that fails to parse (e.g. caught mid-write) keeps the previous
+    template in service; the next check tries again.
+    """
+    global _template, _next_reload_check, CONFIG
+
+    if time.monotonic() < _next_reload_check:
+        return _template
+
+    with _template_lock:
+        now = time.monotonic()
+        if now < _next_reload_check:
+            return _template
+        _next_reload_check = now + PROMPT_RELOAD_INTERVAL
+
+        signature = _file_signature()
+        if signature is None or signature == _template.file_signature:
+            return _template
+
+        try:
+            with open(EXAMPLES_FILE, "r") as f:
+                template = PromptTemplate(json.load(f), signature)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Warning: could not reload {EXAMPLES_FILE}: {e}")
+            return _template
+
+        _template = template
+        CONFIG = template.config
+        print(f"🔄 Reloaded few-shot prompt template (version {template.version})")
+        return _template
+
+
+def build_few_shot_prompt(input_text: str, examples: list = None) -> list:
     """
     Constructs the few-shot prompt with examples from each bias category.
     
     Structure: [System Prompt] + [Few-Shot Example Pairs] + [User Content]
+    or, with retrieved examples: [System Prompt] + [Selected Examples] + [User Content]
     
     Args:
         input_text: The clinical text to classify
+        examples: Labeled examples from example_selector (None for the static pairs)
         
     Returns:
         List of message dictionaries for the OpenAI API
     """
-    messages = [{"role": "system", "content": CONFIG["system_prompt"]}]
-    
-    # Add few-shot examples (user/assistant pairs)
-    for example in CONFIG.get("few_shot_examples", []):
-        role = example.get("role")
-        content = example.get("content")
-        
-        # If content is a dict (structured response), convert to JSON string
-        if isinstance(content, dict):
-            content = json.dumps(content)
-        
-        messages.append({"role": role, "content": content})
-    
-    # Add the actual input to classify
-    messages.append({
-        "role": "user",
-        "content": f"Analyze this medical content for bias and respond with a JSON object:\n\n{input_text}"
-    })
-    
-    return messages
+    return get_prompt_template().render(input_text, examples)
 
 
-def classify_bias_few_shot(text: str, verbose: bool = False) -> dict:
+def _select_examples(texts: list, source_type: str = None) -> list:
+    """Retrieved examples per text (None entries mean the static examples)."""
+    if EXAMPLE_SELECTION != "retrieval":
+        return [None] * len(texts)
+    with stage("example_selection"):
+        selected = example_selector.select_many(texts, source_type)
+    return selected if selected is not None else [None] * len(texts)
+
+
+def _error_result(summary: str, error: str) -> dict:
+    """Result returned instead of a classification when something fails."""
+    return {
+        "bias_detected": False,
+        "primary_category": "error",
+        "overall_bias_level": "NONE",
+        "biases_found": [],
+        "bias_free_sections": [],
+        "summary": summary,
+        "error": error
+    }
+
+
+def _prepare_request(text: str, examples: list = None) -> dict:
+    """Build the chat-completions parameters for one text."""
+    # JSON mode needs "json" somewhere in the messages; USER_PROMPT always asks for it
+    return {
+        "model": MODEL,
+        "messages": build_few_shot_prompt(text, examples),
+        "temperature": 0.1,  # Low temperature for consistency
+        "max_tokens": 2000,
+        "response_format": {"type": "json_object"}
+    }
+
+
+def _normalize_result(result: dict) -> dict:
+    """Validate and normalize the model's JSON response."""
+    return {
+        "bias_detected": result.get("bias_detected", False),
+        "primary_category": result.get("primary_category", "unknown"),
+        "overall_bias_level": result.get("overall_bias_level", "NONE"),
+        "biases_found": result.get("biases_found", []),
+        "bias_free_sections": result.get("bias_free_sections", []),
+        "summary": result.get("summary", "No summary provided.")
+    }
+
+
+def classify_bias_few_shot(text: str, verbose: bool = False, use_cache: bool = True, source_type: str = None) -> dict:
     """
     Classify clinical text for bias using few-shot prompting.
     
@@ -105,6 +289,8 @@ def classify_bias_few_shot(text: str, verbose: bool = False) -> dict:
     Args:
         text: The clinical text to analyze
         verbose: If True, print progress messages
+        use_cache: False bypasses the persistent LLM response cache
+        source_type: Only retrieve examples of this source type (retrieval mode)
         
     Returns:
         Dictionary containing:
@@ -116,16 +302,11 @@ def classify_bias_few_shot(text: str, verbose: bool = False) -> dict:
         - summary: Brief overall assessment
     """
     # Check for API key
-    if not os.environ.get("OPENAI_API_KEY"):
-        return {
-            "bias_detected": False,
-            "primary_category": "error",
-            "overall_bias_level": "NONE",
-            "biases_found": [],
-            "bias_free_sections": [],
-            "summary": "OpenAI API Key not configured. Please set OPENAI_API_KEY environment variable.",
-            "error": "missing_api_key"
-        }
+    if not has_llm_credentials():
+        return _error_result(
+            "OpenAI API Key not configured. Please set OPENAI_API_KEY environment variable.",
+            "missing_api_key"
+        )
     
     if verbose:
         print(f"Analyzing ({len(text)} chars) with {MODEL}...")
@@ -136,37 +317,11 @@ def classify_bias_few_shot(text: str, verbose: bool = False) -> dict:
         # Get the OpenAI client
         client = get_openai_client()
         if client is None:
-            return {
-                "bias_detected": False,
-                "primary_category": "error",
-                "overall_bias_level": "NONE",
-                "biases_found": [],
-                "bias_free_sections": [],
-                "summary": "Failed to initialize OpenAI client. Check your API key.",
-                "error": "client_init_failed"
-            }
+            return _error_result("Failed to initialize OpenAI client. Check your API key.", "client_init_failed")
         
-        # Build the prompt
-        messages = build_few_shot_prompt(text)
-        
-        # Defensive safeguard: ensure at least one message explicitly requests JSON
-        # (some deployment/config issues can cause examples or system prompt to be missing)
-        if isinstance(messages, list) and not any('json' in (m.get('content') or '').lower() for m in messages):
-            messages.insert(0, {
-                "role": "system",
-                "content": "Please respond with ONLY valid JSON that matches the required schema."
-            })
-
-        # Call OpenAI API with JSON mode
-        response = client.chat.completions.create(
-            model=MODEL,
-            messages=messages,
-            temperature=0.1,  # Low temperature for consistency
-            max_tokens=2000,
-            response_format={"type": "json_object"}
-        )
-        
-        content = response.choices[0].message.content
+        # Call OpenAI API with JSON mode (through the persistent response cache)
+        examples = _select_examples([text], source_type)[0]
+        content = chat_completion(client, _prepare_request(text, examples), use_cache=use_cache, validate=json.loads)
         result = json.loads(content)
         
         elapsed = time.time() - start_time
@@ -175,37 +330,137 @@ def classify_bias_few_shot(text: str, verbose: bool = False) -> dict:
             print(f"Analysis completed in {elapsed:.1f}s")
             _print_report(result, elapsed)
         
-        # Validate and normalize response
-        return {
-            "bias_detected": result.get("bias_detected", False),
-            "primary_category": result.get("primary_category", "unknown"),
-            "overall_bias_level": result.get("overall_bias_level", "NONE"),
-            "biases_found": result.get("biases_found", []),
-            "bias_free_sections": result.get("bias_free_sections", []),
-            "summary": result.get("summary", "No summary provided.")
-        }
+        return _normalize_result(result)
     
     except json.JSONDecodeError as e:
-        return {
-            "bias_detected": False,
-            "primary_category": "error",
-            "overall_bias_level": "NONE",
-            "biases_found": [],
-            "bias_free_sections": [],
-            "summary": f"Failed to parse model response as JSON: {str(e)}",
-            "error": "json_parse_error"
-        }
+        return _error_result(f"Failed to parse model response as JSON: {str(e)}", "json_parse_error")
     
     except Exception as e:
-        return {
-            "bias_detected": False,
-            "primary_category": "error",
-            "overall_bias_level": "NONE",
-            "biases_found": [],
-            "bias_free_sections": [],
-            "summary": f"Classification failed: {str(e)}",
-            "error": str(e)
-        }
+        return _error_result(f"Classification failed: {str(e)}", str(e))
+
+
+# Top-level fields reported as soon as they are parsed from the stream
+STREAMED_FIELDS = ("primary_category", "overall_bias_level")
+
+
+def stream_bias_few_shot(text: str, use_cache: bool = True, source_type: str = None):
+    """
+    Streaming variant of classify_bias_few_shot.
+    
+    The completion is parsed incrementally and events are yielded as soon as
+    their part of the JSON object is complete:
+        ("primary_category", {"primary_category": ...})
+        ("overall_bias_level", {"overall_bias_level": ...})
+        ("bias", {"index": i, "bias": {...}})   - one per biases_found element
+        ("result", {...})                       - same as classify_bias_few_shot
+    or ("error", {...error result...}) instead of "result" on failure.
+    """
+    if not has_llm_credentials():
+        yield "error", _error_result(
+            "OpenAI API Key not configured. Please set OPENAI_API_KEY environment variable.",
+            "missing_api_key"
+        )
+        return
+    
+    try:
+        client = get_openai_client()
+        if client is None:
+            yield "error", _error_result("Failed to initialize OpenAI client. Check your API key.", "client_init_failed")
+            return
+        
+        examples = _select_examples([text], source_type)[0]
+        params = _prepare_request(text, examples)
+        parser = IncrementalJSONParser(stream_arrays=("biases_found",))
+        biases_sent = 0
+        
+        for delta in chat_completion_stream(client, params, use_cache=use_cache, validate=json.loads):
+            for kind, key, value in parser.feed(delta):
+                if kind == "item" and isinstance(value, dict):
+                    yield "bias", {"index": biases_sent, "bias": value}
+                    biases_sent += 1
+                elif kind == "field" and key in STREAMED_FIELDS:
+                    yield key, {key: value}
+        
+        yield "result", _normalize_result(parser.document())
+    
+    except json.JSONDecodeError as e:
+        yield "error", _error_result(f"Failed to parse model response as JSON: {str(e)}", "json_parse_error")
+    
+    except Exception as e:
+        yield "error", _error_result(f"Classification failed: {str(e)}", str(e))
+
+
+async def classify_bias_few_shot_async(text: str, client, use_cache: bool = True, examples: list = None) -> dict:
+    """
+    Async variant of classify_bias_few_shot (same return format).
+    
+    Errors are returned as an error result, never raised, so one failing
+    item cannot break a batch.
+    
+    Args:
+        text: The clinical text to analyze
+        client: An AsyncOpenAI client (see get_async_openai_client)
+        use_cache: False bypasses the persistent LLM response cache
+        examples: Retrieved examples for this text (None for the static pairs)
+    """
+    try:
+        content = await chat_completion_async(
+            client, _prepare_request(text, examples), use_cache=use_cache, validate=json.loads
+        )
+        return _normalize_result(json.loads(content))
+    
+    except json.JSONDecodeError as e:
+        return _error_result(f"Failed to parse model response as JSON: {str(e)}", "json_parse_error")
+    
+    except Exception as e:
+        return _error_result(f"Classification failed: {str(e)}", str(e))
+
+
+async def classify_batch_few_shot_async(texts: list, max_concurrency: int = FEWSHOT_MAX_CONCURRENCY, use_cache: bool = True, source_type: str = None) -> list:
+    """
+    Classify many texts concurrently with at most max_concurrency requests in flight.
+    
+    Args:
+        texts: The clinical texts to analyze
+        max_concurrency: Semaphore size for the OpenAI fan-out
+        use_cache: False bypasses the persistent LLM response cache
+        source_type: Only retrieve examples of this source type (retrieval mode)
+        
+    Returns:
+        List of results (same format as classify_bias_few_shot) in input order
+    """
+    if not has_llm_credentials():
+        return [
+            _error_result(
+                "OpenAI API Key not configured. Please set OPENAI_API_KEY environment variable.",
+                "missing_api_key"
+            )
+            for _ in texts
+        ]
+    
+    # One batched embedding pass for the whole list (retrieval mode)
+    selected = _select_examples(texts, source_type)
+    
+    client = get_async_openai_client()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    
+    async def classify_one(text, examples):
+        with stage("llm_queue"):
+            await semaphore.acquire()
+        try:
+            return await classify_bias_few_shot_async(text, client, use_cache, examples)
+        finally:
+            semaphore.release()
+    
+    try:
+        return await asyncio.gather(*(classify_one(text, examples) for text, examples in zip(texts, selected)))
+    finally:
+        await client.close()
+
+
+def classify_batch_few_shot(texts: list, max_concurrency: int = FEWSHOT_MAX_CONCURRENCY, use_cache: bool = True, source_type: str = None) -> list:
+    """Synchronous entry point for classify_batch_few_shot_async (e.g. from a Flask view)."""
+    return asyncio.run(classify_batch_few_shot_async(texts, max_concurrency, use_cache, source_type))
 
 
 def _print_report(result: dict, elapsed: float):
@@ -252,7 +507,8 @@ def _print_report(result: dict, elapsed: float):
 
 def get_model_info() -> dict:
     """Return information about the currently configured model."""
-    categories = CONFIG.get("categories", {})
+    template = get_prompt_template()
+    categories = template.config.get("categories", {})
     
     # Count sub-types
     total_sub_types = 0
@@ -265,13 +521,15 @@ def get_model_info() -> dict:
         "examples_file": str(EXAMPLES_FILE),
         "categories": list(categories.keys()),
         "total_sub_types": total_sub_types,
-        "total_examples": len(CONFIG.get("few_shot_examples", [])) // 2
+        "total_examples": len(template.config.get("few_shot_examples", [])) // 2,
+        "prompt_template": template.info(),
+        "example_selection": example_selector.info()
     }
 
 
 def get_bias_categories() -> dict:
     """Return the full bias category definitions."""
-    return CONFIG.get("categories", {})
+    return get_prompt_template().config.get("categories", {})
 
 
 # --------------------------------------------------------------------------
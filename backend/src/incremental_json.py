@@ -0,0 +1,142 @@
+"""
+Incremental JSON Object Parser
+
+Parses a JSON object that arrives in pieces (a streamed chat completion) and
+reports each top-level field as soon as its value is complete, plus each
+element of selected top-level arrays as soon as that element is complete,
+without waiting for the closing brace.
+
+Only string boundaries and bracket depth are tracked while scanning; every
+completed value is decoded with json.loads, so values are exactly what
+json.loads would return for the whole document.
+
+Usage:
+    from incremental_json import IncrementalJSONParser
+
+    parser = IncrementalJSONParser(stream_arrays=("biases_found",))
+    for chunk in stream:
+        for kind, key, value in parser.feed(chunk):
+            # ("field", "primary_category", "demographic_bias")
+            # ("item", "biases_found", {...})   (before the array's "field" event)
+            ...
+    result = parser.document()  # the whole object, ignoring text after "}"
+"""
+
+import json
+
+
+class IncrementalJSONParser:
+    """Streaming parser for one top-level JSON object."""
+
+    def __init__(self, stream_arrays=()):
+        """
+        Args:
+            stream_arrays: Top-level keys whose array elements are reported one by one
+        """
+        self.stream_arrays = set(stream_arrays)
+        self.buffer = ""
+        self.done = False
+        self.start = None           # Offset of the object's opening brace
+        self.end = None             # Offset just past its closing brace (once done)
+
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expecting = None      # "key", "colon", "value" or None (value in progress / after value)
+        self._key = None
+        self._value_start = None
+        self._item_start = None
+
+    def feed(self, chunk: str) -> list:
+        """
+        Add text and return the events it completed.
+
+        Returns:
+            List of (kind, key, value) tuples; kind is "field" or "item"
+        """
+        self.buffer += chunk
+        events = []
+        buf = self.buffer
+
+        while self._pos < len(buf) and not self.done:
+            i = self._pos
+            c = buf[i]
+            self._pos += 1
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if depth == 1 and self._expecting == "key":
+                        self._key = json.loads(buf[self._string_start:i + 1])
+                        self._expecting = "colon"
+                    elif depth == 1 and self._value_start == self._string_start:
+                        self._emit_field(events, buf[self._value_start:i + 1])
+                continue
+
+            if c.isspace():
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if depth == 1 and self._expecting == "value":
+                    self._value_start = i
+                    self._expecting = None
+            elif c in "{[":
+                if depth == 0:
+                    self.start = i
+                    self._expecting = "key"
+                elif depth == 1 and self._expecting == "value":
+                    self._value_start = i
+                    self._expecting = None
+                elif depth == 2 and self._stack[-1] == "[" and self._key in self.stream_arrays:
+                    self._item_start = i
+                self._stack.append(c)
+            elif c in "}]":
+                if depth == 1 and self._value_start is not None:
+                    # Scalar (number / true / false / null) closed by the object brace
+                    self._emit_field(events, buf[self._value_start:i])
+                self._stack.pop()
+                depth = len(self._stack)
+                if depth == 2 and self._item_start is not None:
+                    events.append(("item", self._key, json.loads(buf[self._item_start:i + 1])))
+                    self._item_start = None
+                elif depth == 1 and self._value_start is not None:
+                    self._emit_field(events, buf[self._value_start:i + 1])
+                elif depth == 0:
+                    self.done = True
+                    self.end = i + 1
+            elif depth == 1:
+                if c == ":":
+                    self._expecting = "value"
+                elif c == ",":
+                    if self._value_start is not None:
+                        self._emit_field(events, buf[self._value_start:i])
+                    self._expecting = "key"
+                elif self._expecting == "value":
+                    self._value_start = i
+                    self._expecting = None
+
+        return events
+
+    def document(self):
+        """
+        Decode the complete object, without any text the stream added after it.
+
+        Raises:
+            json.JSONDecodeError: The object has not been closed (or never started)
+        """
+        if not self.done:
+            raise json.JSONDecodeError("Incomplete JSON object", self.buffer, len(self.buffer))
+        return json.loads(self.buffer[self.start:self.end])
+
+    def _emit_field(self, events: list, raw: str):
+        events.append(("field", self._key, json.loads(raw)))
+        self._value_start = None
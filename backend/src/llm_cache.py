@@ -0,0 +1,317 @@
+"""
+Persistent LLM Response Cache (SQLite)
+
+Chat-completion responses are stored in a local SQLite file keyed by a
+fingerprint of everything that determines the answer: model name, the full
+message list and the sampling parameters. With the low temperatures used
+here (0.1 / 0.3) a repeated request returns the stored answer instantly and
+costs nothing. The file survives restarts; on Fly.io point LLM_CACHE_PATH at
+a mounted volume so it also survives machine stop/start.
+
+When the file grows past LLM_CACHE_MAX_BYTES the least recently used entries
+are evicted.
+
+Cache misses go to the provider through llm_resilience, or are recorded to /
+replayed from a cassette when LLM_CASSETTE_MODE is set (see llm_cassette).
+
+Configuration (environment variables):
+    LLM_CACHE_ENABLED   - "0" disables the cache (default: "1")
+    LLM_CACHE_PATH      - SQLite file (default: backend/data/llm_cache.sqlite3)
+    LLM_CACHE_MAX_BYTES - Size budget for cached responses (default: 256 MB)
+
+Usage:
+    from llm_cache import chat_completion
+
+    content = chat_completion(client, {"model": "gpt-4", "messages": [...]})
+    content = chat_completion(client, params, use_cache=False)  # bypass
+
+    for delta in chat_completion_stream(client, params):  # streamed text pieces
+        ...
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+
+import llm_resilience
+from llm_cassette import cassette, usage_from_response, estimate_usage
+from request_metrics import stage
+
+ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / "data" / "llm_cache.sqlite3"
+CACHE_PATH = os.environ.get("LLM_CACHE_PATH", str(DEFAULT_CACHE_PATH))
+MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Evict down to this fraction of MAX_BYTES so eviction does not run on every write
+EVICT_TO_FRACTION = 0.9
+
+
+def fingerprint(params: dict) -> str:
+    """SHA-256 of the canonical JSON form of the request parameters."""
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed response cache with LRU eviction by total size."""
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread and process (connections must not cross a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                content TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used_at)")
+        conn.commit()
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str):
+        """Return the cached content for key, or None."""
+        conn = self._connection()
+        row = conn.execute("SELECT content FROM responses WHERE key = ?", (key,)).fetchone()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        conn.execute(
+            "UPDATE responses SET last_used_at = ?, hit_count = hit_count + 1 WHERE key = ?",
+            (time.time(), key)
+        )
+        conn.commit()
+        return row[0]
+
+    def put(self, key: str, model: str, content: str):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, content, size, created_at, last_used_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, content, len(content.encode("utf-8")), now, now)
+        )
+        conn.commit()
+        self._evict(conn)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * EVICT_TO_FRACTION)
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used_at ASC").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        conn.commit()
+
+        with self._lock:
+            self.evictions += evicted
+
+    def clear(self):
+        conn = self._connection()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+
+    def stats(self) -> dict:
+        """Return size, configuration and hit-rate metrics."""
+        lookups = self.hits + self.misses
+        stats = {
+            "enabled": ENABLED,
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+        if ENABLED:
+            try:
+                entries, size = self._connection().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+                stats.update({"entries": entries, "bytes": size})
+            except sqlite3.Error as e:
+                stats["error"] = str(e)
+        return stats
+
+
+llm_cache = LLMCache(CACHE_PATH, MAX_BYTES)
+
+
+def _lookup(params: dict, use_cache: bool):
+    """Return (key, cached content or None); key is None when the cache is skipped."""
+    if not ENABLED:
+        return None, None
+    if not use_cache:
+        llm_cache.record_bypass()
+        return fingerprint(params), None
+    key = fingerprint(params)
+    return key, llm_cache.get(key)
+
+
+def _store(key, params: dict, content: str, validate):
+    """Cache content unless it is empty or fails validation (e.g. invalid JSON)."""
+    if key is None or not content:
+        return
+    if validate is not None:
+        try:
+            validate(content)
+        except Exception:
+            return
+    llm_cache.put(key, params.get("model"), content)
+
+
+def _observe(params: dict, content: str, usage: dict, started: float):
+    """Hand a live provider response to the cassette (recorded in record mode)."""
+    latency = time.monotonic() - started
+    if cassette.recording:
+        cassette.record(fingerprint(params), params, content, usage, latency)
+    else:
+        cassette.observe(params, content, usage, latency)
+
+
+def _provider_call(client, params: dict) -> str:
+    """One provider call (or cassette replay) behind the cache."""
+    if cassette.replaying:
+        entry = cassette.replay(fingerprint(params), params)
+        time.sleep(cassette.replay_delay(entry))
+        return entry["content"]
+
+    started = time.monotonic()
+    response = llm_resilience.call(client, params)
+    content = response.choices[0].message.content
+    _observe(params, content, usage_from_response(response, params, content), started)
+    return content
+
+
+async def _provider_call_async(client, params: dict) -> str:
+    if cassette.replaying:
+        entry = cassette.replay(fingerprint(params), params)
+        await asyncio.sleep(cassette.replay_delay(entry))
+        return entry["content"]
+
+    started = time.monotonic()
+    response = await llm_resilience.call_async(client, params)
+    content = response.choices[0].message.content
+    _observe(params, content, usage_from_response(response, params, content), started)
+    return content
+
+
+def chat_completion(client, params: dict, use_cache: bool = True, validate=None) -> str:
+    """
+    Run client.chat.completions.create(**params) through the cache (and the
+    retry / deadline / circuit-breaker layer in llm_resilience on a miss).
+
+    Args:
+        client: An OpenAI client
+        params: Chat-completions parameters (model, messages, sampling, ...)
+        use_cache: False skips the lookup (the fresh answer is still stored)
+        validate: Optional callable that raises for content not worth caching
+
+    Returns:
+        The message content of the first choice
+    """
+    key, content = _lookup(params, use_cache)
+    if content is not None:
+        return content
+
+    content = _provider_call(client, params)
+
+    _store(key, params, content, validate)
+    return content
+
+
+async def chat_completion_async(client, params: dict, use_cache: bool = True, validate=None) -> str:
+    """Async variant of chat_completion for an AsyncOpenAI client."""
+    key, content = _lookup(params, use_cache)
+    if content is not None:
+        return content
+
+    content = await _provider_call_async(client, params)
+
+    _store(key, params, content, validate)
+    return content
+
+
+def chat_completion_stream(client, params: dict, use_cache: bool = True, validate=None):
+    """
+    Streaming variant of chat_completion: yields the content piece by piece.
+
+    A cache hit yields the stored content as a single piece. The streamed
+    pieces are joined and stored once the stream has finished.
+    """
+    key, content = _lookup(params, use_cache)
+    if content is not None:
+        yield content
+        return
+
+    if cassette.replaying:
+        # Replayed streams arrive as one piece
+        content = _provider_call(client, params)
+        _store(key, params, content, validate)
+        yield content
+        return
+
+    started = time.monotonic()
+    pieces = []
+    chunks = iter(llm_resilience.call_stream(client, params))
+    while True:
+        # Only the wait for the next chunk is network time, not the caller's work between chunks
+        with stage("llm_network"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            pieces.append(delta)
+            yield delta
+
+    content = "".join(pieces)
+    _observe(params, content, estimate_usage(params, content), started)
+    _store(key, params, content, validate)
@@ -0,0 +1,174 @@
+"""
+Record/Replay Cassettes for LLM Calls
+
+Every OpenAI call that reaches the provider (llm_cache misses from
+few_shot_classifier and llm_service) can be recorded to, or served from, a
+cassette file. Entries are keyed by the same request fingerprint as the LLM
+cache (model, messages, sampling parameters) and store the response content,
+token usage and measured latency.
+
+    record: calls go to the provider and every response is appended
+    replay: responses come from the cassette only (no network, no API key);
+            a request that was never recorded raises CassetteMissError.
+            LLM_CASSETTE_REPLAY_LATENCY=1 sleeps for the recorded latency.
+
+The cassette is gzip-compressed JSON lines; each record is appended as its
+own gzip member, so an interrupted recording keeps everything written so far.
+
+Configuration (environment variables):
+    LLM_CASSETTE_MODE            - "off" (default), "record" or "replay"
+    LLM_CASSETTE_PATH            - Cassette file (default: backend/data/cassettes/llm.jsonl.gz)
+    LLM_CASSETTE_REPLAY_LATENCY  - "1" reproduces recorded latency on replay (default: "0")
+
+Usage:
+    LLM_CASSETTE_MODE=record python benchmark.py --limit 200
+    LLM_CASSETTE_MODE=replay python benchmark.py --limit 200
+"""
+
+import os
+import gzip
+import json
+import time
+import threading
+from pathlib import Path
+
+MODE = os.environ.get("LLM_CASSETTE_MODE", "off").lower()
+DEFAULT_CASSETTE_PATH = Path(__file__).parent.parent / "data" / "cassettes" / "llm.jsonl.gz"
+CASSETTE_PATH = os.environ.get("LLM_CASSETTE_PATH", str(DEFAULT_CASSETTE_PATH))
+REPLAY_LATENCY = os.environ.get("LLM_CASSETTE_REPLAY_LATENCY", "0") == "1"
+
+if MODE not in ("off", "record", "replay"):
+    raise ValueError(f"LLM_CASSETTE_MODE must be 'off', 'record' or 'replay', got '{MODE}'")
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode for a request that is not in the cassette."""
+
+
+def estimate_usage(params: dict, content: str) -> dict:
+    """Token usage estimate (~4 characters per token) when the provider reports none."""
+    prompt = sum((len(m.get("content") or "") + 3) // 4 for m in params.get("messages", []))
+    completion = (len(content or "") + 3) // 4
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion, "estimated": True}
+
+
+def usage_from_response(response, params: dict, content: str) -> dict:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return estimate_usage(params, content)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens
+    }
+
+
+class Cassette:
+    """In-memory index of a cassette file plus the append log."""
+
+    def __init__(self, path: str, mode: str = MODE, replay_latency: bool = REPLAY_LATENCY):
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+
+        self._lock = threading.Lock()
+        self._entries = None
+        self._last = threading.local()
+
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    entries = {}
+                    if os.path.exists(self.path):
+                        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                            for line in f:
+                                if line.strip():
+                                    entry = json.loads(line)
+                                    entries[entry["key"]] = entry
+                    self._entries = entries
+        return self._entries
+
+    def replay(self, key: str, params: dict) -> dict:
+        """
+        Returns:
+            The recorded entry for key (content, usage, latency); callers
+            sleep for replay_delay(entry) to reproduce the latency
+        """
+        entry = self._load().get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMissError(f"No cassette entry for this {params.get('model')} request in {self.path}")
+
+        with self._lock:
+            self.replayed += 1
+        self._remember(entry, "replay")
+        return entry
+
+    def replay_delay(self, entry: dict) -> float:
+        """Seconds to wait before returning a replayed entry."""
+        return entry.get("latency", 0.0) if self.replay_latency else 0.0
+
+    def record(self, key: str, params: dict, content: str, usage: dict, latency: float):
+        """Append a live response to the cassette."""
+        entry = {
+            "key": key,
+            "model": params.get("model"),
+            "content": content,
+            "usage": usage,
+            "latency": round(latency, 4),
+            "recorded_at": time.time()
+        }
+        entries = self._load()
+        with self._lock:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            entries[key] = entry
+            self.recorded += 1
+        self._remember(entry, "live")
+
+    def observe(self, params: dict, content: str, usage: dict, latency: float):
+        """Note a live call that is not being recorded (for last_call)."""
+        self._remember({"model": params.get("model"), "usage": usage, "latency": latency}, "live")
+
+    def _remember(self, entry: dict, source: str):
+        self._last.call = {
+            "source": source,
+            "model": entry.get("model"),
+            "usage": entry.get("usage"),
+            "latency": entry.get("latency")
+        }
+
+    def last_call(self):
+        """Usage/latency of the most recent provider call (or replay) on this thread, or None."""
+        return getattr(self._last, "call", None)
+
+    def reset_last_call(self):
+        self._last.call = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "entries": len(self._entries) if self._entries is not None else None,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses
+        }
+
+
+cassette = Cassette(CASSETTE_PATH)
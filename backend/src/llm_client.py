@@ -0,0 +1,143 @@
+"""
+Shared LLM Client Factory
+
+One pooled OpenAI client per process for all LLM traffic (explanations and
+few-shot classification), so requests reuse kept-alive connections instead
+of paying a TLS handshake each time, and pool sizing is a single setting.
+
+The sync client is created on first use and re-created after a fork (each
+Gunicorn worker gets its own pool; sockets must not be shared across
+processes). Async clients are bound to the event loop that uses them, so
+create_async_llm_client() returns a new one with the same pool settings for
+each batch; the caller closes it.
+
+Configuration (environment variables):
+    OPENAI_API_KEY                - Required; without it no client is created
+                                    (except in LLM_CASSETTE_MODE=replay, which
+                                    never reaches the provider)
+    LLM_BASE_URL                  - API base URL, e.g. a gateway or proxy endpoint
+                                    (default: OPENAI_BASE_URL or the OpenAI API)
+    LLM_PROXY_URL                 - Outbound HTTP(S) proxy (default: HTTPS_PROXY etc.
+                                    from the environment)
+    LLM_POOL_MAX_CONNECTIONS      - Connections per process (default: 20)
+    LLM_POOL_MAX_KEEPALIVE        - Idle connections kept open (default: 10)
+    LLM_KEEPALIVE_EXPIRY_SECONDS  - How long an idle connection is kept (default: 60)
+    LLM_HTTP2                     - "1" enables HTTP/2 (needs the h2 package; default: "0")
+
+Usage:
+    from llm_client import get_llm_client
+
+    client = get_llm_client()   # None without OPENAI_API_KEY
+"""
+
+import os
+import threading
+
+BASE_URL = os.environ.get("LLM_BASE_URL") or os.environ.get("OPENAI_BASE_URL") or None
+PROXY_URL = os.environ.get("LLM_PROXY_URL") or None
+POOL_MAX_CONNECTIONS = int(os.environ.get("LLM_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.environ.get("LLM_POOL_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.environ.get("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+HTTP2 = os.environ.get("LLM_HTTP2", "0") == "1"
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_http2_available = None
+
+# Replay never sends requests; the client only has to exist
+REPLAY_PLACEHOLDER_KEY = "cassette-replay"
+
+
+def _use_http2() -> bool:
+    """HTTP/2 if requested and the h2 package is installed."""
+    global _http2_available
+    if not HTTP2:
+        return False
+    if _http2_available is None:
+        try:
+            import h2  # noqa: F401
+            _http2_available = True
+        except ImportError:
+            print("⚠️ Warning: LLM_HTTP2=1 but the h2 package is not installed. Using HTTP/1.1.")
+            _http2_available = False
+    return _http2_available
+
+
+def _http_client_options() -> dict:
+    import httpx
+
+    options = {
+        "limits": httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        ),
+        "http2": _use_http2()
+    }
+    if PROXY_URL:
+        options["proxy"] = PROXY_URL
+    return options
+
+
+def _api_key():
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key and os.environ.get("LLM_CASSETTE_MODE", "off").lower() == "replay":
+        return REPLAY_PLACEHOLDER_KEY
+    return api_key or None
+
+
+def has_llm_credentials() -> bool:
+    """True when LLM calls can be served (an API key, or cassette replay)."""
+    return _api_key() is not None
+
+
+def get_llm_client():
+    """Return the process-wide OpenAI client (None without an API key)."""
+    global _client, _client_pid
+
+    api_key = _api_key()
+    if not api_key:
+        return None
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _lock:
+        if _client is None or _client_pid != pid:
+            from openai import OpenAI, DefaultHttpxClient
+            _client = OpenAI(
+                api_key=api_key,
+                base_url=BASE_URL,
+                http_client=DefaultHttpxClient(**_http_client_options())
+            )
+            _client_pid = pid
+        return _client
+
+
+def create_async_llm_client():
+    """New AsyncOpenAI client with the shared pool settings (None without an API key)."""
+    api_key = _api_key()
+    if not api_key:
+        return None
+
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=BASE_URL,
+        http_client=DefaultAsyncHttpxClient(**_http_client_options())
+    )
+
+
+def get_client_info() -> dict:
+    """Return the client configuration for /stats."""
+    return {
+        "base_url": BASE_URL or "https://api.openai.com/v1",
+        "proxy": bool(PROXY_URL),
+        "max_connections": POOL_MAX_CONNECTIONS,
+        "max_keepalive_connections": POOL_MAX_KEEPALIVE,
+        "keepalive_expiry_seconds": KEEPALIVE_EXPIRY,
+        "http2": _use_http2(),
+        "client_created": _client is not None and _client_pid == os.getpid()
+    }
@@ -0,0 +1,435 @@
+"""
+Resilience Layer for OpenAI Calls
+
+Every chat completion (llm_cache.chat_completion / _async / _stream) goes
+through call(), call_async() or call_stream() here, which add:
+
+- Deadlines: each logical call gets LLM_REQUEST_BUDGET_SECONDS in total;
+  every attempt is given min(LLM_ATTEMPT_TIMEOUT_SECONDS, time left) as its
+  HTTP timeout, so a slow response can no longer hold a worker indefinitely.
+- Retries: up to LLM_MAX_RETRIES more attempts on retryable errors
+  (timeouts, connection errors, 408/409/429/5xx) with full-jitter exponential
+  backoff, never sleeping past the deadline. The SDK's own retries are off.
+- Hedging (opt-in): if an attempt has not answered after the recent p95
+  latency, a duplicate request is sent and the first answer wins. This cuts
+  tail latency at the cost of extra API calls. Not used for streams.
+- Circuit breaker: after LLM_BREAKER_FAILURES consecutive failed calls the
+  breaker opens and calls fail immediately with CircuitOpenError (callers
+  return their usual fallback payloads) for LLM_BREAKER_RESET_SECONDS; then
+  one trial call decides whether it closes again.
+
+State is per process (each Gunicorn worker has its own breaker).
+
+Configuration (environment variables):
+    LLM_REQUEST_BUDGET_SECONDS  - Total time per call including retries (default: 45)
+    LLM_ATTEMPT_TIMEOUT_SECONDS - HTTP timeout per attempt (default: 30)
+    LLM_MAX_RETRIES             - Retries after the first attempt (default: 2)
+    LLM_BACKOFF_BASE_SECONDS    - First backoff ceiling, doubled per retry (default: 0.5)
+    LLM_BACKOFF_MAX_SECONDS     - Largest backoff ceiling (default: 8)
+    LLM_HEDGE_ENABLED           - "1" sends hedged duplicate requests (default: "0")
+    LLM_HEDGE_DELAY_SECONDS     - Fixed hedge delay (default: recent p95 latency)
+    LLM_BREAKER_FAILURES        - Consecutive failures that open the breaker (default: 5)
+    LLM_BREAKER_RESET_SECONDS   - How long the breaker stays open (default: 30)
+"""
+
+import os
+import time
+import random
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+
+from request_metrics import stage
+
+REQUEST_BUDGET = float(os.environ.get("LLM_REQUEST_BUDGET_SECONDS", "45"))
+ATTEMPT_TIMEOUT = float(os.environ.get("LLM_ATTEMPT_TIMEOUT_SECONDS", "30"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "8"))
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "0") == "1"
+HEDGE_DELAY = float(os.environ.get("LLM_HEDGE_DELAY_SECONDS", "0"))
+BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+# Latency samples needed before the p95 hedge delay is trusted
+MIN_HEDGE_SAMPLES = 20
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+
+class Deadline:
+    """Absolute end time for one logical call."""
+
+    def __init__(self, budget: float = REQUEST_BUDGET):
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half_open (one trial) -> closed."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+        self.times_opened = 0
+        self.short_circuited = 0
+
+    def acquire(self):
+        """
+        Admit a call to the provider.
+
+        Returns:
+            "call" (breaker closed), "trial" (the single half-open trial) or
+            None when the call is short-circuited
+        """
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return "trial"
+            if self.state == "closed":
+                return "call"
+            self.short_circuited += 1
+            return None
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now."""
+        return self.acquire() is not None
+
+    def release_trial(self):
+        """Let another call take the half-open trial (the last one ended without a verdict)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_seconds,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited
+        }
+
+
+class LatencyTracker:
+    """Rolling window of successful attempt latencies."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+breaker = CircuitBreaker()
+latency = LatencyTracker()
+
+_stats_lock = threading.Lock()
+_counters = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "hedges": 0, "hedge_wins": 0}
+
+_hedge_executor = None
+_hedge_executor_pid = None
+
+
+def _count(name: str, amount: int = 1):
+    with _stats_lock:
+        _counters[name] += amount
+
+
+def is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors and 408/409/429/5xx responses."""
+    if isinstance(error, (TimeoutError, ConnectionError, concurrent.futures.TimeoutError, asyncio.TimeoutError)):
+        return True
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def _backoff(retry: int) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^retry)]."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** retry)))
+
+
+def hedge_delay():
+    """Seconds to wait before hedging, or None when hedging is off / not calibrated yet."""
+    if not HEDGE_ENABLED:
+        return None
+    if HEDGE_DELAY > 0:
+        return HEDGE_DELAY
+    if len(latency) < MIN_HEDGE_SAMPLES:
+        return None
+    return latency.percentile(0.95)
+
+
+def _executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Thread pool for hedged sync attempts (re-created after a fork)."""
+    global _hedge_executor, _hedge_executor_pid
+    with _stats_lock:
+        if _hedge_executor is None or _hedge_executor_pid != os.getpid():
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+            _hedge_executor_pid = os.getpid()
+        return _hedge_executor
+
+
+def _attempt(client, params: dict, timeout: float, **extra):
+    _count("attempts")
+    start = time.monotonic()
+    response = client.with_options(max_retries=0, timeout=timeout).chat.completions.create(**params, **extra)
+    if not extra:
+        # Opening a stream is not comparable to a full completion
+        latency.record(time.monotonic() - start)
+    return response
+
+
+def _hedged_attempt(client, params: dict, timeout: float):
+    delay = hedge_delay()
+    if delay is None or delay >= timeout:
+        return _attempt(client, params, timeout)
+
+    pool = _executor()
+    primary = pool.submit(_attempt, client, params, timeout)
+    # wait() rather than result(timeout=...): a TimeoutError raised by the attempt
+    # itself must not be mistaken for "still running" (they are one class on 3.11+)
+    done, _ = concurrent.futures.wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+
+    _count("hedges")
+    hedge = pool.submit(_attempt, client, params, timeout - delay)
+    pending = {primary, hedge}
+    ends_at = time.monotonic() + timeout - delay
+    error = None
+    # The slower request is abandoned (a blocking HTTP call cannot be cancelled)
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, timeout=max(0.0, ends_at - time.monotonic()), return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if not done:
+            raise TimeoutError("LLM attempt timed out")
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _count("hedge_wins")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def _attempt_async(client, params: dict, timeout: float):
+    _count("attempts")
+    start = time.monotonic()
+    response = await client.with_options(max_retries=0, timeout=timeout).chat.completions.create(**params)
+    latency.record(time.monotonic() - start)
+    return response
+
+
+async def _hedged_attempt_async(client, params: dict, timeout: float):
+    delay = hedge_delay()
+    if delay is None or delay >= timeout:
+        return await _attempt_async(client, params, timeout)
+
+    primary = asyncio.ensure_future(_attempt_async(client, params, timeout))
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+
+    _count("hedges")
+    hedge = asyncio.ensure_future(_attempt_async(client, params, timeout - delay))
+    pending = {primary, hedge}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _count("hedge_wins")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _start(deadline):
+    """Returns (deadline, admission) where admission is "call" or "trial"."""
+    admission = breaker.acquire()
+    if admission is None:
+        raise CircuitOpenError("LLM provider circuit breaker is open; failing fast")
+    _count("calls")
+    return deadline or Deadline(), admission
+
+
+def _finish(admission: str):
+    # A trial interrupted by a BaseException (cancellation, KeyboardInterrupt,
+    # GeneratorExit) records neither success nor failure; free the slot anyway
+    if admission == "trial":
+        breaker.release_trial()
+
+
+def _handle_failure(error: Exception, retry: int, deadline: Deadline):
+    """
+    Decide what to do after a failed attempt.
+
+    Returns:
+        Seconds to back off before retrying (the error is re-raised otherwise)
+    """
+    if not is_retryable(error):
+        # A rejected request (e.g. 400/401) says nothing about the provider's
+        # health either way, so the breaker records no outcome
+        raise error
+
+    backoff = _backoff(retry)
+    if retry >= MAX_RETRIES or backoff >= deadline.remaining():
+        _count("failures")
+        breaker.record_failure()
+        raise error
+
+    _count("retries")
+    return backoff
+
+
+def _attempt_timeout(deadline: Deadline) -> float:
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        _count("failures")
+        breaker.record_failure()
+        raise TimeoutError("LLM request budget exhausted")
+    return min(ATTEMPT_TIMEOUT, remaining)
+
+
+def call(client, params: dict, deadline: Deadline = None):
+    """client.chat.completions.create(**params) with deadline, retries, hedging and breaker."""
+    deadline, admission = _start(deadline)
+    try:
+        retry = 0
+        while True:
+            timeout = _attempt_timeout(deadline)
+            try:
+                with stage("llm_network"):
+                    response = _hedged_attempt(client, params, timeout)
+            except Exception as e:
+                backoff = _handle_failure(e, retry, deadline)
+                with stage("llm_queue"):
+                    time.sleep(backoff)
+                retry += 1
+                continue
+            breaker.record_success()
+            return response
+    finally:
+        _finish(admission)
+
+
+async def call_async(client, params: dict, deadline: Deadline = None):
+    """Async variant of call() for an AsyncOpenAI client."""
+    deadline, admission = _start(deadline)
+    try:
+        retry = 0
+        while True:
+            timeout = _attempt_timeout(deadline)
+            try:
+                with stage("llm_network"):
+                    response = await _hedged_attempt_async(client, params, timeout)
+            except Exception as e:
+                backoff = _handle_failure(e, retry, deadline)
+                with stage("llm_queue"):
+                    await asyncio.sleep(backoff)
+                retry += 1
+                continue
+            breaker.record_success()
+            return response
+    finally:
+        _finish(admission)
+
+
+def call_stream(client, params: dict, deadline: Deadline = None):
+    """
+    Open a streamed completion (stream=True) with deadline, retries and breaker.
+
+    Retries only cover opening the stream; an error after the first chunk is
+    raised to the caller, since the partial output has already been used.
+    """
+    deadline, admission = _start(deadline)
+    try:
+        retry = 0
+        while True:
+            timeout = _attempt_timeout(deadline)
+            try:
+                with stage("llm_network"):
+                    stream = _attempt(client, params, timeout, stream=True)
+            except Exception as e:
+                backoff = _handle_failure(e, retry, deadline)
+                with stage("llm_queue"):
+                    time.sleep(backoff)
+                retry += 1
+                continue
+            breaker.record_success()
+            return stream
+    finally:
+        _finish(admission)
+
+
+def get_resilience_stats() -> dict:
+    """Return counters, latency percentiles and breaker state for /stats."""
+    p50, p95 = latency.percentile(0.5), latency.percentile(0.95)
+    with _stats_lock:
+        counters = dict(_counters)
+    return {
+        **counters,
+        "request_budget_seconds": REQUEST_BUDGET,
+        "attempt_timeout_seconds": ATTEMPT_TIMEOUT,
+        "max_retries": MAX_RETRIES,
+        "hedge_enabled": HEDGE_ENABLED,
+        "hedge_delay_seconds": hedge_delay(),
+        "latency_p50_seconds": round(p50, 3) if p50 is not None else None,
+        "latency_p95_seconds": round(p95, 3) if p95 is not None else None,
+        "breaker": breaker.stats()
+    }
@@ -1,17 +1,23 @@
-import os
 import json
-from openai import OpenAI
+from result_cache import explanation_cache, make_key
+from llm_cache import chat_completion
+from llm_client import get_llm_client, has_llm_credentials
 
-# Initialize client (expects OPENAI_API_KEY env var)
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+def _parse_explanation(content):
+    """Parse the JSON explanation (strip markdown fences if present)"""
+    if "```json" in content:
+        content = content.replace("```json", "").replace("```", "")
+    return json.loads(content.strip())
 
-def generate_bias_explanation(text, predicted_label, confidence):
+def generate_bias_explanation(text, predicted_label, confidence, use_cache=True):
     """
     Uses OpenAI GPT-4 to generate a clinical rationale, bias flags, and recommended revision
     based on the classification from the local discrimination model.
+
+    use_cache=False bypasses both the in-memory and the persistent response cache.
     """
     
-    if not os.environ.get("OPENAI_API_KEY"):
+    if not has_llm_credentials():
         return {
             "rationale": "OpenAI API Key not configured. Using fallback templates.",
             "flags": [],
@@ -19,6 +25,12 @@ def generate_bias_explanation(text, predicted_label, confidence):
             "error": "missing_api_key"
         }
 
+    # Repeated submissions of the same text/label reuse the earlier explanation
+    cache_key = make_key(text, "gpt-4", predicted_label, f"{confidence:.2f}")
+    found, cached = explanation_cache.get(cache_key) if use_cache else (False, None)
+    if found:
+        return dict(cached)
+
     # Construct the prompt
     system_prompt = """You are an expert medical auditor specializing in bias detection in clinical documentation. 
 Your task is to analyze a clinical text based on a pre-detected bias label and provide a structured assessment."""
@@ -38,23 +50,19 @@ Respond ONLY with the json object (no surrounding text or markdown fences).
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        content = chat_completion(get_llm_client(), {
+            "model": "gpt-4",
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
-            temperature=0.3,
-            max_tokens=500
-        )
-
-        content = response.choices[0].message.content
+            "temperature": 0.3,
+            "max_tokens": 500
+        }, use_cache=use_cache, validate=_parse_explanation)
         
         # Parse JSON from response (strip markdown fences if present)
-        if "```json" in content:
-            content = content.replace("```json", "").replace("```", "")
-        
-        data = json.loads(content.strip())
+        data = _parse_explanation(content)
+        explanation_cache.put(cache_key, dict(data))
         return data
 
     except Exception as e:
@@ -0,0 +1,179 @@
+"""
+Dynamic Micro-Batching for RoBERTa Inference
+
+Concurrent /predict requests are collected for a few milliseconds and run
+through a single padded forward pass instead of one forward pass each.
+Every caller blocks until its own (label, confidence) result is ready.
+
+A batch is dispatched as soon as either limit is hit:
+- MICROBATCH_MAX_SIZE requests are waiting, or
+- MICROBATCH_MAX_WAIT_MS milliseconds have passed since the first one arrived
+
+so the extra queueing delay any request can see is bounded by the max wait.
+A caller that gives up waiting (submit timeout) cancels its request, and a
+batch that is still queued skips it.
+Requests for different LoRA adapters (multi-adapter serving) are collected
+together but run as one forward pass per adapter.
+
+Configuration (environment variables):
+    MICROBATCH_ENABLED         - "0" disables batching in /predict (default: "1")
+    MICROBATCH_MAX_WAIT_MS     - Longest hold for the first request of a batch (default: 5)
+    MICROBATCH_MAX_SIZE        - Largest number of texts per forward pass (default: 16)
+    MICROBATCH_TIMEOUT_SECONDS - How long /predict waits for its batched result (default: 30)
+
+Usage:
+    from micro_batcher import MicroBatcher
+    from predict import predict_bias_many
+
+    batcher = MicroBatcher(lambda texts, adapter: predict_bias_many(texts, adapter=adapter))
+    label, confidence = batcher.submit("Your clinical text here", timeout=TIMEOUT_SECONDS)
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import request_metrics
+
+# Batching configuration (can be overridden via environment variables)
+ENABLED = os.environ.get("MICROBATCH_ENABLED", "1") != "0"
+MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", "5"))
+MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_SIZE", "16"))
+TIMEOUT_SECONDS = float(os.environ.get("MICROBATCH_TIMEOUT_SECONDS", "30"))
+
+
+class MicroBatcher:
+    """Collects concurrent single-text requests into padded batches."""
+
+    def __init__(self, batch_fn, max_wait_ms: float = MAX_WAIT_MS, max_batch_size: int = MAX_BATCH_SIZE):
+        """
+        Args:
+            batch_fn: Callable taking (texts, adapter) and returning a list of
+                      (predicted_label, confidence) tuples in the same order
+            max_wait_ms: Longest time to hold the first request of a batch
+            max_batch_size: Largest number of texts per forward pass
+        """
+        self._batch_fn = batch_fn
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._worker_pid = None
+
+        # Counters for /stats
+        self.batches_run = 0
+        self.items_processed = 0
+        self.largest_batch = 0
+
+    def submit(self, text: str, adapter: str = None, timeout: float = None):
+        """
+        Queue a text for the next batch and wait for its result.
+
+        Args:
+            text: The clinical text to classify
+            adapter: LoRA adapter to classify with (None for the default)
+            timeout: Optional number of seconds to wait for the result
+
+        Returns:
+            Tuple of (predicted_label, confidence)
+
+        Raises:
+            concurrent.futures.TimeoutError: No result within timeout seconds
+        """
+        future = Future()
+        timer = request_metrics.current_timer()
+        self._ensure_worker().put((text, adapter, future, timer, time.perf_counter()))
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()  # Skipped if its batch has not started yet
+            raise
+
+    def stats(self) -> dict:
+        """Return batching configuration and counters."""
+        with self._stats_lock:
+            batches_run, items_processed, largest_batch = self.batches_run, self.items_processed, self.largest_batch
+        avg = items_processed / batches_run if batches_run else 0.0
+        return {
+            "enabled": ENABLED,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "timeout_seconds": TIMEOUT_SECONDS,
+            "batches_run": batches_run,
+            "items_processed": items_processed,
+            "largest_batch": largest_batch,
+            "average_batch_size": round(avg, 2)
+        }
+
+    def _ensure_worker(self) -> queue.Queue:
+        """Start the worker thread on first use (and again after a fork)."""
+        pid = os.getpid()
+        with self._lock:
+            if self._worker is None or self._worker_pid != pid or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(
+                    target=self._run, args=(self._queue,), name="micro-batcher", daemon=True
+                )
+                self._worker_pid = pid
+                self._worker.start()
+            return self._queue
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: list):
+        groups = {}
+        for text, adapter, future, timer, enqueued in batch:
+            # False when the caller already timed out and cancelled the request
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(adapter, []).append((text, future, timer, enqueued))
+
+        for adapter, items in groups.items():
+            started = time.perf_counter()
+            try:
+                # Stages of the shared forward pass are reported to every request in it
+                with request_metrics.capture() as batch_timer:
+                    results = self._batch_fn([text for text, _, _, _ in items], adapter)
+            except Exception as e:
+                for _, future, _, _ in items:
+                    future.set_exception(e)
+                continue
+
+            if len(results) != len(items):
+                error = RuntimeError(f"Batch function returned {len(results)} results for {len(items)} texts")
+                for _, future, _, _ in items:
+                    future.set_exception(error)
+                continue
+
+            for (_, future, timer, enqueued), result in zip(items, results):
+                if timer is not None:
+                    timer.add("batch_wait", started - enqueued)
+                    if batch_timer is not None:
+                        timer.merge(batch_timer)
+                future.set_result(result)
+
+        processed = sum(len(items) for items in groups.values())
+        if not processed:
+            return
+        with self._stats_lock:
+            self.batches_run += 1
+            self.items_processed += processed
+            self.largest_batch = max(self.largest_batch, processed)
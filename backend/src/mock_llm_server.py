@@ -0,0 +1,285 @@
+"""
+Offline OpenAI-Compatible Stand-In Server
+
+A local chat-completions endpoint for load-testing /predict, /explain and
+the few-shot endpoints without network access or OpenAI quota. It speaks
+enough of the protocol for the official client: POST /v1/chat/completions
+(JSON mode and stream=true), GET /v1/models, OpenAI-style error bodies.
+
+Responses are schema-valid and deterministic per input:
+- few-shot prompts get a bias report in the few_shot_examples.json schema
+- explanation prompts (llm_service) get rationale / flags / recommended_revision
+The category comes from a keyword heuristic, not a model; only the shape and
+timing are realistic.
+
+Latency, errors and rate limiting are configurable:
+    MOCK_LLM_LATENCY_MEDIAN_MS  - Median response time, lognormal (default: 800)
+    MOCK_LLM_LATENCY_SIGMA      - Lognormal sigma; 0 = fixed latency (default: 0.5)
+    MOCK_LLM_TAIL_RATE          - Share of requests that are slow outliers (default: 0.01)
+    MOCK_LLM_TAIL_FACTOR        - Latency multiplier for outliers (default: 8)
+    MOCK_LLM_ERROR_RATE         - Share of requests answered with 500/502/503 (default: 0)
+    MOCK_LLM_RPM                - Requests per minute before 429s; 0 = unlimited (default: 0)
+    MOCK_LLM_SEED               - Seed for latency/error sampling (default: random)
+
+Usage:
+    python src/mock_llm_server.py --port 8100
+
+    # In another shell, point the backend at it
+    OPENAI_API_KEY=mock LLM_BASE_URL=http://localhost:8100/v1 python src/app.py
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import threading
+
+from flask import Flask, Response, request, jsonify
+
+LATENCY_MEDIAN = float(os.environ.get("MOCK_LLM_LATENCY_MEDIAN_MS", "800")) / 1000.0
+LATENCY_SIGMA = float(os.environ.get("MOCK_LLM_LATENCY_SIGMA", "0.5"))
+TAIL_RATE = float(os.environ.get("MOCK_LLM_TAIL_RATE", "0.01"))
+TAIL_FACTOR = float(os.environ.get("MOCK_LLM_TAIL_FACTOR", "8"))
+ERROR_RATE = float(os.environ.get("MOCK_LLM_ERROR_RATE", "0"))
+RATE_LIMIT_RPM = int(os.environ.get("MOCK_LLM_RPM", "0"))
+SEED = os.environ.get("MOCK_LLM_SEED")
+
+# Characters per streamed chunk (roughly a few tokens)
+STREAM_CHUNK_CHARS = 24
+
+# Keyword heuristic: (category, sub_type, patterns)
+BIAS_PATTERNS = [
+    ("demographic_bias", "racial_bias", r"\b(african american|black|hispanic|latino|asian|white|ethnic\w*|race|cultural \w+)\b"),
+    ("demographic_bias", "gender_bias", r"\b(her gender|as a woman|female patients? (tend|are)|hysterical|emotional (woman|female))\b"),
+    ("demographic_bias", "age_bias", r"\b(too old|elderly patients? (can't|cannot|won't)|at (his|her) age)\b"),
+    ("demographic_bias", "socioeconomic_bias", r"\b(afford\w*|uninsured|medicaid|homeless|low[- ]income|poor)\b"),
+    ("clinical_stigma_bias", "pain_stigma", r"\b(claims?|exaggerat\w*|drug[- ]seeking|appears comfortable|seeking drugs)\b"),
+    ("clinical_stigma_bias", "lifestyle_stigma", r"\b(non[- ]?compliant|frequent flyer|refuses to|lazy|unmotivated)\b"),
+    ("clinical_stigma_bias", "weight_stigma", r"\b(obese|morbidly|fat|overweight)\b"),
+    ("clinical_stigma_bias", "mental_health_stigma", r"\b(all in (his|her) head|just anxious|psychosomatic|attention[- ]seeking)\b"),
+    ("assessment_bias", "competency_assessment_bias", r"\b(abrasive|too confident|accent|aggressive|bossy|not a team player)\b"),
+    ("assessment_bias", "diagnostic_bias", r"\b(probably|likely just|obviously)\b"),
+]
+
+LEVELS = ["NONE", "LOW", "MODERATE", "HIGH", "CRITICAL"]
+
+app = Flask(__name__)
+rng = random.Random(SEED)
+_lock = threading.Lock()
+_bucket = {"tokens": float(RATE_LIMIT_RPM), "updated": time.monotonic()}
+counters = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0}
+
+
+def _count(name: str):
+    with _lock:
+        counters[name] += 1
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, (len(text) + 3) // 4)
+
+
+def sample_latency() -> float:
+    """Lognormal around the median, with occasional tail outliers."""
+    with _lock:
+        latency = LATENCY_MEDIAN * math.exp(LATENCY_SIGMA * rng.gauss(0, 1)) if LATENCY_SIGMA > 0 else LATENCY_MEDIAN
+        if rng.random() < TAIL_RATE:
+            latency *= TAIL_FACTOR
+    return latency
+
+
+def _take_rate_limit_token() -> bool:
+    """Token bucket refilled at MOCK_LLM_RPM per minute."""
+    if RATE_LIMIT_RPM <= 0:
+        return True
+    with _lock:
+        now = time.monotonic()
+        _bucket["tokens"] = min(RATE_LIMIT_RPM, _bucket["tokens"] + (now - _bucket["updated"]) * RATE_LIMIT_RPM / 60.0)
+        _bucket["updated"] = now
+        if _bucket["tokens"] < 1:
+            return False
+        _bucket["tokens"] -= 1
+        return True
+
+
+def error_response(status: int, message: str, error_type: str, headers: dict = None):
+    response = jsonify({"error": {"message": message, "type": error_type, "param": None, "code": None}})
+    response.status_code = status
+    for name, value in (headers or {}).items():
+        response.headers[name] = value
+    return response
+
+
+def find_biases(text: str) -> list:
+    """Keyword matches as biases_found entries (first match per sub-type)."""
+    biases = []
+    for category, sub_type, pattern in BIAS_PATTERNS:
+        match = re.search(pattern, text, flags=re.IGNORECASE)
+        if match:
+            biases.append({
+                "category": category,
+                "sub_type": sub_type,
+                "confidence": round(0.6 + 0.35 * (int(hashlib.md5(text.encode()).hexdigest(), 16) % 100) / 100, 2),
+                "evidence": f"The phrase \"{match.group(0)}\" suggests {sub_type.replace('_', ' ')} rather than a clinically grounded judgment.",
+                "problematic_text": match.group(0),
+                "recommendation": "Document objective clinical findings and the patient's own report instead."
+            })
+    return biases
+
+
+def bias_report(text: str) -> dict:
+    """Few-shot response in the few_shot_examples.json schema."""
+    biases = find_biases(text)
+    if not biases:
+        return {
+            "bias_detected": False,
+            "primary_category": "no_bias",
+            "overall_bias_level": "NONE",
+            "biases_found": [],
+            "bias_free_sections": [text[:120]],
+            "summary": "No bias detected; the content uses neutral, clinically focused language."
+        }
+
+    counts = {}
+    for bias in biases:
+        counts[bias["category"]] = counts.get(bias["category"], 0) + 1
+    primary = max(counts, key=counts.get)
+    return {
+        "bias_detected": True,
+        "primary_category": primary,
+        "overall_bias_level": LEVELS[min(len(LEVELS) - 1, 1 + len(biases))],
+        "biases_found": biases,
+        "bias_free_sections": [],
+        "summary": f"{len(biases)} potential bias indicator(s) found; dominant category: {primary}."
+    }
+
+
+def explanation(text: str, label: str) -> dict:
+    """llm_service response: rationale, flags, recommended_revision."""
+    if label == "no_bias":
+        return {
+            "rationale": "The text documents clinical findings objectively without demographic assumptions or stigmatizing language.",
+            "flags": [],
+            "recommended_revision": text
+        }
+    flags = [bias["problematic_text"] for bias in find_biases(text)]
+    revision = text
+    for flag in flags:
+        revision = revision.replace(flag, "[revise]")
+    return {
+        "rationale": f"The wording is consistent with {label.replace('_', ' ')}: it may shape care around assumptions rather than clinical evidence.",
+        "flags": flags,
+        "recommended_revision": revision
+    }
+
+
+def completion_content(messages: list, json_mode: bool) -> str:
+    """Pick the response shape from the prompt."""
+    last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+
+    label_match = re.search(r"Detected Label: (\w+)", last_user)
+    text_match = re.search(r'Input Text: "(.*)"\s*\nDetected Label', last_user, flags=re.DOTALL)
+    if label_match and text_match:
+        return json.dumps(explanation(text_match.group(1), label_match.group(1)))
+
+    if "Analyze this medical content for bias" in last_user:
+        return json.dumps(bias_report(last_user.split("\n\n", 1)[-1]))
+
+    return json.dumps({"result": "ok"}) if json_mode else "OK"
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.route('/v1/models', methods=['GET'])
+def models():
+    return jsonify({"object": "list", "data": [{"id": "mock-gpt", "object": "model", "owned_by": "mock"}]})
+
+
+@app.route('/v1/stats', methods=['GET'])
+def stats():
+    with _lock:
+        return jsonify(dict(counters))
+
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    _count("requests")
+    body = request.get_json(silent=True) or {}
+    messages = body.get("messages")
+    if not isinstance(messages, list) or not messages:
+        return error_response(400, "'messages' must be a non-empty list", "invalid_request_error")
+
+    if not _take_rate_limit_token():
+        _count("rate_limited")
+        return error_response(429, "Rate limit reached (mock)", "rate_limit_error", {"retry-after": "1"})
+
+    latency = sample_latency()
+    with _lock:
+        failed = rng.random() < ERROR_RATE
+        status = rng.choice([500, 502, 503])
+    if failed:
+        _count("errors")
+        time.sleep(latency / 4)
+        return error_response(status, "The server had an error while processing your request (mock)", "server_error")
+
+    model = body.get("model", "mock-gpt")
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    content = completion_content(messages, json_mode)
+    completion_id = f"chatcmpl-mock-{uuid.uuid4().hex[:24]}"
+    prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+
+    if body.get("stream"):
+        _count("streamed")
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+
+        def events():
+            # A quarter of the latency before the first token, the rest spread over the chunks
+            time.sleep(latency / 4)
+            yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for piece in pieces:
+                time.sleep(latency * 0.75 / max(1, len(pieces)))
+                yield _chunk(completion_id, model, {"content": piece})
+            yield _chunk(completion_id, model, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return Response(events(), mimetype="text/event-stream")
+
+    time.sleep(latency)
+    completion_tokens = estimate_tokens(content)
+    return jsonify({
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    })
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[sys.argv.index("--port") + 1]) if "--port" in sys.argv else 8100
+    print(f"🧪 Mock OpenAI server on http://localhost:{port}/v1 "
+          f"(median {LATENCY_MEDIAN * 1000:.0f} ms, errors {ERROR_RATE:.0%}, rpm {RATE_LIMIT_RPM or 'unlimited'})")
+    app.run(host="0.0.0.0", port=port, threaded=True)
@@ -0,0 +1,136 @@
+"""
+ONNX Runtime Inference Backend
+
+Exports the fine-tuned RoBERTa classifier to ONNX once and serves it through
+onnxruntime's CPU execution provider with all graph optimizations enabled.
+Selected with INFERENCE_BACKEND=onnx (see predict.py).
+
+The export directory holds:
+- model.onnx: The classifier graph (LoRA adapters already merged in)
+- tokenizer files: So the export can be loaded without the original checkpoint
+
+Usage:
+    from onnx_backend import OnnxClassifier, export_onnx_model
+    export_onnx_model(torch_model, tokenizer, "models/RoBERTa_Optimized_onnx")
+    classifier = OnnxClassifier("models/RoBERTa_Optimized_onnx")
+    logits = classifier.run_logits(tokenizer(texts, padding=True, return_tensors="pt"))
+"""
+
+import os
+import inspect
+import numpy as np
+
+ONNX_FILE_NAME = "model.onnx"
+ONNX_OPSET = 14
+
+# Threads used inside each ONNX operator (0 lets onnxruntime decide)
+ORT_NUM_THREADS = int(os.environ.get("ORT_NUM_THREADS", "0"))
+
+
+def _torchscript_exporter_options(export) -> dict:
+    """
+    Keyword arguments selecting the TorchScript exporter.
+
+    torch >= 2.5 has a dynamo flag (and newer releases default it to the dynamo
+    exporter, which needs onnxscript); older releases only have TorchScript and
+    reject the keyword.
+    """
+    try:
+        parameters = inspect.signature(export).parameters
+    except (TypeError, ValueError):
+        return {}
+    return {"dynamo": False} if "dynamo" in parameters else {}
+
+
+def is_onnx_export(export_dir: str) -> bool:
+    """True if export_dir holds a complete ONNX export (graph + tokenizer)."""
+    return (
+        os.path.exists(os.path.join(export_dir, ONNX_FILE_NAME))
+        and os.path.exists(os.path.join(export_dir, "tokenizer.json"))
+    )
+
+
+def export_onnx_model(model, tokenizer, export_dir: str) -> str:
+    """
+    Export a sequence-classification model to ONNX with dynamic batch and
+    sequence axes.
+
+    Args:
+        model: A transformers (or peft-wrapped) classification model
+        tokenizer: The matching tokenizer, saved next to the graph
+        export_dir: Directory to write model.onnx and the tokenizer into
+
+    Returns:
+        Path to the exported model.onnx
+    """
+    import torch
+
+    # Fold LoRA adapters in so the exported graph is a plain RoBERTa
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    model = model.to("cpu").eval()
+
+    class _LogitsOnly(torch.nn.Module):
+        def __init__(self, wrapped):
+            super().__init__()
+            self.wrapped = wrapped
+
+        def forward(self, input_ids, attention_mask):
+            return self.wrapped(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    os.makedirs(export_dir, exist_ok=True)
+    onnx_path = os.path.join(export_dir, ONNX_FILE_NAME)
+    dummy = tokenizer(["Example clinical text."], return_tensors="pt", padding=True)
+
+    print(f"📦 Exporting ONNX model to {onnx_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            # eval(): the exporter restores the wrapper's training flag on exit
+            _LogitsOnly(model).eval(),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            onnx_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"}
+            },
+            opset_version=ONNX_OPSET,
+            do_constant_folding=True,
+            **_torchscript_exporter_options(torch.onnx.export)
+        )
+    tokenizer.save_pretrained(export_dir)
+    return onnx_path
+
+
+class OnnxClassifier:
+    """Runs the exported classifier on onnxruntime's CPU execution provider."""
+
+    def __init__(self, export_dir: str, num_threads: int = ORT_NUM_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+
+        self.path = os.path.join(export_dir, ONNX_FILE_NAME)
+        self.session = ort.InferenceSession(
+            self.path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def run_logits(self, inputs) -> np.ndarray:
+        """
+        Args:
+            inputs: Tokenizer output with input_ids and attention_mask
+
+        Returns:
+            Logits array of shape (batch, num_labels)
+        """
+        feeds = {
+            name: np.asarray(inputs[name], dtype=np.int64)
+            for name in ("input_ids", "attention_mask")
+        }
+        return self.session.run(["logits"], feeds)[0]
@@ -1,13 +1,28 @@
 import torch
 import os
+import csv
+import sys
+import json
+import time
+import hashlib
+import threading
 import certifi
 
 # Ensure Python SSL and requests use certifi's CA bundle (fixes Windows cert issues)
 os.environ.setdefault("SSL_CERT_FILE", certifi.where())
 os.environ.setdefault("REQUESTS_CA_BUNDLE", certifi.where())
 
+# Offline mode: every file comes from local snapshots, never the Hugging Face hub.
+# Must be set before transformers/huggingface_hub are imported.
+MODEL_OFFLINE = os.environ.get("MODEL_OFFLINE", "0") == "1"
+if MODEL_OFFLINE:
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from peft import PeftModel
+
+from result_cache import classification_cache, make_key
+from request_metrics import stage
 
 # 1. SETUP PATHS
 # Adjust this path to where your trained model is saved in your deployment environment
@@ -15,38 +30,412 @@ SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DEFAULT_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "RoBERTa_Optimized")
 MODEL_PATH = os.environ.get("MODEL_PATH", DEFAULT_MODEL_PATH)
 
-# Verify the file exists before trying to load
-if not os.path.exists(os.path.join(MODEL_PATH, "adapter_config.json")):
-    print(f"⚠️ WARNING: 'adapter_config.json' not found in {MODEL_PATH}")
+# Local roberta-base snapshot (config.json + model.safetensors) used in offline mode
+DEFAULT_BASE_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "roberta-base")
+BASE_MODEL_PATH = os.environ.get("BASE_MODEL_PATH", DEFAULT_BASE_MODEL_PATH)
+BASE_MODEL = BASE_MODEL_PATH if MODEL_OFFLINE else "roberta-base"
+
+# Inference mode:
+#   adapter - roberta-base with the LoRA adapters attached through peft (default)
+#   merged  - adapters folded into the base weights and saved as a standalone
+#             checkpoint at MERGED_MODEL_PATH (built once, then loaded without peft)
+INFERENCE_MODE = os.environ.get("INFERENCE_MODE", "adapter").lower()
+DEFAULT_MERGED_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "RoBERTa_Optimized_merged")
+MERGED_MODEL_PATH = os.environ.get("MERGED_MODEL_PATH", DEFAULT_MERGED_MODEL_PATH)
+
+# Written next to a merged checkpoint or ONNX export: the adapter directory it
+# was built from and the sha256 of its files, so a retrained adapter triggers a rebuild
+SOURCE_RECORD_FILE = "source_adapter.json"
+ADAPTER_SOURCE_FILES = ("adapter_config.json", "adapter_model.safetensors", "adapter_model.bin")
+
+if INFERENCE_MODE not in ("adapter", "merged"):
+    raise ValueError(f"Unknown INFERENCE_MODE '{INFERENCE_MODE}'. Use 'adapter' or 'merged'.")
+
+# Inference backend:
+#   torch - PyTorch eager execution (default)
+#   onnx  - the classifier exported once to ONNX_MODEL_PATH and served by onnxruntime
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch").lower()
+DEFAULT_ONNX_MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "RoBERTa_Optimized_onnx")
+ONNX_MODEL_PATH = os.environ.get("ONNX_MODEL_PATH", DEFAULT_ONNX_MODEL_PATH)
+
+if INFERENCE_BACKEND not in ("torch", "onnx"):
+    raise ValueError(f"Unknown INFERENCE_BACKEND '{INFERENCE_BACKEND}'. Use 'torch' or 'onnx'.")
+
+# Numeric precision of the PyTorch backend:
+#   fp32 - full precision (default)
+#   int8 - dynamic int8 quantization of every Linear layer (CPU only)
+#   bf16 - bfloat16 autocast around the forward pass
+MODEL_PRECISION = os.environ.get("MODEL_PRECISION", "fp32").lower()
+
+if MODEL_PRECISION not in ("fp32", "int8", "bf16"):
+    raise ValueError(f"Unknown MODEL_PRECISION '{MODEL_PRECISION}'. Use 'fp32', 'int8' or 'bf16'.")
+if MODEL_PRECISION != "fp32" and INFERENCE_BACKEND != "torch":
+    raise ValueError("MODEL_PRECISION only applies to INFERENCE_BACKEND=torch.")
+
+# Multi-adapter serving: several named LoRA adapters attached to one shared
+# base model, chosen per request and loaded/unloaded at runtime.
+# The adapter from MODEL_PATH is always available as DEFAULT_ADAPTER.
+MULTI_ADAPTER = os.environ.get("MULTI_ADAPTER", "0") == "1"
+ADAPTERS_DIR = os.environ.get("ADAPTERS_DIR", MODEL_PATH)
+PRELOAD_ADAPTERS = [name.strip() for name in os.environ.get("PRELOAD_ADAPTERS", "").split(",") if name.strip()]
+DEFAULT_ADAPTER = "default"
+
+if MULTI_ADAPTER and (INFERENCE_BACKEND != "torch" or INFERENCE_MODE != "adapter" or MODEL_PRECISION == "int8"):
+    raise ValueError("MULTI_ADAPTER=1 requires INFERENCE_BACKEND=torch, INFERENCE_MODE=adapter and MODEL_PRECISION fp32 or bf16.")
+
+DATASET_PATH = os.path.join(SCRIPT_DIR, "data", "abim_bias_balanced_3Bias.csv")
+
+device = "cuda" if torch.cuda.is_available() else "cpu"
+
+def resolve_adapter_path(path: str) -> str:
+    """Return the directory holding adapter_config.json (falling back to the latest checkpoint)."""
+    # Verify the file exists before trying to load
+    if os.path.exists(os.path.join(path, "adapter_config.json")):
+        return path
+
+    print(f"⚠️ WARNING: 'adapter_config.json' not found in {path}")
     print("Checking for sub-folders (checkpoints)...")
-    subfolders = [f.path for f in os.scandir(MODEL_PATH) if f.is_dir()]
+    subfolders = [f.path for f in os.scandir(path) if f.is_dir()]
     if subfolders:
         print(f"Found checkpoints: {subfolders}")
-        MODEL_PATH = subfolders[-1] # Pick the latest checkpoint
-        print(f"➡️ Switching path to: {MODEL_PATH}")
-    else:
-        raise FileNotFoundError(f"Could not find adapter_config.json. Ensure the model is correctly saved at {MODEL_PATH} or its subfolder.")
+        path = subfolders[-1] # Pick the latest checkpoint
+        print(f"➡️ Switching path to: {path}")
+        return path
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+    raise FileNotFoundError(f"Could not find adapter_config.json. Ensure the model is correctly saved at {path} or its subfolder.")
+
+def tokenizer_source(adapter_path: str) -> str:
+    """Offline mode uses the tokenizer saved with the adapters; otherwise roberta-base."""
+    return adapter_path if MODEL_OFFLINE else "roberta-base"
+
+def verify_offline_snapshot(adapter_path: str):
+    """
+    Fail fast (before any weights are read) if offline mode is missing a file.
+
+    Requires the base weights as safetensors, the saved tokenizer.json and
+    the adapter config + weights.
+    """
+    required = [
+        os.path.join(BASE_MODEL_PATH, "config.json"),
+        os.path.join(BASE_MODEL_PATH, "model.safetensors"),
+        os.path.join(adapter_path, "adapter_config.json"),
+        os.path.join(tokenizer_source(adapter_path), "tokenizer.json")
+    ]
+    missing = [path for path in required if not os.path.exists(path)]
+
+    adapter_weights = ("adapter_model.safetensors", "adapter_model.bin")
+    if not any(os.path.exists(os.path.join(adapter_path, name)) for name in adapter_weights):
+        missing.append(os.path.join(adapter_path, "adapter_model.safetensors"))
+
+    if missing:
+        raise FileNotFoundError(
+            "MODEL_OFFLINE=1 but the local snapshot is incomplete. Missing: "
+            + ", ".join(missing)
+            + ". Create the base snapshot with: python src/predict.py --snapshot-base"
+        )
+
+def snapshot_base_model(output_path: str = BASE_MODEL_PATH) -> str:
+    """Download roberta-base (safetensors weights + tokenizer) into a local snapshot directory."""
+    from huggingface_hub import snapshot_download
+
+    print(f"📥 Downloading roberta-base snapshot to {output_path}...")
+    return snapshot_download(
+        "roberta-base",
+        local_dir=output_path,
+        allow_patterns=["config.json", "model.safetensors", "tokenizer.json", "vocab.json", "merges.txt"]
+    )
+
+def load_adapter_model(adapter_path: str):
+    """Load roberta-base and attach the trained LoRA adapters (the only code path that needs peft)."""
+    try:
+        from peft import PeftModel
+    except ImportError as e:
+        raise ImportError(
+            "peft is required to load LoRA adapters (INFERENCE_MODE=adapter, or to build the merged checkpoint). "
+            "Install it with: pip install peft"
+        ) from e
+
+    if MODEL_OFFLINE:
+        verify_offline_snapshot(adapter_path)
+
+    # 2. LOAD THE BASE MODEL (The "Brain")
+    print("⏳ Loading Base RoBERTa Model...")
+    # The num_labels MUST match the number of unique labels in your training data
+    # Based on the notebook, there are 4 unique labels: 'assessment_bias', 'clinical_stigma_bias', 'demographic_bias', 'no_bias'
+    base_model = AutoModelForSequenceClassification.from_pretrained(
+        BASE_MODEL,
+        num_labels=4,
+        return_dict=True,
+        local_files_only=MODEL_OFFLINE,
+        use_safetensors=True if MODEL_OFFLINE else None
+    )
+
+    # 3. LOAD YOUR TRAINED ADAPTERS (The "New Knowledge")
+    print(f"🔗 Attaching LoRA Adapters from {adapter_path}...")
+    return PeftModel.from_pretrained(base_model, adapter_path)
+
+def is_merged_checkpoint(path: str) -> bool:
+    """True if path holds a standalone (merged) model with its tokenizer."""
+    return (
+        os.path.exists(os.path.join(path, "config.json"))
+        and os.path.exists(os.path.join(path, "tokenizer.json"))
+    )
+
+def source_adapter_path():
+    """The adapter directory under MODEL_PATH, or None if there is none to build from."""
+    try:
+        return resolve_adapter_path(MODEL_PATH)
+    except OSError:
+        return None
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def adapter_fingerprint(adapter_path: str) -> dict:
+    """Absolute adapter directory plus the sha256 of each adapter file in it."""
+    return {
+        "adapter_path": os.path.abspath(adapter_path),
+        "sha256": {
+            name: _sha256(os.path.join(adapter_path, name))
+            for name in ADAPTER_SOURCE_FILES
+            if os.path.exists(os.path.join(adapter_path, name))
+        }
+    }
+
+def write_source_record(output_path: str, adapter_path: str):
+    """Record which adapter the build in output_path came from."""
+    with open(os.path.join(output_path, SOURCE_RECORD_FILE), "w", encoding="utf-8") as f:
+        json.dump(adapter_fingerprint(adapter_path), f, indent=2)
+
+def stale_build_reason(output_path: str, adapter_path: str) -> str:
+    """
+    Why the build in output_path (merged checkpoint or ONNX export) no longer
+    matches adapter_path, or "" if it is up to date.
+    """
+    record_path = os.path.join(output_path, SOURCE_RECORD_FILE)
+    try:
+        with open(record_path, encoding="utf-8") as f:
+            recorded = json.load(f)
+    except FileNotFoundError:
+        return f"no {SOURCE_RECORD_FILE}"
+    except (OSError, ValueError):
+        return f"unreadable {SOURCE_RECORD_FILE}"
+
+    current = adapter_fingerprint(adapter_path)
+    if recorded.get("adapter_path") != current["adapter_path"]:
+        return f"built from {recorded.get('adapter_path')}"
+    if recorded.get("sha256") != current["sha256"]:
+        return "adapter files changed"
+    built_at = os.path.getmtime(record_path)
+    if any(os.path.getmtime(os.path.join(adapter_path, name)) > built_at for name in current["sha256"]):
+        return "adapter files are newer than the build"
+    return ""
+
+def build_merged_checkpoint(adapter_path: str = None, output_path: str = MERGED_MODEL_PATH):
+    """
+    Folds the LoRA adapters into the base weights and saves the result as a
+    standalone checkpoint (model + tokenizer) that loads without peft.
+
+    Args:
+        adapter_path: Directory with the trained adapters (default: MODEL_PATH)
+        output_path: Where to write the merged checkpoint
+
+    Returns:
+        The merged model
+    """
+    adapter_path = resolve_adapter_path(adapter_path or MODEL_PATH)
+    merged_model = load_adapter_model(adapter_path).merge_and_unload()
+
+    print(f"💾 Saving merged model to {output_path}...")
+    os.makedirs(output_path, exist_ok=True)
+    merged_model.save_pretrained(output_path, safe_serialization=True)
+    AutoTokenizer.from_pretrained(tokenizer_source(adapter_path)).save_pretrained(output_path)
+    write_source_record(output_path, adapter_path)
+    return merged_model
+
+def load_torch_model():
+    """
+    Load the PyTorch model for the configured INFERENCE_MODE.
+
+    Returns:
+        Tuple of (model, tokenizer, model_source)
+    """
+    if INFERENCE_MODE == "merged":
+        adapter_path = source_adapter_path()
+        if not is_merged_checkpoint(MERGED_MODEL_PATH):
+            print(f"⚠️ No merged checkpoint at {MERGED_MODEL_PATH}, building it once...")
+            torch_model = build_merged_checkpoint(adapter_path)
+        else:
+            reason = stale_build_reason(MERGED_MODEL_PATH, adapter_path) if adapter_path else ""
+            if reason:
+                print(f"⚠️ Merged checkpoint at {MERGED_MODEL_PATH} is stale ({reason}), rebuilding...")
+                torch_model = build_merged_checkpoint(adapter_path)
+            else:
+                if adapter_path is None:
+                    print(f"⚠️ No adapters at {MODEL_PATH} to check the merged checkpoint against, using it as is")
+                print(f"⏳ Loading merged RoBERTa model from {MERGED_MODEL_PATH}...")
+                torch_model = AutoModelForSequenceClassification.from_pretrained(MERGED_MODEL_PATH)
+        return torch_model, AutoTokenizer.from_pretrained(MERGED_MODEL_PATH), MERGED_MODEL_PATH
+
+    adapter_path = resolve_adapter_path(MODEL_PATH)
+    torch_model = load_adapter_model(adapter_path)
+    return torch_model, AutoTokenizer.from_pretrained(tokenizer_source(adapter_path)), adapter_path
+
+def apply_precision(torch_model, precision: str):
+    """
+    Prepare a loaded PyTorch model for the given precision.
+
+    int8 folds any LoRA adapters in first, so the quantized Linear layers
+    carry the fine-tuned weights. bf16 is applied at forward time (autocast),
+    so the model is returned unchanged.
+    """
+    if precision != "int8":
+        return torch_model
+
+    if device != "cpu":
+        raise ValueError("MODEL_PRECISION=int8 (dynamic quantization) is only supported on CPU.")
+    if hasattr(torch_model, "merge_and_unload"):
+        torch_model = torch_model.merge_and_unload()
+
+    print("🗜️ Applying dynamic int8 quantization to Linear layers...")
+    return torch.quantization.quantize_dynamic(torch_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+# 4. LOAD MODEL AND TOKENIZER
+# Populated by load_model(); app.py runs it in a background thread so the
+# server can start listening before the weights are in memory.
+model = None
+tokenizer = None
+MODEL_SOURCE = None
+
+# Load state: not_loaded -> loading -> ready | error
+MODEL_STATUS = "not_loaded"
+MODEL_ERROR = None
+MODEL_LOAD_SECONDS = None
+_ready = threading.Event()
+_load_lock = threading.Lock()
+
+# Adapter name -> directory, for every adapter attached to the base model
+adapter_paths = {}
+# Held while the active adapter is switched and used, or adapters are added/removed
+_adapter_lock = threading.RLock()
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a prediction is requested before the model has loaded."""
+
+class AdapterError(ValueError):
+    """Raised for unknown adapters or adapter operations that are not allowed."""
+
+def load_model(warmup: bool = True):
+    """
+    Load the classifier and tokenizer for the configured backend/mode/precision.
+
+    Safe to call more than once (later calls return immediately once loaded).
+
+    Args:
+        warmup: Run one forward pass before marking the model ready
+    """
+    global model, tokenizer, MODEL_SOURCE, device, MODEL_STATUS, MODEL_ERROR, MODEL_LOAD_SECONDS
 
-# 2. LOAD THE BASE MODEL (The "Brain")
-print("⏳ Loading Base RoBERTa Model...")
-# The num_labels MUST match the number of unique labels in your training data
-# Based on the notebook, there are 4 unique labels: 'assessment_bias', 'clinical_stigma_bias', 'demographic_bias', 'no_bias'
-base_model = AutoModelForSequenceClassification.from_pretrained(
-    "roberta-base",
-    num_labels=4,
-    return_dict=True
-)
-
-# 3. LOAD YOUR TRAINED ADAPTERS (The "New Knowledge")
-print(f"🔗 Attaching LoRA Adapters from {MODEL_PATH}...")
-model = PeftModel.from_pretrained(base_model, MODEL_PATH)
-model.to(device)
-model.eval() # Set to evaluation mode
-
-# 4. LOAD TOKENIZER
-tokenizer = AutoTokenizer.from_pretrained("roberta-base")
+    with _load_lock:
+        if MODEL_STATUS == "ready":
+            return
+
+        MODEL_STATUS = "loading"
+        MODEL_ERROR = None
+        start_time = time.time()
+
+        try:
+            if INFERENCE_BACKEND == "onnx":
+                from onnx_backend import OnnxClassifier, export_onnx_model, is_onnx_export
+
+                adapter_path = source_adapter_path()
+                export_reason = ""
+                if not is_onnx_export(ONNX_MODEL_PATH):
+                    export_reason = "missing"
+                    print(f"⚠️ No ONNX export at {ONNX_MODEL_PATH}, exporting it once...")
+                elif adapter_path is None:
+                    print(f"⚠️ No adapters at {MODEL_PATH} to check the ONNX export against, using it as is")
+                else:
+                    export_reason = stale_build_reason(ONNX_MODEL_PATH, adapter_path)
+                    if export_reason:
+                        print(f"⚠️ ONNX export at {ONNX_MODEL_PATH} is stale ({export_reason}), re-exporting...")
+
+                if export_reason:
+                    torch_model, torch_tokenizer, _ = load_torch_model()
+                    export_onnx_model(torch_model, torch_tokenizer, ONNX_MODEL_PATH)
+                    if adapter_path:
+                        write_source_record(ONNX_MODEL_PATH, adapter_path)
+                    del torch_model, torch_tokenizer
+
+                print(f"⚡ Loading ONNX Runtime session from {ONNX_MODEL_PATH}...")
+                device = "cpu"
+                loaded_model = OnnxClassifier(ONNX_MODEL_PATH)
+                loaded_tokenizer = AutoTokenizer.from_pretrained(ONNX_MODEL_PATH)
+                source = ONNX_MODEL_PATH
+            else:
+                loaded_model, loaded_tokenizer, source = load_torch_model()
+                loaded_model.to(device)
+                loaded_model.eval() # Set to evaluation mode
+                loaded_model = apply_precision(loaded_model, MODEL_PRECISION)
+
+            model, tokenizer, MODEL_SOURCE = loaded_model, loaded_tokenizer, source
+            adapter_paths[DEFAULT_ADAPTER] = source
+
+            if MULTI_ADAPTER:
+                for name in PRELOAD_ADAPTERS:
+                    load_adapter(name)
+
+            if warmup:
+                print("🔥 Running warm-up forward pass...")
+                _classify_encoded(tokenizer(["Warm-up clinical note."], return_tensors="pt"))
+
+        except Exception as e:
+            MODEL_STATUS = "error"
+            MODEL_ERROR = str(e)
+            print(f"❌ Model failed to load: {e}")
+            raise
+
+        MODEL_LOAD_SECONDS = round(time.time() - start_time, 2)
+        MODEL_STATUS = "ready"
+        _ready.set()
+        print(f"✅ Model ready in {MODEL_LOAD_SECONDS}s")
+
+def start_background_loading():
+    """Start load_model() in a daemon thread (no-op if already started)."""
+    global MODEL_STATUS
+
+    with _load_lock:
+        if MODEL_STATUS in ("loading", "ready"):
+            return
+        MODEL_STATUS = "loading"
+
+    def _load():
+        try:
+            load_model()
+        except Exception:
+            pass # Recorded in MODEL_STATUS / MODEL_ERROR for /health
+
+    threading.Thread(target=_load, name="model-loader", daemon=True).start()
+
+def is_ready() -> bool:
+    """True once the model and tokenizer are loaded and warmed up."""
+    return _ready.is_set()
+
+def wait_until_ready(timeout: float = None) -> bool:
+    """Block until the model is ready (or timeout seconds pass). Returns is_ready()."""
+    return _ready.wait(timeout)
+
+def get_load_status() -> dict:
+    """Return the model load state for /health."""
+    return {
+        "status": MODEL_STATUS,
+        "error": MODEL_ERROR,
+        "load_seconds": MODEL_LOAD_SECONDS
+    }
 
 # 5. DEFINE ID2LABEL MAPPING (MUST match training)
 id2label = {
@@ -56,22 +445,499 @@ id2label = {
     3: 'no_bias'
 }
 
-def predict_bias(text: str):
+# Tokens kept per text (longer inputs are truncated)
+MAX_LENGTH = 128
+
+# Sliding-window long-document mode (train_model.py trained with MAX_LENGTH = 256)
+LONG_DOC_WINDOW = int(os.environ.get("LONG_DOC_WINDOW", "256"))
+LONG_DOC_STRIDE = int(os.environ.get("LONG_DOC_STRIDE", "64"))
+
+# Texts per forward pass on the /predict-batch path
+BATCH_CHUNK_SIZE = int(os.environ.get("PREDICT_BATCH_SIZE", "32"))
+
+def _resolve_adapter_dir(name: str, path: str = None) -> str:
+    """Adapter directory for name (or path), which must stay inside ADAPTERS_DIR."""
+    root = os.path.realpath(ADAPTERS_DIR)
+    adapter_dir = os.path.realpath(os.path.join(root, path or name))
+    if os.path.commonpath([root, adapter_dir]) != root:
+        raise AdapterError(f"Adapter path must be inside {ADAPTERS_DIR}")
+    if not os.path.exists(os.path.join(adapter_dir, "adapter_config.json")):
+        raise AdapterError(f"No adapter_config.json in {adapter_dir}")
+    return adapter_dir
+
+def _require_multi_adapter():
+    if not MULTI_ADAPTER:
+        raise AdapterError("Multi-adapter serving is disabled (set MULTI_ADAPTER=1)")
+
+def load_adapter(name: str, path: str = None) -> dict:
+    """
+    Attach another LoRA adapter to the shared base model.
+
+    Args:
+        name: Name requests use to select the adapter
+        path: Directory relative to ADAPTERS_DIR (default: name, e.g. "checkpoint-642")
+
+    Returns:
+        Description of the loaded adapter
+    """
+    _require_multi_adapter()
+    _require_model()
+
+    with _adapter_lock:
+        if name in adapter_paths:
+            raise AdapterError(f"Adapter '{name}' is already loaded")
+        adapter_dir = _resolve_adapter_dir(name, path)
+
+        print(f"🔗 Loading LoRA adapter '{name}' from {adapter_dir}...")
+        model.load_adapter(adapter_dir, adapter_name=name)
+        model.set_adapter(DEFAULT_ADAPTER)
+        adapter_paths[name] = adapter_dir
+
+    return {"name": name, "path": adapter_dir}
+
+def unload_adapter(name: str):
+    """Detach a runtime-loaded adapter and free its weights."""
+    _require_multi_adapter()
+    _require_model()
+
+    with _adapter_lock:
+        if name == DEFAULT_ADAPTER:
+            raise AdapterError("The default adapter cannot be unloaded")
+        if name not in adapter_paths:
+            raise AdapterError(f"Unknown adapter '{name}'")
+
+        print(f"🗑️ Unloading LoRA adapter '{name}'...")
+        model.set_adapter(DEFAULT_ADAPTER)
+        model.delete_adapter(name)
+        del adapter_paths[name]
+
+def list_adapters() -> list:
+    """Return the loaded adapters (name, path, whether it is the default)."""
+    return [
+        {"name": name, "path": path, "default": name == DEFAULT_ADAPTER}
+        for name, path in adapter_paths.items()
+    ]
+
+def resolve_adapter_name(adapter: str = None) -> str:
+    """Validate a requested adapter name (None selects the default adapter)."""
+    if adapter is None or adapter == DEFAULT_ADAPTER:
+        return DEFAULT_ADAPTER
+    _require_multi_adapter()
+    if adapter not in adapter_paths:
+        raise AdapterError(f"Unknown adapter '{adapter}'. Loaded: {', '.join(adapter_paths)}")
+    return adapter
+
+def get_inference_info() -> dict:
+    """Return how the RoBERTa classifier is being served."""
+    return {
+        "inference_backend": INFERENCE_BACKEND,
+        "inference_mode": INFERENCE_MODE,
+        "precision": MODEL_PRECISION,
+        "model_source": MODEL_SOURCE,
+        "offline": MODEL_OFFLINE,
+        "multi_adapter": MULTI_ADAPTER,
+        "adapters": list(adapter_paths),
+        "device": device,
+        "max_length": MAX_LENGTH
+    }
+
+def _require_model():
+    if model is None or tokenizer is None:
+        raise ModelNotReadyError(f"Model is not loaded yet (status: {MODEL_STATUS})")
+
+def _probs_encoded(inputs, classifier=None, precision=None, adapter=None):
+    """
+    Runs a forward pass over already-tokenized (padded) inputs.
+
+    Args:
+        inputs: Tokenizer output (padded PyTorch tensors)
+        classifier: Model to run (default: the serving model)
+        precision: Precision of that model (default: MODEL_PRECISION)
+        adapter: LoRA adapter to activate (multi-adapter serving only)
+
+    Returns:
+        Tensor of class probabilities, shape (batch, num_labels)
+    """
+    _require_model()
+
+    classifier = model if classifier is None else classifier
+    precision = precision or MODEL_PRECISION
+
+    def forward():
+        with torch.no_grad(), torch.autocast(
+            device_type=device, dtype=torch.bfloat16, enabled=(precision == "bf16")
+        ):
+            return classifier(**{name: tensor.to(device) for name, tensor in inputs.items()}).logits.float()
+
+    with stage("forward"):
+        if INFERENCE_BACKEND == "onnx" and classifier is model:
+            logits = torch.from_numpy(classifier.run_logits(inputs))
+        elif MULTI_ADAPTER and classifier is model:
+            with _adapter_lock:
+                model.set_adapter(resolve_adapter_name(adapter))
+                logits = forward()
+        else:
+            logits = forward()
+
+    with stage("softmax"):
+        return torch.nn.functional.softmax(logits, dim=-1)
+
+def _classify_encoded(inputs, classifier=None, precision=None, adapter=None):
+    """
+    Runs a forward pass over already-tokenized (padded) inputs.
+
+    Returns:
+        List of (predicted_label, confidence) tuples, one per row
+    """
+    probs = _probs_encoded(inputs, classifier, precision, adapter)
+    confidences, pred_ids = torch.max(probs, dim=-1)
+
+    return [
+        (id2label[pred_id], confidence)
+        for pred_id, confidence in zip(pred_ids.tolist(), confidences.tolist())
+    ]
+
+def embed_texts(texts, batch_size: int = BATCH_CHUNK_SIZE):
+    """
+    Sentence embeddings from the fine-tuned RoBERTa encoder: the last hidden
+    state, mean-pooled over real tokens and L2-normalized (dot product =
+    cosine similarity). Uses the default adapter.
+
+    Returns:
+        float32 numpy array, shape (len(texts), hidden_size)
+    """
+    _require_model()
+    if INFERENCE_BACKEND == "onnx":
+        raise ValueError("Embeddings need the PyTorch backend (INFERENCE_BACKEND=torch)")
+
+    batch_size = max(1, int(batch_size))
+    chunks = []
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            list(texts[start:start + batch_size]),
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=MAX_LENGTH
+        ).to(device)
+
+        def forward():
+            with torch.no_grad(), torch.autocast(
+                device_type=device, dtype=torch.bfloat16, enabled=(MODEL_PRECISION == "bf16")
+            ):
+                return model(**inputs, output_hidden_states=True).hidden_states[-1].float()
+
+        if MULTI_ADAPTER:
+            with _adapter_lock:
+                model.set_adapter(DEFAULT_ADAPTER)
+                hidden = forward()
+        else:
+            hidden = forward()
+
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        chunks.append(torch.nn.functional.normalize(pooled, dim=-1).cpu())
+
+    if not chunks:
+        return torch.empty(0, model.config.hidden_size).numpy()
+    return torch.cat(chunks).numpy()
+
+def _cache_key(text: str, adapter: str = None) -> str:
+    """Result-cache key: normalized text plus everything that identifies the serving model."""
+    adapter = adapter or DEFAULT_ADAPTER
+    return make_key(
+        text, INFERENCE_BACKEND, INFERENCE_MODE, MODEL_PRECISION, MODEL_SOURCE, MAX_LENGTH,
+        adapter, adapter_paths.get(adapter)
+    )
+
+def get_cached_prediction(text: str, adapter: str = None):
+    """Return the cached (predicted_label, confidence) for text, or None."""
+    found, result = classification_cache.get(_cache_key(text, adapter))
+    return result if found else None
+
+def _predict_cached(texts, compute, lookup: bool = True, adapter: str = None):
+    """Serve cached results and run compute() only on the misses, in input order."""
+    keys = [_cache_key(text, adapter) for text in texts]
+    results = [None] * len(texts)
+    missing = []
+
+    for i, key in enumerate(keys):
+        found, result = classification_cache.get(key) if lookup else (False, None)
+        if found:
+            results[i] = result
+        else:
+            missing.append(i)
+
+    if missing:
+        for i, result in zip(missing, compute([texts[i] for i in missing])):
+            results[i] = result
+            classification_cache.put(keys[i], result)
+
+    return results
+
+def predict_bias(text: str, adapter: str = None, lookup: bool = True):
     """
     Predicts the bias label for a given input text.
+    lookup=False skips the result cache lookup (the result is still stored).
+    """
+    _require_model()
+    adapter = resolve_adapter_name(adapter)
+
+    cached = get_cached_prediction(text, adapter) if lookup else None
+    if cached is not None:
+        return cached
+
+    with stage("tokenize"):
+        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=MAX_LENGTH)
+    result = _classify_encoded(inputs, adapter=adapter)[0]
+    classification_cache.put(_cache_key(text, adapter), result)
+    return result
+
+def predict_bias_many(texts, lookup: bool = True, adapter: str = None):
+    """
+    Predicts bias labels for several texts in a single padded forward pass.
+
+    Args:
+        texts: List of input strings
+        lookup: Check the result cache first (results are always stored);
+                callers that already checked it pass False
+        adapter: LoRA adapter to use (default: the MODEL_PATH adapter)
+
+    Returns:
+        List of (predicted_label, confidence) tuples in input order
     """
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=128).to(device)
+    if not texts:
+        return []
+    _require_model()
+
+    adapter = resolve_adapter_name(adapter)
+
+    return _predict_cached(
+        list(texts), lambda missing: _predict_many(missing, adapter), lookup=lookup, adapter=adapter
+    )
+
+def _predict_many(texts, adapter: str = None):
+    with stage("tokenize"):
+        inputs = tokenizer(
+            texts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=MAX_LENGTH
+        )
+    return _classify_encoded(inputs, adapter=adapter)
+
+def predict_bias_batch(texts, chunk_size: int = BATCH_CHUNK_SIZE, adapter: str = None, lookup: bool = True):
+    """
+    Predicts bias labels for a large list of texts.
+
+    The whole list is tokenized in one fast-tokenizer call, then sorted by
+    token length so each chunk is only padded to its own longest member.
+    Chunks run as separate forward passes and results are put back in
+    request order. Cached texts skip tokenization and the forward pass.
+
+    Args:
+        texts: List of input strings
+        chunk_size: Maximum number of texts per forward pass
+        adapter: LoRA adapter to use (default: the MODEL_PATH adapter)
+        lookup: Check the result cache first (results are always stored)
+
+    Returns:
+        List of (predicted_label, confidence) tuples in input order
+    """
+    if not texts:
+        return []
+    _require_model()
+    adapter = resolve_adapter_name(adapter)
+
+    return _predict_cached(
+        list(texts), lambda missing: _predict_batch(missing, chunk_size, adapter), lookup=lookup, adapter=adapter
+    )
+
+def _predict_batch(texts, chunk_size: int, adapter: str = None):
+    with stage("tokenize"):
+        encodings = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+    input_ids = encodings["input_ids"]
+    attention_mask = encodings["attention_mask"]
+
+    # Length buckets: neighbours in this order have similar token counts
+    order = sorted(range(len(input_ids)), key=lambda i: len(input_ids[i]))
+    chunk_size = max(1, int(chunk_size))
+
+    results = [None] * len(input_ids)
+    for start in range(0, len(order), chunk_size):
+        bucket = order[start:start + chunk_size]
+        with stage("tokenize"):
+            inputs = tokenizer.pad(
+                [{"input_ids": input_ids[i], "attention_mask": attention_mask[i]} for i in bucket],
+                return_tensors="pt"
+            )
+        for i, result in zip(bucket, _classify_encoded(inputs, adapter=adapter)):
+            results[i] = result
+
+    return results
+
+def predict_bias_long(text: str, aggregate: str = "max", window: int = LONG_DOC_WINDOW, stride: int = LONG_DOC_STRIDE, adapter: str = None) -> dict:
+    """
+    Classifies a long document with overlapping token windows.
+
+    The fast tokenizer splits the text into windows of `window` tokens that
+    overlap by `stride` tokens; all windows are classified in batched
+    forward passes and combined into one document label.
+
+    Aggregation:
+        max      - max-risk: the most confident biased window decides the label;
+                   if no window is biased the document is no_bias with the
+                   lowest window confidence
+        weighted - window probabilities averaged, weighted by token count
+
+    Args:
+        text: The clinical text to classify
+        aggregate: "max" or "weighted"
+        window: Tokens per window (including special tokens)
+        stride: Tokens shared by consecutive windows
+        adapter: LoRA adapter to use (default: the MODEL_PATH adapter)
+
+    Returns:
+        Dictionary with predicted_label, confidence, aggregation, num_windows
+        and per-window scores (character span, label, confidence, class probabilities)
+    """
+    if aggregate not in ("max", "weighted"):
+        raise ValueError(f"Unknown aggregation '{aggregate}'. Use 'max' or 'weighted'.")
+    _require_model()
+    adapter = resolve_adapter_name(adapter)
+
+    with stage("tokenize"):
+        inputs = tokenizer(
+            text,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=window,
+            stride=stride,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True
+        )
+    offsets = inputs.pop("offset_mapping").tolist()
+    inputs.pop("overflow_to_sample_mapping", None)
+    token_counts = inputs["attention_mask"].sum(dim=-1)
+
+    probs = torch.cat([
+        _probs_encoded(
+            {name: tensor[start:start + BATCH_CHUNK_SIZE] for name, tensor in inputs.items()},
+            adapter=adapter
+        )
+        for start in range(0, len(token_counts), BATCH_CHUNK_SIZE)
+    ])
+    confidences, pred_ids = torch.max(probs, dim=-1)
+
+    windows = []
+    for i, (row_offsets, row_probs) in enumerate(zip(offsets, probs.tolist())):
+        spans = [(start, end) for start, end in row_offsets if end > start]
+        windows.append({
+            "index": i,
+            "start_char": spans[0][0] if spans else 0,
+            "end_char": spans[-1][1] if spans else 0,
+            "predicted_label": id2label[pred_ids[i].item()],
+            "confidence": confidences[i].item(),
+            "scores": {id2label[j]: p for j, p in enumerate(row_probs)}
+        })
+
+    if aggregate == "weighted":
+        weights = (token_counts.float() / token_counts.sum()).unsqueeze(-1)
+        doc_confidence, doc_pred = torch.max((probs * weights).sum(dim=0), dim=-1)
+        predicted_label, confidence = id2label[doc_pred.item()], doc_confidence.item()
+    else:
+        biased = [w for w in windows if w["predicted_label"] != "no_bias"]
+        if biased:
+            riskiest = max(biased, key=lambda w: w["confidence"])
+            predicted_label, confidence = riskiest["predicted_label"], riskiest["confidence"]
+        else:
+            predicted_label, confidence = "no_bias", min(w["confidence"] for w in windows)
+
+    return {
+        "predicted_label": predicted_label,
+        "confidence": confidence,
+        "aggregation": aggregate,
+        "num_windows": len(windows),
+        "windows": windows
+    }
+
+def compare_precision(csv_path: str = DATASET_PATH, limit: int = None, batch_size: int = BATCH_CHUNK_SIZE) -> dict:
+    """
+    Measures how often the serving model agrees with a full-precision
+    reference on the labeled dataset.
+
+    A separate fp32 copy of the model is loaded for the comparison, so run
+    this offline (see --check-precision below), not inside the API server.
+
+    Args:
+        csv_path: CSV with text_clean and bias_label columns
+        limit: Only use the first N rows
+        batch_size: Texts per forward pass
+
+    Returns:
+        Dictionary with overall/per-label agreement and accuracy of both models
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("text_clean")]
+    if limit:
+        rows = rows[:limit]
+
+    print(f"⏳ Loading fp32 reference model for {len(rows)} rows...")
+    reference, _, _ = load_torch_model()
+    reference.to(device)
+    reference.eval()
+
+    agree = 0
+    correct = {"serving": 0, "fp32": 0}
+    per_label = {}
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        inputs = tokenizer(
+            [row["text_clean"] for row in chunk],
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=MAX_LENGTH
+        )
+        serving_results = _classify_encoded(inputs)
+        reference_results = _classify_encoded(inputs, classifier=reference, precision="fp32")
+
+        for row, (served, _), (expected, _) in zip(chunk, serving_results, reference_results):
+            label_stats = per_label.setdefault(row["bias_label"], {"total": 0, "agree": 0})
+            label_stats["total"] += 1
+            if served == expected:
+                agree += 1
+                label_stats["agree"] += 1
+            correct["serving"] += served == row["bias_label"]
+            correct["fp32"] += expected == row["bias_label"]
+
+    total = len(rows) or 1
+    return {
+        "precision": MODEL_PRECISION,
+        "rows": len(rows),
+        "agreement": round(agree / total, 4),
+        "agreement_by_label": {
+            label: round(stats["agree"] / stats["total"], 4) for label, stats in sorted(per_label.items())
+        },
+        "accuracy": {name: round(count / total, 4) for name, count in correct.items()}
+    }
 
-    with torch.no_grad():
-        logits = model(**inputs).logits
+if __name__ == "__main__" and "--snapshot-base" in sys.argv:
+    # python src/predict.py --snapshot-base   (run once with network access)
+    snapshot_base_model()
 
-    probs = torch.nn.functional.softmax(logits, dim=-1)
-    confidence, pred_id = torch.max(probs, dim=-1)
+elif __name__ == "__main__" and "--check-precision" in sys.argv:
+    # MODEL_PRECISION=int8 python src/predict.py --check-precision [limit]
+    args = sys.argv[sys.argv.index("--check-precision") + 1:]
+    load_model(warmup=False)
+    report = compare_precision(limit=int(args[0]) if args else None)
+    print(json.dumps(report, indent=2))
 
-    predicted_label = id2label[pred_id.item()]
-    return predicted_label, confidence.item()
+elif __name__ == "__main__":
+    load_model()
 
-if __name__ == "__main__":
     # Example usage from the notebook's test cases
     test_cases = [
         # DEMOGRAPHIC
@@ -0,0 +1,273 @@
+"""
+Per-Stage Request Timing and Prometheus Metrics
+
+Every API request gets a timer; the code on the request path reports how
+long each stage took:
+
+    parse              - JSON request body parsing
+    tokenize           - RoBERTa tokenization
+    forward            - RoBERTa forward pass
+    softmax            - Probabilities from the logits
+    batch_wait         - Time queued in the micro-batcher before the batch ran
+    audit_score        - Audit score / compliance rating computation
+    example_selection  - Retrieving few-shot examples (retrieval mode)
+    llm_queue          - Waiting before an OpenAI attempt: retry backoff, the
+                         few-shot batch concurrency limit, the explanation job queue
+    llm_network        - OpenAI attempts (HTTP round trips, including hedges)
+    serialize          - JSON response serialization
+
+Stage times come back in a Server-Timing header (milliseconds) and feed
+Prometheus-style histograms on GET /metrics, together with request, error and
+in-flight counters and the result/LLM cache hit counters. For batch endpoints
+the LLM stages are summed over the concurrent calls, so they can exceed the
+request's total time.
+
+Work that runs on another thread for a request (the micro-batcher) captures
+its stages with capture() and merges them into the request's timer. Metrics
+are kept per process; with several Gunicorn workers each scrape sees the
+worker that answered it.
+
+Configuration (environment variables):
+    REQUEST_METRICS_ENABLED - "0" disables timing, /metrics data and headers (default: "1")
+    SERVER_TIMING_ENABLED   - "0" omits the Server-Timing header (default: "1")
+
+Usage:
+    from request_metrics import stage
+
+    with stage("tokenize"):
+        inputs = tokenizer(text, return_tensors="pt")
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("REQUEST_METRICS_ENABLED", "1") != "0"
+SERVER_TIMING = os.environ.get("SERVER_TIMING_ENABLED", "1") != "0"
+
+# Histogram bucket upper bounds (seconds)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_local = threading.local()
+
+
+class RequestTimer:
+    """Accumulated seconds per stage for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.status = None  # Response status, set once the response is built
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def merge(self, other: "RequestTimer"):
+        for name, seconds in other.stages.items():
+            self.add(name, seconds)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def milliseconds(self) -> dict:
+        """Stage durations plus the total so far, in milliseconds."""
+        timings = {name: round(seconds * 1000, 2) for name, seconds in self.stages.items()}
+        timings["total"] = round(self.elapsed() * 1000, 2)
+        return timings
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'tokenize;dur=1.2, forward;dur=35.0, total;dur=40.3'."""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.milliseconds().items())
+
+
+def current_timer():
+    """The timer of the request being handled on this thread, or None."""
+    return getattr(_local, "timer", None)
+
+
+def record(name: str, seconds: float):
+    """Add seconds to a stage of the current request (no-op outside a request)."""
+    timer = current_timer()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block as one stage of the current request."""
+    if current_timer() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+@contextmanager
+def capture():
+    """
+    Collect the stages of the enclosed block in a fresh timer (for work done
+    on behalf of other requests, e.g. a micro-batch), then restore the
+    thread's previous timer.
+    """
+    previous = current_timer()
+    timer = RequestTimer() if ENABLED else None
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, seconds: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += seconds
+            series["count"] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                base = _labels(self.label_names, labels)
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), labels + (repr(bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), labels + ('+Inf',))} {series['count']}")
+                lines.append(f"{self.name}_sum{base} {series['sum']:.6f}")
+                lines.append(f"{self.name}_count{base} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = sorted(self._values.items())
+        return render_samples(self.name, self.help_text, "counter", self.label_names, values)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def render_samples(name: str, help_text: str, metric_type: str, label_names: tuple, values: list) -> list:
+    """Exposition lines for a metric given as [(label_values, value), ...]."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_labels(label_names, labels)} {value}" for labels, value in values)
+    return lines
+
+
+stage_duration = Histogram(
+    "bias_checker_stage_duration_seconds", "Time spent in each request stage",
+    ("endpoint", "stage"), STAGE_BUCKETS
+)
+request_duration = Histogram(
+    "bias_checker_request_duration_seconds", "End-to-end request handling time",
+    ("endpoint",), REQUEST_BUCKETS
+)
+requests_total = Counter(
+    "bias_checker_requests_total", "Requests handled", ("endpoint", "method", "status")
+)
+errors_total = Counter(
+    "bias_checker_request_errors_total", "Requests answered with a 5xx status", ("endpoint",)
+)
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def start_request():
+    """Begin timing a request on this thread."""
+    global _in_flight
+    if not ENABLED:
+        return
+    _local.timer = RequestTimer()
+    with _in_flight_lock:
+        _in_flight += 1
+
+
+def finish_request(endpoint: str, method: str):
+    """Record the current request's stages, duration and status, then clear its timer."""
+    global _in_flight
+    timer = current_timer()
+    if timer is None:
+        return
+    _local.timer = None
+    with _in_flight_lock:
+        _in_flight -= 1
+
+    # No response status means the view raised
+    status = timer.status or 500
+
+    for name, seconds in timer.stages.items():
+        stage_duration.observe((endpoint, name), seconds)
+    request_duration.observe((endpoint,), timer.elapsed())
+    requests_total.inc((endpoint, method, str(status)))
+    if status >= 500:
+        errors_total.inc((endpoint,))
+
+
+def observe_background(endpoint: str, timer: RequestTimer):
+    """Record stages of work finished outside a request (e.g. explanation jobs)."""
+    if timer is None:
+        return
+    for name, seconds in timer.stages.items():
+        stage_duration.observe((endpoint, name), seconds)
+
+
+def render_metrics(extra: list = ()) -> str:
+    """
+    Prometheus text exposition of every metric.
+
+    Args:
+        extra: Additional render_samples() line lists (e.g. cache counters)
+    """
+    lines = []
+    for metric in (requests_total, errors_total, request_duration, stage_duration):
+        lines.extend(metric.render())
+    with _in_flight_lock:
+        in_flight = _in_flight
+    lines.extend(render_samples(
+        "bias_checker_requests_in_flight", "Requests currently being handled", "gauge", (), [((), in_flight)]
+    ))
+    for samples in extra:
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,135 @@
+"""
+In-Process Result Cache
+
+Bounded LRU caches with a time-to-live for repeated submissions of the same
+text. Keys are a SHA-256 hash of the whitespace-normalized text plus the
+identity of whatever produced the result (model source, backend, precision,
+LLM model name, ...), so a model swap never serves stale results.
+
+Two separate namespaces are kept:
+- classification_cache: RoBERTa (label, confidence) results
+- explanation_cache: GPT explanations for /predict
+
+Usage:
+    from result_cache import classification_cache, make_key
+
+    key = make_key(text, "torch", "adapter", "fp32")
+    found, result = classification_cache.get(key)
+    if not found:
+        result = predict(text)
+        classification_cache.put(key, result)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cache configuration (can be overridden via environment variables)
+ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "1") != "0"
+CLASSIFICATION_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "4096"))
+CLASSIFICATION_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "3600"))
+EXPLANATION_CACHE_SIZE = int(os.environ.get("EXPLANATION_CACHE_SIZE", "1024"))
+EXPLANATION_CACHE_TTL = float(os.environ.get("EXPLANATION_CACHE_TTL_SECONDS", "86400"))
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of whitespace and strip the ends."""
+    return " ".join(text.split())
+
+
+def make_key(text: str, *identity) -> str:
+    """
+    Build a cache key from the normalized text and the producer identity.
+
+    Args:
+        text: The submitted text
+        *identity: Anything that changes the result (model path, backend, label, ...)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    payload = json.dumps([list(map(str, identity)), normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after ttl seconds."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = max(0, int(maxsize))
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        """
+        Returns:
+            Tuple of (found, value); value is None on a miss
+        """
+        if not ENABLED or self.maxsize == 0:
+            return False, None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: str, value):
+        if not ENABLED or self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size, configuration and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": ENABLED,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+classification_cache = TTLCache("classification", CLASSIFICATION_CACHE_SIZE, CLASSIFICATION_CACHE_TTL)
+explanation_cache = TTLCache("explanation", EXPLANATION_CACHE_SIZE, EXPLANATION_CACHE_TTL)
+
+
+def get_cache_stats() -> dict:
+    """Return stats for every cache namespace."""
+    return {cache.name: cache.stats() for cache in (classification_cache, explanation_cache)}
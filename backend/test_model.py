@@ -23,9 +23,11 @@ try:
     
     # Test 2: Load predict module
     print("✓ Test 2: Loading prediction module...")
-    from predict import predict_bias, model, tokenizer
+    import predict
+    from predict import predict_bias
+    predict.load_model()
     print("  ✅ Model and tokenizer loaded successfully")
-    print(f"  📊 Using device: {next(model.parameters()).device}")
+    print(f"  📊 Using device: {predict.device}")
     print()
     
     # Test 3: Run predictions
@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+# Tests must not read or write the persistent LLM response cache in data/
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+
+class FakeEncoding(dict):
+    def to(self, device):
+        return self
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer: every token of a text carries that text's id."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def _encode(self, text, max_length):
+        text_id = self.ids.setdefault(text, len(self.ids) + 1)
+        length = len(text.split())
+        return [text_id] * (min(length, max_length) if max_length else length)
+
+    def __call__(self, texts, return_tensors=None, padding=False, truncation=False, max_length=None):
+        single = isinstance(texts, str)
+        ids = [self._encode(text, max_length if truncation else None) for text in ([texts] if single else texts)]
+        features = [{"input_ids": row, "attention_mask": [1] * len(row)} for row in ids]
+        if return_tensors == "pt":
+            return self.pad(features, return_tensors="pt")
+        return {"input_ids": ids, "attention_mask": [feature["attention_mask"] for feature in features]}
+
+    def pad(self, features, return_tensors=None):
+        import torch
+
+        width = max(len(feature["input_ids"]) for feature in features)
+        return FakeEncoding(
+            input_ids=torch.tensor([f["input_ids"] + [0] * (width - len(f["input_ids"])) for f in features]),
+            attention_mask=torch.tensor([f["attention_mask"] + [0] * (width - len(f["attention_mask"])) for f in features])
+        )
+
+    def save_pretrained(self, path):
+        with open(f"{path}/tokenizer.json", "w") as f:
+            json.dump({}, f)
+
+
+class FakeModel:
+    """
+    Logits depend only on the text id (and the active LoRA adapter), so every
+    text has one fixed answer per adapter.
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.merged = False
+        self.batch_shapes = []
+        self.adapters = {"default": 0}
+        self.active_adapter = "default"
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+    def merge_and_unload(self):
+        self.merged = True
+        return self
+
+    def save_pretrained(self, path, safe_serialization=True):
+        with open(f"{path}/config.json", "w") as f:
+            json.dump({"merged": self.merged}, f)
+
+    def load_adapter(self, path, adapter_name):
+        self.adapters[adapter_name] = len(self.adapters)
+
+    def set_adapter(self, adapter_name):
+        self.active_adapter = adapter_name
+
+    def delete_adapter(self, adapter_name):
+        del self.adapters[adapter_name]
+
+    def __call__(self, input_ids, attention_mask):
+        import torch
+
+        self.batch_shapes.append(tuple(input_ids.shape))
+        text_ids = input_ids[:, 0]
+        logits = torch.zeros(len(text_ids), 4)
+        labels = (text_ids + self.adapters[self.active_adapter]) % 4
+        logits[torch.arange(len(text_ids)), labels] = text_ids.float() / 10
+        return SimpleNamespace(logits=logits)
+
+
+@pytest.fixture
+def load_predict(monkeypatch, tmp_path):
+    """
+    Import a fresh predict module configured by environment variables, with
+    the Hugging Face and peft loaders replaced by fakes (no weights, no network).
+    load_predict.loads records every (loader, source) call. The model is
+    loaded (without warm-up) unless ready=False.
+    """
+    pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    peft = pytest.importorskip("peft")
+
+    adapter_dir = tmp_path / "adapter"
+    adapter_dir.mkdir()
+    (adapter_dir / "adapter_config.json").write_text(json.dumps({}))
+    loads = []
+
+    def model_from_pretrained(source, *args, **kwargs):
+        loads.append(("model", str(source)))
+        return FakeModel(str(source))
+
+    def tokenizer_from_pretrained(source, *args, **kwargs):
+        loads.append(("tokenizer", str(source)))
+        return FakeTokenizer()
+
+    def peft_from_pretrained(base_model, path, *args, **kwargs):
+        loads.append(("adapter", str(path)))
+        return base_model
+
+    from result_cache import classification_cache
+
+    monkeypatch.setattr(transformers.AutoModelForSequenceClassification, "from_pretrained", model_from_pretrained)
+    monkeypatch.setattr(transformers.AutoTokenizer, "from_pretrained", tokenizer_from_pretrained)
+    monkeypatch.setattr(peft.PeftModel, "from_pretrained", peft_from_pretrained)
+
+    def load(ready=True, **env):
+        monkeypatch.setenv("MODEL_PATH", str(adapter_dir))
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        loads.clear()
+        classification_cache.clear()
+        sys.modules.pop("predict", None)
+        predict = importlib.import_module("predict")
+        if ready:
+            predict.load_model(warmup=False)
+        return predict
+
+    load.adapter_dir = adapter_dir
+    load.loads = loads
+    yield load
+    sys.modules.pop("predict", None)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def multi_predict(load_predict):
+    checkpoint = load_predict.adapter_dir.parent / "checkpoint-1"
+    checkpoint.mkdir()
+    (checkpoint / "adapter_config.json").write_text(json.dumps({}))
+    return load_predict(MULTI_ADAPTER="1", ADAPTERS_DIR=str(load_predict.adapter_dir.parent))
+
+
+def test_requests_run_on_the_selected_adapter(multi_predict):
+    default = multi_predict.predict_bias_batch(["one", "two words"])
+
+    multi_predict.load_adapter("checkpoint-1")
+    tuned = multi_predict.predict_bias_batch(["one", "two words"], adapter="checkpoint-1")
+
+    # FakeModel shifts every label by one under the second adapter
+    labels = list(multi_predict.id2label.values())
+    assert [labels.index(label) for label, _ in tuned] == [(labels.index(label) + 1) % 4 for label, _ in default]
+    assert multi_predict.predict_bias("one") == default[0]
+    assert [a["name"] for a in multi_predict.list_adapters()] == ["default", "checkpoint-1"]
+
+
+def test_adapter_paths_must_stay_inside_adapters_dir(multi_predict):
+    with pytest.raises(multi_predict.AdapterError, match="inside"):
+        multi_predict.load_adapter("escape", path="../..")
+    with pytest.raises(multi_predict.AdapterError, match="adapter_config.json"):
+        multi_predict.load_adapter("missing")
+
+
+def test_unload_adapter(multi_predict):
+    multi_predict.load_adapter("checkpoint-1")
+
+    with pytest.raises(multi_predict.AdapterError, match="default"):
+        multi_predict.unload_adapter("default")
+    multi_predict.unload_adapter("checkpoint-1")
+
+    with pytest.raises(multi_predict.AdapterError, match="Unknown adapter"):
+        multi_predict.predict_bias("one", adapter="checkpoint-1")
+
+
+def test_named_adapters_need_multi_adapter_mode(load_predict):
+    predict = load_predict()
+
+    assert predict.resolve_adapter_name(None) == "default"
+    with pytest.raises(predict.AdapterError, match="MULTI_ADAPTER"):
+        predict.predict_bias("one", adapter="checkpoint-1")
+
+
+def test_unload_before_the_model_is_loaded_is_not_ready(load_predict):
+    predict = load_predict(ready=False, MULTI_ADAPTER="1")
+
+    with pytest.raises(predict.ModelNotReadyError):
+        predict.unload_adapter("checkpoint-1")
@@ -0,0 +1,47 @@
+import os
+import importlib.util
+
+import pytest
+
+BENCH_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench_inference.py")
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("bench_inference", BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def result(p50, throughput, batch_size=8):
+    return {
+        "variant": "adapter", "threads": 4, "length_bucket": 64, "batch_size": batch_size,
+        "end_to_end_ms": {"p50": p50, "p95": p50 * 2}, "throughput_items_per_s": throughput
+    }
+
+
+def test_percentiles(bench):
+    samples = [i / 1000 for i in range(1, 101)]
+
+    assert bench.percentiles_ms(samples) == {"p50": 51.0, "p95": 96.0, "p99": 100.0, "mean": 50.5}
+    assert bench.percentiles_ms([])["p50"] == 0.0
+
+
+def test_compare_flags_changes_beyond_the_threshold(bench):
+    baseline = {"results": [result(10.0, 100.0)]}
+    current = {"results": [result(12.0, 120.0), result(5.0, 50.0, batch_size=32)]}
+
+    comparison = bench.compare(baseline, current, threshold=0.10)
+
+    assert {(e["metric"], e["change"]) for e in comparison["regressions"]} == {
+        ("end_to_end_ms.p50", 0.2), ("end_to_end_ms.p95", 0.2)
+    }
+    assert [(e["metric"], e["change"]) for e in comparison["improvements"]] == [("throughput_items_per_s", 0.2)]
+    assert comparison["unmatched"] == [["adapter", 4, 64, 32]]
+
+
+def test_changes_within_the_threshold_are_ignored(bench):
+    comparison = bench.compare({"results": [result(10.0, 100.0)]}, {"results": [result(10.5, 95.0)]}, threshold=0.10)
+
+    assert comparison["regressions"] == [] and comparison["improvements"] == []
@@ -0,0 +1,116 @@
+import importlib.util
+
+import pytest
+
+import cascade
+from cascade import CascadePolicy
+
+
+def make_policy(**kwargs):
+    return CascadePolicy({"no_bias": 0.9}, {"demographic_bias": 0.8}, secret="test-secret", **kwargs)
+
+
+@pytest.mark.parametrize("label, confidence, tier", [
+    ("no_bias", 0.95, "local"),
+    ("no_bias", 0.9, "local"),        # thresholds are inclusive
+    ("no_bias", 0.89, "llm"),         # no defer threshold for no_bias
+    ("demographic_bias", 0.95, "deferred"),
+    ("demographic_bias", 0.8, "deferred"),
+    ("demographic_bias", 0.79, "llm"),
+    ("assessment_bias", 0.99, "llm"),  # labels without thresholds always go to the LLM
+])
+def test_threshold_routing(label, confidence, tier):
+    assert make_policy().decide(label, confidence) == tier
+
+
+def test_local_threshold_is_checked_before_defer_threshold():
+    policy = CascadePolicy({"x": 0.9}, {"x": 0.5}, secret="test-secret")
+    assert [policy.decide("x", c) for c in (0.95, 0.7, 0.4)] == ["local", "deferred", "llm"]
+
+
+def test_disabled_cascade_sends_everything_to_the_llm():
+    policy = make_policy(enabled=False)
+    assert policy.decide("no_bias", 1.0) == "llm"
+    assert policy.stats()["llm_calls_avoided"] == 0
+
+
+def test_decisions_are_counted_per_tier_and_label():
+    policy = make_policy()
+    for label, confidence in (("no_bias", 0.95), ("no_bias", 0.5), ("demographic_bias", 0.85)):
+        policy.decide(label, confidence)
+
+    stats = policy.stats()
+    assert stats["decisions"] == {"llm": 1, "local": 1, "deferred": 1}
+    assert stats["decisions_by_label"] == {
+        "no_bias": {"llm": 1, "local": 1, "deferred": 0},
+        "demographic_bias": {"llm": 0, "local": 0, "deferred": 1}
+    }
+    assert stats["llm_calls_avoided"] == 2
+    assert stats["llm_avoided_rate"] == round(2 / 3, 4)
+
+
+def test_deferred_fetch_counted_once_per_valid_token():
+    policy = make_policy()
+    assert policy.decide("demographic_bias", 0.85) == "deferred"
+    token = policy.issue_deferral("note text", "demographic_bias", 0.85)
+
+    assert policy.verify_deferral(token, "note text") == ("demographic_bias", 0.85)
+    policy.record_deferred_fetch(token)
+    policy.record_deferred_fetch(token)
+
+    stats = policy.stats()
+    assert stats["decisions"] == {"llm": 0, "local": 0, "deferred": 1}
+    assert stats["deferred_fetched"] == 1
+    assert stats["llm_calls_avoided"] == 0
+
+
+def test_requests_without_a_valid_token_are_not_deferred_fetches():
+    policy = make_policy()
+    policy.decide("no_bias", 0.95)
+    policy.decide("demographic_bias", 0.85)
+    token = policy.issue_deferral("note text", "demographic_bias", 0.85)
+
+    assert policy.verify_deferral(token, "another text") is None
+    assert policy.verify_deferral(token.split(".")[0] + "." + "0" * 64, "note text") is None
+    assert policy.verify_deferral("not-a-token", "note text") is None
+    assert policy.verify_deferral(None, "note text") is None
+    assert make_policy().verify_deferral(token, "note text") is not None
+    assert CascadePolicy({}, {}, secret="other-secret").verify_deferral(token, "note text") is None
+
+    stats = policy.stats()
+    assert stats["deferred_fetched"] == 0
+    assert stats["llm_calls_avoided"] == 2
+    assert stats["llm_avoided_rate"] == 1.0
+
+
+def test_deferral_token_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cascade.time, "time", lambda: now[0])
+    policy = make_policy(deferral_ttl=60)
+    token = policy.issue_deferral("note text", "demographic_bias", 0.85)
+
+    now[0] += 59
+    assert policy.verify_deferral(token, "note text") is not None
+    now[0] += 2
+    assert policy.verify_deferral(token, "note text") is None
+
+
+def test_local_explanation_has_llm_fields():
+    explanation = CascadePolicy.local_explanation("note text", "no_bias", 0.95)
+
+    assert set(explanation) == {"rationale", "flags", "recommended_revision"}
+    assert "95%" in explanation["rationale"]
+    assert explanation["recommended_revision"] == "note text"
+
+
+@pytest.mark.parametrize("value, enabled", [(None, False), ("0", False), ("1", True)])
+def test_cascade_is_opt_in(monkeypatch, value, enabled):
+    if value is None:
+        monkeypatch.delenv("CASCADE_ENABLED", raising=False)
+    else:
+        monkeypatch.setenv("CASCADE_ENABLED", value)
+    spec = importlib.util.spec_from_file_location("cascade_fresh", cascade.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    assert module.cascade_policy.enabled is enabled
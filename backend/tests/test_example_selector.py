@@ -0,0 +1,77 @@
+import sys
+import json
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from example_selector import EMBEDDINGS_FILE, EXAMPLES_FILE, ExampleSelector
+
+# 2-d unit vectors: similarity to the query [1, 0] is e0 > e1 > e3 > e2
+EXAMPLES = [
+    ("e0", "exam_vignette", [1.0, 0.0]),
+    ("e1", "feedback_snippet", [0.8, 0.6]),
+    ("e2", "exam_vignette", [0.0, 1.0]),
+    ("e3", "feedback_snippet", [0.6, 0.8]),
+]
+
+
+@pytest.fixture
+def fake_predict(monkeypatch):
+    fake = SimpleNamespace(
+        MODEL_SOURCE="models/RoBERTa_Optimized",
+        INFERENCE_BACKEND="torch",
+        is_ready=lambda: True,
+        embed_texts=lambda texts: np.array([[1.0, 0.0]] * len(texts), dtype=np.float32)
+    )
+    monkeypatch.setitem(sys.modules, "predict", fake)
+    return fake
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    np.save(tmp_path / EMBEDDINGS_FILE, np.array([vector for _, _, vector in EXAMPLES], dtype=np.float32))
+    examples = [
+        {"bias_label": "no_bias", "source_type": source, "text": text, "rationale": "", "tokens": 10}
+        for text, source, _ in EXAMPLES
+    ]
+    info = {"model_source": "models/RoBERTa_Optimized", "rows": len(examples), "dim": 2}
+    (tmp_path / EXAMPLES_FILE).write_text(json.dumps({"info": info, "examples": examples}))
+    return tmp_path
+
+
+def texts(examples):
+    return [example["text"] for example in examples]
+
+
+def test_nearest_examples_in_similarity_order(fake_predict, index_path):
+    selector = ExampleSelector(index_path, k=3, token_budget=1000)
+
+    assert texts(selector.select("new note")) == ["e0", "e1", "e3"]
+    assert selector.info()["average_examples"] == 3
+
+
+def test_source_type_restricts_candidates(fake_predict, index_path):
+    selector = ExampleSelector(index_path, k=4, token_budget=1000)
+
+    assert texts(selector.select("new note", source_type="feedback_snippet")) == ["e1", "e3"]
+    assert selector.select("new note", source_type="unknown") == []
+    # Restricting by source masks scores rather than copying rows out of the memmap
+    assert isinstance(selector._embeddings, np.memmap)
+    assert selector._by_source["feedback_snippet"].dtype == bool
+
+
+def test_input_itself_and_over_budget_examples_are_skipped(fake_predict, index_path):
+    selector = ExampleSelector(index_path, k=4, token_budget=25)
+
+    assert texts(selector.select(" e0 ")) == ["e1", "e3"]
+
+
+def test_index_for_another_model_falls_back_to_static_examples(fake_predict, index_path):
+    fake_predict.MODEL_SOURCE = "models/other"
+    selector = ExampleSelector(index_path)
+
+    assert selector.select_many(["a", "b"]) is None
+    assert "rebuild" in selector.unavailable_reason
+    assert selector.info()["fallbacks"] == 2
@@ -0,0 +1,161 @@
+import sys
+import sqlite3
+import time
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import explanation_jobs
+from explanation_jobs import ExplanationJobs
+
+
+class FakeLLMService:
+    """llm_service stand-in; explanations block until release() is called."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+
+    def release(self):
+        self.gate.set()
+
+    def generate_bias_explanation(self, text, predicted_label, confidence, use_cache=True):
+        self.gate.wait(5)
+        if text == "boom":
+            raise RuntimeError("OpenAI unavailable")
+        if text == "refused":
+            return {"error": "OpenAI API Key not configured"}
+        return {"rationale": f"{predicted_label} at {confidence}", "flags": [], "recommended_revision": text}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    fake = FakeLLMService()
+    monkeypatch.setitem(sys.modules, "llm_service", SimpleNamespace(generate_bias_explanation=fake.generate_bias_explanation))
+    yield fake
+    fake.release()
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return ExplanationJobs(str(tmp_path / "jobs.sqlite3"), workers=2, max_pending=2, ttl=60)
+
+
+def test_job_is_pending_until_the_explanation_is_ready(llm, jobs):
+    job_id = jobs.submit("note", "no_bias", 0.9)
+    assert jobs.get(job_id)["status"] == "pending"
+
+    llm.release()
+    job = jobs.get(job_id, wait=5)
+
+    assert job["status"] == "done"
+    assert job["rationale"] == "no_bias at 0.9"
+    assert jobs.stats()["completed"] == 1
+    assert jobs.stats()["pending"] == 0
+
+
+def test_failed_explanation_is_reported_as_error(llm, jobs):
+    llm.release()
+    job = jobs.get(jobs.submit("boom", "no_bias", 0.9), wait=5)
+
+    assert job["status"] == "error"
+    assert "OpenAI unavailable" in job["error"]
+    assert jobs.stats()["failed"] == 1
+
+
+def test_error_reported_by_the_service_is_an_error(llm, jobs):
+    llm.release()
+    job = jobs.get(jobs.submit("refused", "no_bias", 0.9), wait=5)
+
+    assert job["status"] == "error"
+    assert jobs.stats()["failed"] == 1
+
+
+def test_failed_result_write_still_frees_the_pending_slot(llm, jobs):
+    job_id = jobs.submit("note", "no_bias", 0.9)
+
+    class BrokenConnection:
+        def execute(self, sql, params=()):
+            raise sqlite3.OperationalError("database is locked")
+
+        def rollback(self):
+            pass
+
+    finished = jobs._finished[job_id]
+    real_connection = jobs._connection
+    jobs._connection = lambda: BrokenConnection()
+    llm.release()
+    assert finished.wait(5)
+    jobs._connection = real_connection
+
+    assert jobs.stats()["pending"] == 0
+    assert jobs.stats()["failed"] == 1
+
+
+def test_failed_result_write_is_retried_as_an_error(llm, jobs):
+    job_id = jobs.submit("note", "no_bias", 0.9)
+    real_store = jobs._store
+    writes = []
+
+    def flaky_store(job_id, status, result):
+        writes.append(status)
+        if len(writes) == 1:
+            raise sqlite3.OperationalError("disk I/O error")
+        real_store(job_id, status, result)
+
+    jobs._store = flaky_store
+    llm.release()
+    job = jobs.get(job_id, wait=5)
+
+    assert writes == ["done", "error"]
+    assert job["status"] == "error"
+    assert "disk I/O error" in job["error"]
+
+
+def test_failed_submit_frees_the_pending_slot(llm, jobs, monkeypatch):
+    jobs._ensure_executor()
+
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(jobs._executor, "submit", broken_submit)
+
+    with pytest.raises(RuntimeError):
+        jobs.submit("note", "no_bias", 0.9)
+
+    assert jobs.stats()["pending"] == 0
+    assert jobs.stats()["submitted"] == 0
+    assert jobs._finished == {}
+
+
+def test_submit_rejects_past_max_pending(llm, jobs):
+    assert jobs.submit("a", "no_bias", 0.9)
+    assert jobs.submit("b", "no_bias", 0.9)
+    assert jobs.submit("c", "no_bias", 0.9) is None
+    assert jobs.stats()["rejected"] == 1
+
+
+def test_expired_jobs_are_deleted(llm, jobs, monkeypatch):
+    llm.release()
+    job_id = jobs.submit("note", "no_bias", 0.9)
+    assert jobs.get(job_id, wait=5)["status"] == "done"
+
+    later = time.time() + 120
+    monkeypatch.setattr(explanation_jobs, "time", SimpleNamespace(time=lambda: later, monotonic=time.monotonic, perf_counter=time.perf_counter, sleep=time.sleep))
+    jobs.submit("later", "no_bias", 0.9)
+
+    assert jobs.get(job_id) is None
+    assert jobs.get("unknown") is None
+
+
+
+def test_stale_pending_jobs_are_deleted(llm, jobs, monkeypatch):
+    conn = jobs._connection()
+    conn.execute("INSERT INTO jobs (job_id, status, created_at) VALUES ('orphan', 'pending', ?)", (time.time(),))
+    conn.commit()
+
+    later = time.time() + 120
+    monkeypatch.setattr(explanation_jobs, "time", SimpleNamespace(time=lambda: later, monotonic=time.monotonic, perf_counter=time.perf_counter, sleep=time.sleep))
+    jobs.submit("later", "no_bias", 0.9)
+
+    assert jobs.get("orphan") is None
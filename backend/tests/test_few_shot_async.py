@@ -0,0 +1,85 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import few_shot_classifier
+
+
+class FakeAsyncClient:
+    """AsyncOpenAI stand-in that tracks how many requests are in flight."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        return self
+
+    async def create(self, **params):
+        text = params["messages"][-1]["content"]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if "broken" in text:
+                raise RuntimeError("upstream 500")
+            content = json.dumps({"bias_detected": True, "summary": text[-12:]})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeAsyncClient()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(few_shot_classifier, "get_async_openai_client", lambda: fake)
+    return fake
+
+
+def test_batch_keeps_order_and_bounds_concurrency(client):
+    texts = [f"clinical note {i:03d}" for i in range(10)]
+
+    results = few_shot_classifier.classify_batch_few_shot(texts, max_concurrency=3)
+
+    assert [result["summary"] for result in results] == [text[-12:] for text in texts]
+    assert client.max_in_flight == 3
+    assert client.closed
+
+
+def test_one_failure_does_not_break_the_batch(client):
+    results = few_shot_classifier.classify_batch_few_shot(["clinical note 001", "broken note", "clinical note 002"])
+
+    assert results[1]["primary_category"] == "error"
+    assert "upstream 500" in results[1]["summary"]
+    assert results[0]["bias_detected"] and results[2]["bias_detected"]
+
+
+def test_missing_api_key_returns_error_results(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    results = few_shot_classifier.classify_batch_few_shot(["a", "b"])
+
+    assert [result["error"] for result in results] == ["missing_api_key", "missing_api_key"]
+
+
+def test_stream_result_ignores_text_after_the_object(monkeypatch):
+    content = json.dumps({"bias_detected": True, "primary_category": "demographic_bias", "summary": "s"})
+    pieces = [content[:20], content[20:], "\n\nLet me know if you need more detail."]
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(few_shot_classifier, "get_openai_client", lambda: object())
+    monkeypatch.setattr(few_shot_classifier, "chat_completion_stream", lambda client, params, **kwargs: iter(pieces))
+
+    events = dict(few_shot_classifier.stream_bias_few_shot("note"))
+
+    assert "error" not in events
+    assert events["result"]["primary_category"] == "demographic_bias"
@@ -0,0 +1,81 @@
+import os
+import importlib.util
+
+import pytest
+
+CONF_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    monkeypatch.setenv("WEB_WORKERS", "2")
+    monkeypatch.setenv("OMP_NUM_THREADS", "1")
+    monkeypatch.setenv("CASCADE_DEFERRAL_SECRET", "")
+    monkeypatch.delenv("CASCADE_DEFERRAL_SECRET")
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", CONF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_torch_threads_split_cores_between_workers(conf):
+    assert conf.workers == 2
+    assert conf.preload_app
+    assert conf.TORCH_THREADS == max(1, conf.available_cores() // 2)
+
+
+def test_deferral_secret_is_chosen_before_fork(conf):
+    # Workers import the app after this, so they all sign with the same key
+    assert len(os.environ["CASCADE_DEFERRAL_SECRET"]) == 64
+
+
+def test_memory_report_reads_proc(conf, monkeypatch, tmp_path):
+    smaps = tmp_path / "smaps_rollup"
+    smaps.write_text("Rss:  204800 kB\nPss:  102400 kB\nShared_Clean:  102400 kB\nPrivate_Dirty:  102400 kB\n")
+    real_open = open
+
+    def fake_open(path, *args, **kwargs):
+        if path.endswith("/smaps_rollup"):
+            return real_open(smaps, *args, **kwargs)
+        raise OSError(path)
+
+    monkeypatch.setattr("builtins.open", fake_open)
+
+    assert conf.memory_report(1) == {"rss_mb": 200.0, "pss_mb": 100.0, "shared_mb": 100.0, "private_mb": 100.0}
+
+
+class FakePredict:
+    def __init__(self, *statuses, error=None):
+        self.statuses = list(statuses)
+        self.error = error
+        self.waits = []
+
+    def get_load_status(self):
+        status = self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]
+        return {"status": status, "error": self.error, "load_seconds": None}
+
+    def wait_until_ready(self, timeout=None):
+        self.waits.append(timeout)
+        return False
+
+
+def test_wait_for_model_returns_once_ready(conf):
+    predict = FakePredict("loading", "loading", "ready")
+
+    conf.wait_for_model(predict, timeout=5, poll=0.01)
+
+    assert predict.waits == [0.01, 0.01]
+
+
+def test_wait_for_model_raises_on_load_error(conf):
+    predict = FakePredict("loading", "error", error="bad weights")
+
+    with pytest.raises(RuntimeError, match="bad weights"):
+        conf.wait_for_model(predict, timeout=5, poll=0.01)
+
+
+def test_wait_for_model_gives_up_after_timeout(conf):
+    predict = FakePredict("loading")
+
+    with pytest.raises(RuntimeError, match="still loading"):
+        conf.wait_for_model(predict, timeout=0.05, poll=0.01)
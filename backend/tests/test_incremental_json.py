@@ -0,0 +1,112 @@
+import json
+import random
+
+import pytest
+
+from incremental_json import IncrementalJSONParser
+
+DOCUMENT = {
+    "primary_category": "demographic_bias",
+    "confidence": 0.87,
+    "is_biased": True,
+    "notes": None,
+    "biases_found": [
+        {"type": "demographic_bias", "span": "the \"noncompliant\" {patient}", "severity": 3},
+        {"type": "assessment_bias", "span": "drug-seeking, [again]\\", "severity": 2}
+    ],
+    "tags": ["a", "b"],
+    "meta": {"nested": {"depth": [1, 2, {"x": "}"}]}},
+    "count": -12
+}
+
+EXPECTED = [
+    ("field", "primary_category", "demographic_bias"),
+    ("field", "confidence", 0.87),
+    ("field", "is_biased", True),
+    ("field", "notes", None),
+    ("item", "biases_found", DOCUMENT["biases_found"][0]),
+    ("item", "biases_found", DOCUMENT["biases_found"][1]),
+    ("field", "biases_found", DOCUMENT["biases_found"]),
+    ("field", "tags", ["a", "b"]),
+    ("field", "meta", DOCUMENT["meta"]),
+    ("field", "count", -12)
+]
+
+
+def feed_all(parser, pieces):
+    events = []
+    for piece in pieces:
+        events.extend(parser.feed(piece))
+    return events
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_whole_document_in_one_chunk(indent):
+    parser = IncrementalJSONParser(stream_arrays=("biases_found",))
+    assert parser.feed(json.dumps(DOCUMENT, indent=indent)) == EXPECTED
+    assert parser.done
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_any_chunking_gives_the_same_events(seed):
+    text = json.dumps(DOCUMENT, indent=seed % 3 or None)
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(text)), 25))
+    pieces = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+    assert feed_all(IncrementalJSONParser(stream_arrays=("biases_found",)), pieces) == EXPECTED
+
+
+def test_character_by_character():
+    text = json.dumps(DOCUMENT)
+    assert feed_all(IncrementalJSONParser(stream_arrays=("biases_found",)), text) == EXPECTED
+
+
+def test_fields_are_reported_as_soon_as_they_complete():
+    parser = IncrementalJSONParser(stream_arrays=("biases_found",))
+
+    assert parser.feed('{"primary_category": "no_b') == []
+    assert parser.feed('ias", "confidence": 0.9') == [("field", "primary_category", "no_bias")]
+    # A number is only complete once its terminator arrives
+    assert parser.feed("5") == []
+    assert parser.feed(', "biases_found": [{"type": "x"}') == [
+        ("field", "confidence", 0.95), ("item", "biases_found", {"type": "x"})
+    ]
+    assert not parser.done
+    assert parser.feed("]}") == [("field", "biases_found", [{"type": "x"}])]
+    assert parser.done
+
+
+def test_arrays_not_listed_are_reported_whole():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"biases_found": [{"type": "x"}, {"type": "y"}]}') == [
+        ("field", "biases_found", [{"type": "x"}, {"type": "y"}])
+    ]
+
+
+def test_text_after_the_closing_brace_is_ignored():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1} trailing {"b": 2}') == [("field", "a", 1)]
+    assert parser.done
+    assert parser.feed('"more"') == []
+
+
+def test_document_excludes_text_around_the_object():
+    parser = IncrementalJSONParser()
+    feed_all(parser, ["Here you go: {\"a\": ", "{\"b\": \"}\"}}", "\nHope this helps!"])
+
+    assert parser.document() == {"a": {"b": "}"}}
+
+
+def test_document_of_an_unfinished_object_raises():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1')
+
+    with pytest.raises(json.JSONDecodeError):
+        parser.document()
+
+
+def test_escaped_quotes_and_backslashes_in_keys_and_values():
+    parser = IncrementalJSONParser()
+    text = json.dumps({'we"ird\\key': 'value with \\" and "quotes"'})
+    assert feed_all(parser, text) == [("field", 'we"ird\\key', 'value with \\" and "quotes"')]
@@ -0,0 +1,81 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache, chat_completion, fingerprint
+
+
+class FakeClient:
+    def __init__(self, content='{"ok": true}'):
+        self.content = content
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, **params):
+        self.calls += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    fresh = LLMCache(str(tmp_path / "llm_cache.sqlite3"), max_bytes=1024)
+    monkeypatch.setattr(llm_cache, "llm_cache", fresh)
+    monkeypatch.setattr(llm_cache, "ENABLED", True)
+    return fresh
+
+
+PARAMS = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "note"}], "temperature": 0.1}
+
+
+def test_repeated_request_is_served_from_cache(cache):
+    client = FakeClient()
+
+    assert chat_completion(client, PARAMS) == '{"ok": true}'
+    assert chat_completion(client, dict(reversed(list(PARAMS.items())))) == '{"ok": true}'
+
+    assert client.calls == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"], cache.stats()["entries"]) == (1, 1, 1)
+
+
+def test_fingerprint_covers_model_messages_and_sampling():
+    assert fingerprint(PARAMS) != fingerprint({**PARAMS, "model": "gpt-4o"})
+    assert fingerprint(PARAMS) != fingerprint({**PARAMS, "temperature": 0.3})
+    assert fingerprint(PARAMS) != fingerprint({**PARAMS, "messages": [{"role": "user", "content": "other"}]})
+
+
+def test_bypass_skips_lookup_but_stores_fresh_answer(cache):
+    client = FakeClient()
+    chat_completion(client, PARAMS)
+
+    client.content = '{"ok": false}'
+    assert chat_completion(client, PARAMS, use_cache=False) == '{"ok": false}'
+    assert chat_completion(client, PARAMS) == '{"ok": false}'
+
+    assert client.calls == 2
+    assert cache.stats()["bypasses"] == 1
+
+
+def test_invalid_content_is_not_cached(cache):
+    client = FakeClient("not json")
+
+    chat_completion(client, PARAMS, validate=json.loads)
+    chat_completion(client, PARAMS, validate=json.loads)
+
+    assert client.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_budget(cache):
+    for i in range(4):
+        cache.put(f"key{i}", "m", "x" * 300)
+        cache.get("key0")  # keep key0 recently used
+
+    assert cache.get("key0") is not None
+    assert cache.get("key1") is None
+    assert cache.stats()["bytes"] <= 1024
+    assert cache.stats()["evictions"] >= 1
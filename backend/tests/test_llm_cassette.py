@@ -0,0 +1,73 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import fingerprint
+from llm_cassette import Cassette, CassetteMissError
+
+PARAMS = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "note"}], "temperature": 0.1}
+USAGE = {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+
+
+def test_recorded_entries_replay_from_a_new_process(tmp_path):
+    path = str(tmp_path / "llm.jsonl.gz")
+    Cassette(path, mode="record").record(fingerprint(PARAMS), PARAMS, '{"ok": true}', USAGE, 0.25)
+
+    replayer = Cassette(path, mode="replay")
+    entry = replayer.replay(fingerprint(PARAMS), PARAMS)
+
+    assert (entry["content"], entry["usage"], entry["latency"]) == ('{"ok": true}', USAGE, 0.25)
+    assert replayer.last_call()["source"] == "replay"
+    assert replayer.replay_delay(entry) == 0.0
+    assert Cassette(path, mode="replay", replay_latency=True).replay_delay(entry) == 0.25
+
+
+def test_unrecorded_request_is_a_miss(tmp_path):
+    cassette = Cassette(str(tmp_path / "empty.jsonl.gz"), mode="replay")
+
+    with pytest.raises(CassetteMissError):
+        cassette.replay(fingerprint(PARAMS), PARAMS)
+    assert cassette.stats()["misses"] == 1
+
+
+@pytest.fixture
+def replaying(monkeypatch, tmp_path):
+    path = str(tmp_path / "llm.jsonl.gz")
+    Cassette(path, mode="record").record(fingerprint(PARAMS), PARAMS, '{"ok": true}', USAGE, 0.2)
+    cassette = Cassette(path, mode="replay", replay_latency=True)
+    monkeypatch.setattr(llm_cache, "cassette", cassette)
+    monkeypatch.setattr(llm_cache, "ENABLED", False)
+    return cassette
+
+
+def test_chat_completion_replays_without_a_client(replaying):
+    assert llm_cache.chat_completion(None, PARAMS) == '{"ok": true}'
+    assert replaying.stats()["replayed"] == 1
+
+
+def test_async_replays_wait_concurrently(replaying):
+    async def replay_both():
+        return await asyncio.gather(*(llm_cache.chat_completion_async(None, PARAMS) for _ in range(2)))
+
+    started = time.monotonic()
+    assert asyncio.run(replay_both()) == ['{"ok": true}', '{"ok": true}']
+
+    # Both recorded latencies elapse on the event loop at the same time
+    assert time.monotonic() - started < 0.35
+
+
+def test_live_calls_are_recorded(monkeypatch, tmp_path):
+    cassette = Cassette(str(tmp_path / "llm.jsonl.gz"), mode="record")
+    monkeypatch.setattr(llm_cache, "cassette", cassette)
+    monkeypatch.setattr(llm_cache, "ENABLED", False)
+    response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="answer"))], usage=None)
+    monkeypatch.setattr(llm_cache.llm_resilience, "call", lambda client, params: response)
+
+    assert llm_cache.chat_completion(object(), PARAMS) == "answer"
+
+    entry = Cassette(cassette.path, mode="replay").replay(fingerprint(PARAMS), PARAMS)
+    assert entry["content"] == "answer"
+    assert entry["usage"]["estimated"]
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+import llm_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_client, "_client", None)
+    monkeypatch.setattr(llm_client, "_client_pid", None)
+
+
+def test_one_client_per_process(monkeypatch):
+    first = llm_client.get_llm_client()
+
+    assert llm_client.get_llm_client() is first
+    assert llm_client.get_client_info()["client_created"]
+
+    # A forked worker has a new pid and must not reuse the parent's sockets
+    monkeypatch.setattr(llm_client.os, "getpid", lambda: llm_client._client_pid + 1)
+    assert llm_client.get_llm_client() is not first
+
+
+def test_no_client_without_api_key(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY")
+
+    assert llm_client.get_llm_client() is None
+    assert llm_client.create_async_llm_client() is None
+
+
+def test_pool_settings_come_from_configuration(monkeypatch):
+    monkeypatch.setattr(llm_client, "POOL_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(llm_client, "PROXY_URL", "http://proxy.internal:3128")
+
+    options = llm_client._http_client_options()
+
+    assert options["limits"].max_connections == 7
+    assert options["proxy"] == "http://proxy.internal:3128"
+    assert options["http2"] is False
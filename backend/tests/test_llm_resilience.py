@@ -0,0 +1,276 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_resilience
+from llm_resilience import CircuitBreaker, CircuitOpenError, Deadline, LatencyTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeClient:
+    """Stands in for an OpenAI client: each create() takes the next scripted outcome."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.timeouts = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, max_retries, timeout):
+        assert max_retries == 0
+        self.timeouts.append(timeout)
+        return self
+
+    def next_outcome(self):
+        with self._lock:
+            outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome() if callable(outcome) else outcome
+
+    def create(self, **params):
+        return self.next_outcome()
+
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, **params):
+        return self.next_outcome()
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "breaker", CircuitBreaker(failure_threshold=2, reset_seconds=30))
+    monkeypatch.setattr(llm_resilience, "latency", LatencyTracker())
+    monkeypatch.setattr(llm_resilience, "_counters", dict.fromkeys(llm_resilience._counters, 0))
+    monkeypatch.setattr(llm_resilience, "MAX_RETRIES", 2)
+    monkeypatch.setattr(llm_resilience, "BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(llm_resilience, "BACKOFF_MAX", 8.0)
+    monkeypatch.setattr(llm_resilience, "ATTEMPT_TIMEOUT", 30.0)
+    monkeypatch.setattr(llm_resilience, "HEDGE_ENABLED", False)
+    monkeypatch.setattr(llm_resilience, "HEDGE_DELAY", 0.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_resilience, "time", fake)
+    # Largest backoff allowed by full jitter, so sleeps are predictable
+    monkeypatch.setattr(llm_resilience, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return fake
+
+
+def test_backoff_is_full_jitter_within_the_ceiling():
+    for retry, ceiling in ((0, 0.5), (1, 1.0), (2, 2.0), (6, 8.0)):
+        samples = [llm_resilience._backoff(retry) for _ in range(200)]
+        assert all(0 <= sample <= ceiling for sample in samples)
+
+
+def test_retryable_errors_are_retried_with_backoff(clock):
+    client = FakeClient([TimeoutError(), ConnectionError(), "answer"])
+
+    assert llm_resilience.call(client, {}) == "answer"
+    assert clock.sleeps == [0.5, 1.0]
+    assert llm_resilience._counters["retries"] == 2
+    assert llm_resilience._counters["attempts"] == 3
+    assert llm_resilience.breaker.state == "closed"
+
+
+def test_gives_up_after_max_retries_and_counts_one_breaker_failure(clock):
+    client = FakeClient([TimeoutError(), TimeoutError(), TimeoutError("last")])
+
+    with pytest.raises(TimeoutError, match="last"):
+        llm_resilience.call(client, {})
+    assert len(client.timeouts) == 3
+    assert llm_resilience._counters["failures"] == 1
+    assert llm_resilience.breaker.consecutive_failures == 1
+
+
+def test_backoff_and_attempt_timeouts_respect_the_deadline(clock):
+    client = FakeClient([TimeoutError(), TimeoutError("out of budget"), "unused"])
+
+    with pytest.raises(TimeoutError, match="out of budget"):
+        llm_resilience.call(client, {}, deadline=Deadline(budget=1.0))
+    # Each attempt gets what is left of the budget; the 1 s backoff would overrun it
+    assert client.timeouts == [1.0, 0.5]
+    assert clock.sleeps == [0.5]
+
+
+def test_exhausted_budget_fails_without_calling_the_provider(clock):
+    client = FakeClient(["unused"])
+
+    with pytest.raises(TimeoutError, match="budget exhausted"):
+        llm_resilience.call(client, {}, deadline=Deadline(budget=0))
+    assert client.timeouts == []
+    assert llm_resilience.breaker.consecutive_failures == 1
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    pytest.importorskip("openai")
+    client = FakeClient([ValueError("bad request"), "unused"])
+
+    with pytest.raises(ValueError):
+        llm_resilience.call(client, {})
+    assert len(client.timeouts) == 1
+    assert llm_resilience.breaker.consecutive_failures == 0
+
+
+def test_non_retryable_errors_record_no_breaker_outcome(clock):
+    pytest.importorskip("openai")
+    breaker = llm_resilience.breaker
+    breaker.record_failure()
+
+    with pytest.raises(ValueError):
+        llm_resilience.call(FakeClient([ValueError("bad request")]), {})
+    assert breaker.consecutive_failures == 1
+
+    # A rejected half-open trial neither closes nor re-opens the breaker
+    breaker.record_failure()
+    clock.now += 30
+    with pytest.raises(ValueError):
+        llm_resilience.call(FakeClient([ValueError("bad request")]), {})
+    assert breaker.state == "half_open"
+    assert breaker.acquire() == "trial"
+
+
+def test_breaker_state_transitions(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+    assert breaker.acquire() == "call"
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.acquire() is None
+    assert breaker.short_circuited == 1
+
+    # After the reset period exactly one trial is let through
+    clock.now += 30
+    assert breaker.acquire() == "trial"
+    assert breaker.state == "half_open"
+    assert breaker.acquire() is None
+
+    # A failed trial re-opens the breaker for another reset period
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.acquire() == "trial"
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.consecutive_failures == 0
+    assert breaker.acquire() == "call"
+
+
+def test_open_breaker_fails_fast(clock):
+    llm_resilience.breaker.record_failure()
+    llm_resilience.breaker.record_failure()
+    client = FakeClient(["unused"])
+
+    with pytest.raises(CircuitOpenError):
+        llm_resilience.call(client, {})
+    assert client.timeouts == []
+
+
+def test_interrupted_trial_frees_the_half_open_slot(clock):
+    breaker = llm_resilience.breaker
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 30
+
+    with pytest.raises(KeyboardInterrupt):
+        llm_resilience.call(FakeClient([KeyboardInterrupt()]), {})
+    assert breaker.state == "half_open"
+    assert llm_resilience.call(FakeClient(["answer"]), {}) == "answer"
+    assert breaker.state == "closed"
+
+
+def test_cancelled_async_trial_frees_the_half_open_slot(clock):
+    breaker = llm_resilience.breaker
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 30
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(llm_resilience.call_async(FakeAsyncClient([asyncio.CancelledError()]), {}))
+    assert breaker.acquire() == "trial"
+
+
+def test_async_call_retries(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "random", SimpleNamespace(uniform=lambda low, high: 0.0))
+    client = FakeAsyncClient([ConnectionError(), "answer"])
+
+    assert asyncio.run(llm_resilience.call_async(client, {})) == "answer"
+    assert llm_resilience._counters["retries"] == 1
+
+
+def test_stream_retries_only_opening_the_stream(clock):
+    client = FakeClient([TimeoutError(), iter(["chunk"])])
+
+    assert list(llm_resilience.call_stream(client, {})) == ["chunk"]
+    assert clock.sleeps == [0.5]
+
+
+def test_hedge_delay_waits_for_enough_latency_samples(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "HEDGE_ENABLED", True)
+    assert llm_resilience.hedge_delay() is None
+
+    for i in range(llm_resilience.MIN_HEDGE_SAMPLES):
+        llm_resilience.latency.record(0.1 * (i + 1))
+    assert llm_resilience.hedge_delay() == pytest.approx(2.0)
+
+    monkeypatch.setattr(llm_resilience, "HEDGE_DELAY", 0.25)
+    assert llm_resilience.hedge_delay() == 0.25
+
+
+def test_slow_attempt_is_hedged_and_the_first_answer_wins(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_resilience, "HEDGE_DELAY", 0.05)
+
+    def slow():
+        time.sleep(0.5)
+        return "slow"
+
+    client = FakeClient([slow, "fast"])
+
+    assert llm_resilience.call(client, {}) == "fast"
+    assert llm_resilience._counters["hedges"] == 1
+    assert llm_resilience._counters["hedge_wins"] == 1
+
+
+def test_fast_attempt_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_resilience, "HEDGE_DELAY", 0.5)
+    client = FakeClient(["fast", "unused"])
+
+    assert llm_resilience.call(client, {}) == "fast"
+    assert llm_resilience._counters["hedges"] == 0
+    assert len(client.timeouts) == 1
+
+
+def test_attempt_that_times_out_before_the_hedge_delay_is_not_hedged(monkeypatch):
+    monkeypatch.setattr(llm_resilience, "HEDGE_ENABLED", True)
+    monkeypatch.setattr(llm_resilience, "HEDGE_DELAY", 0.5)
+    monkeypatch.setattr(llm_resilience, "random", SimpleNamespace(uniform=lambda low, high: 0.0))
+    client = FakeClient([TimeoutError("read timed out"), "answer"])
+
+    assert llm_resilience.call(client, {}) == "answer"
+    assert llm_resilience._counters["hedges"] == 0
+    assert llm_resilience._counters["retries"] == 1
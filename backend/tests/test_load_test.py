@@ -0,0 +1,92 @@
+import os
+import random
+import importlib.util
+
+import pytest
+
+LOAD_TEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "load_test.py")
+
+
+@pytest.fixture(scope="module")
+def load_test():
+    spec = importlib.util.spec_from_file_location("load_test", LOAD_TEST_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_payloads_match_the_endpoint(load_test):
+    texts = ["a", "b", "c"]
+    rng = random.Random(1)
+
+    assert load_test.make_payloads("/health", texts, 2, rng, 2, False) == [None, None]
+    batch = load_test.make_payloads("/predict-batch", texts, 1, rng, 2, True)[0]
+    assert len(batch["texts"]) == 2 and batch["no_cache"] is True
+    assert load_test.make_payloads("/predict", texts, 1, rng, 2, False)[0]["text"] in texts
+
+
+def test_summary_counts_non_200_as_errors(load_test):
+    results = [(200, 0.05)] * 8 + [(503, 0.01), ("dropped", 0.0)]
+
+    summary = load_test.summarize(results, seconds=2.0, slo_p95_ms=100, slo_error_rate=0.1)
+
+    assert summary["status_codes"] == {"200": 8, "503": 1, "dropped": 1}
+    assert summary["error_rate"] == 0.2
+    assert summary["throughput_rps"] == 4.0
+    assert summary["latency_ms"]["p95"] == 50.0
+    assert summary["histogram"]["<=50ms"] == 8
+    assert not summary["meets_slo"]
+
+
+def test_saturation_point_for_open_and_closed_loops(load_test):
+    def step(load, throughput, meets_slo=True):
+        return {"load": load, "throughput_rps": throughput, "meets_slo": meets_slo}
+
+    open_steps = [step(5, 5.0), step(10, 9.9), step(20, 15.0), step(40, 16.0, meets_slo=False)]
+    assert load_test.find_saturation(open_steps, "open") == {"max_load_within_slo": 20, "saturated_at": 20}
+
+    closed_steps = [step(1, 10.0), step(2, 19.0), step(4, 20.0)]
+    assert load_test.find_saturation(closed_steps, "closed") == {"max_load_within_slo": 4, "saturated_at": 4}
+
+
+def test_open_loop_drops_requests_past_max_in_flight(load_test, monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    def slow_send(url, payload):
+        release.wait(5)
+        return 200, 0.0
+
+    monkeypatch.setattr(load_test, "send", slow_send)
+    threading.Timer(0.2, release.set).start()
+
+    results, _ = load_test.run_open("http://localhost/predict", [None] * 4, rate=1000, max_in_flight=2)
+
+    assert sorted(str(status) for status, _ in results) == ["200", "200", "dropped", "dropped"]
+
+
+def test_cache_states_from_stats(load_test, monkeypatch):
+    import io
+    import json
+
+    stats = {"result_cache": {"classification": {"enabled": True}, "explanation": {"enabled": False}}}
+    monkeypatch.setattr(load_test.urllib.request, "urlopen", lambda url, timeout: io.BytesIO(json.dumps(stats).encode()))
+
+    assert load_test.cache_states("http://localhost:8000/", no_cache=False) == {
+        "classification": "active", "explanation": "disabled", "llm": "unknown"
+    }
+    assert load_test.cache_states("http://localhost:8000", no_cache=True)["classification"] == "bypassed"
+
+
+def test_open_loop_records_exceptions_as_errors(load_test, monkeypatch):
+    def broken_send(url, payload):
+        raise ValueError("bad response")
+
+    monkeypatch.setattr(load_test, "send", broken_send)
+
+    results, seconds = load_test.run_open("http://localhost/predict", [None] * 3, rate=1000, max_in_flight=3)
+    summary = load_test.summarize(results, seconds, slo_p95_ms=500, slo_error_rate=0.01)
+
+    assert summary["status_codes"] == {"exception:ValueError": 3}
+    assert summary["error_rate"] == 1.0
@@ -0,0 +1,77 @@
+import os
+import sys
+
+
+def test_merged_checkpoint_is_built_once_then_loaded_without_peft(load_predict, tmp_path):
+    merged = tmp_path / "merged"
+    predict = load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    assert predict.MODEL_SOURCE == str(merged)
+    assert predict.model.merged
+    assert ("adapter", str(load_predict.adapter_dir)) in load_predict.loads
+    assert predict.is_merged_checkpoint(str(merged))
+
+    # The next start finds the checkpoint and skips the adapter stack
+    predict = load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+    assert load_predict.loads == [("model", str(merged)), ("tokenizer", str(merged))]
+    assert predict.model.source == str(merged)
+
+
+def test_merged_serving_does_not_need_peft(load_predict, tmp_path, monkeypatch):
+    merged = tmp_path / "merged"
+    load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    monkeypatch.setitem(sys.modules, "peft", None)  # import peft now raises ImportError
+    predict = load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    assert predict.is_ready()
+    assert predict.model.source == str(merged)
+
+
+def test_adapter_mode_attaches_the_adapters(load_predict):
+    predict = load_predict()
+
+    assert predict.MODEL_SOURCE == str(load_predict.adapter_dir)
+    assert ("adapter", str(load_predict.adapter_dir)) in load_predict.loads
+
+
+def test_is_merged_checkpoint_needs_config_and_tokenizer(load_predict, tmp_path):
+    predict = load_predict()
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.mkdir()
+    assert not predict.is_merged_checkpoint(str(checkpoint))
+
+    (checkpoint / "config.json").write_text("{}")
+    assert not predict.is_merged_checkpoint(str(checkpoint))
+    (checkpoint / "tokenizer.json").write_text("{}")
+    assert predict.is_merged_checkpoint(str(checkpoint))
+    assert not predict.is_merged_checkpoint(os.path.join(str(tmp_path), "missing"))
+
+
+def test_retrained_adapter_triggers_a_rebuild(load_predict, tmp_path):
+    merged = tmp_path / "merged"
+    load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    (load_predict.adapter_dir / "adapter_model.safetensors").write_bytes(b"retrained")
+    predict = load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    assert ("adapter", str(load_predict.adapter_dir)) in load_predict.loads
+    assert predict.stale_build_reason(str(merged), str(load_predict.adapter_dir)) == ""
+
+
+def test_checkpoint_without_source_record_is_rebuilt(load_predict, tmp_path):
+    merged = tmp_path / "merged"
+    predict = load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+    os.remove(merged / predict.SOURCE_RECORD_FILE)
+
+    assert predict.stale_build_reason(str(merged), str(load_predict.adapter_dir)) == "no source_adapter.json"
+    load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+    assert ("adapter", str(load_predict.adapter_dir)) in load_predict.loads
+
+
+def test_checkpoint_is_used_as_is_without_source_adapters(load_predict, tmp_path):
+    merged = tmp_path / "merged"
+    load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged))
+
+    load_predict(INFERENCE_MODE="merged", MERGED_MODEL_PATH=str(merged), MODEL_PATH=str(tmp_path / "no-adapters"))
+    assert load_predict.loads == [("model", str(merged)), ("tokenizer", str(merged))]
@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import micro_batcher
+import request_metrics
+from micro_batcher import MicroBatcher
+from request_metrics import RequestTimer
+
+
+class FakePredict:
+    """Stands in for predict_bias_many: labels each text with its adapter."""
+
+    def __init__(self, forward_seconds: float = 0.0):
+        self.calls = []
+        self.forward_seconds = forward_seconds
+
+    def __call__(self, texts, adapter):
+        self.calls.append((list(texts), adapter))
+        request_metrics.record("forward", self.forward_seconds)
+        return [(f"{adapter or 'default'}:{text}", 0.5) for text in texts]
+
+
+def queued(text, adapter=None, timer=None, enqueued=None):
+    return (text, adapter, Future(), timer, time.perf_counter() if enqueued is None else enqueued)
+
+
+def test_process_groups_by_adapter_and_keeps_order():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict)
+    batch = [queued("a"), queued("b", "ckpt"), queued("c"), queued("d", "ckpt")]
+
+    batcher._process(batch)
+
+    assert predict.calls == [(["a", "c"], None), (["b", "d"], "ckpt")]
+    assert [item[2].result(timeout=0) for item in batch] == [
+        ("default:a", 0.5), ("ckpt:b", 0.5), ("default:c", 0.5), ("ckpt:d", 0.5)
+    ]
+    assert batcher.stats()["batches_run"] == 1
+    assert batcher.stats()["items_processed"] == 4
+    assert batcher.stats()["largest_batch"] == 4
+
+
+def test_process_fails_only_the_group_that_raised():
+    def predict(texts, adapter):
+        if adapter == "broken":
+            raise RuntimeError("adapter failed")
+        return [("no_bias", 0.9) for _ in texts]
+
+    batch = [queued("a"), queued("b", "broken")]
+    MicroBatcher(predict)._process(batch)
+
+    assert batch[0][2].result(timeout=0) == ("no_bias", 0.9)
+    with pytest.raises(RuntimeError, match="adapter failed"):
+        batch[1][2].result(timeout=0)
+
+
+def test_process_merges_batch_stages_into_each_request_timer():
+    timers = [RequestTimer(), RequestTimer(), None]
+    enqueued = time.perf_counter() - 1.0
+    batch = [queued(text, timer=timer, enqueued=enqueued) for text, timer in zip("abc", timers)]
+
+    MicroBatcher(FakePredict(forward_seconds=0.25))._process(batch)
+
+    for timer in timers[:2]:
+        assert timer.stages["forward"] == pytest.approx(0.25)
+        assert timer.stages["batch_wait"] >= 1.0
+    assert batch[2][2].result(timeout=0) == ("default:c", 0.5)
+
+
+def test_concurrent_submits_share_one_batch():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict, max_wait_ms=2000, max_batch_size=4)
+    results = {}
+
+    def submit(text):
+        results[text] = batcher.submit(text, timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(text,)) for text in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # The batch is full before the 2 s wait runs out
+    assert len(predict.calls) == 1
+    assert sorted(predict.calls[0][0]) == ["a", "b", "c", "d"]
+    assert results == {text: (f"default:{text}", 0.5) for text in "abcd"}
+
+
+def test_max_wait_dispatches_a_partial_batch():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict, max_wait_ms=1, max_batch_size=16)
+
+    assert batcher.submit("a", timeout=5) == ("default:a", 0.5)
+    assert predict.calls == [(["a"], None)]
+
+
+def test_worker_is_recreated_after_fork(monkeypatch):
+    batcher = MicroBatcher(FakePredict(), max_wait_ms=1)
+    parent_queue = batcher._ensure_worker()
+    parent_worker = batcher._worker
+    assert batcher._ensure_worker() is parent_queue
+
+    # A forked child has a new pid and none of the parent's threads
+    monkeypatch.setattr(micro_batcher.os, "getpid", lambda: batcher._worker_pid + 1)
+    child_queue = batcher._ensure_worker()
+
+    assert child_queue is not parent_queue
+    assert batcher._worker is not parent_worker
+    assert batcher.submit("a", timeout=5) == ("default:a", 0.5)
+
+
+def test_process_fails_every_request_when_results_do_not_match():
+    batch = [queued("a"), queued("b"), queued("c")]
+    MicroBatcher(lambda texts, adapter: [("no_bias", 0.9)])._process(batch)
+
+    for _, _, future, _, _ in batch:
+        with pytest.raises(RuntimeError, match="1 results for 3 texts"):
+            future.result(timeout=0)
+
+
+def test_process_skips_requests_cancelled_by_a_timed_out_caller():
+    predict = FakePredict()
+    batcher = MicroBatcher(predict)
+    batch = [queued("a"), queued("b")]
+    batch[0][2].cancel()
+
+    batcher._process(batch)
+
+    assert predict.calls == [(["b"], None)]
+    assert batch[1][2].result(timeout=0) == ("default:b", 0.5)
+    assert batcher.stats()["items_processed"] == 1
+
+
+def test_submit_timeout_cancels_the_request():
+    release = threading.Event()
+
+    def slow_predict(texts, adapter):
+        release.wait(5)
+        return [("no_bias", 0.9) for _ in texts]
+
+    batcher = MicroBatcher(slow_predict, max_wait_ms=0)
+    worker = threading.Thread(target=batcher.submit, args=("first",), daemon=True)
+    worker.start()
+    time.sleep(0.05)  # "first" is now running, so "second" stays queued
+
+    with pytest.raises(TimeoutError):
+        batcher.submit("second", timeout=0.05)
+    release.set()
+    worker.join(5)
+    time.sleep(0.05)
+
+    assert batcher.stats()["items_processed"] == 1
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+import mock_llm_server
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mock_llm_server, "LATENCY_MEDIAN", 0.0)
+    monkeypatch.setattr(mock_llm_server, "LATENCY_SIGMA", 0.0)
+    monkeypatch.setattr(mock_llm_server, "ERROR_RATE", 0.0)
+    monkeypatch.setattr(mock_llm_server, "RATE_LIMIT_RPM", 0)
+    return mock_llm_server.app.test_client()
+
+
+def few_shot_request(text, **body):
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": f"Analyze this medical content for bias and respond with a JSON object:\n\n{text}"}],
+        "response_format": {"type": "json_object"},
+        **body
+    }
+
+
+def test_few_shot_prompt_gets_a_schema_valid_report(client):
+    response = client.post("/v1/chat/completions", json=few_shot_request("Patient is drug-seeking and noncompliant."))
+
+    assert response.status_code == 200
+    body = response.get_json()
+    report = json.loads(body["choices"][0]["message"]["content"])
+    assert report["bias_detected"] is True
+    assert set(report) == {"bias_detected", "primary_category", "overall_bias_level", "biases_found", "bias_free_sections", "summary"}
+    assert body["usage"]["total_tokens"] == body["usage"]["prompt_tokens"] + body["usage"]["completion_tokens"]
+
+
+def test_streamed_chunks_reassemble_the_same_content(client):
+    plain = client.post("/v1/chat/completions", json=few_shot_request("Vitals stable, afebrile.")).get_json()
+    streamed = client.post("/v1/chat/completions", json=few_shot_request("Vitals stable, afebrile.", stream=True))
+
+    events = [line[len("data: "):] for line in streamed.get_data(as_text=True).splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    content = "".join(json.loads(event)["choices"][0]["delta"].get("content", "") for event in events[:-1])
+    assert content == plain["choices"][0]["message"]["content"]
+
+
+def test_invalid_request_and_rate_limit_use_openai_error_bodies(client, monkeypatch):
+    assert client.post("/v1/chat/completions", json={"messages": []}).status_code == 400
+
+    monkeypatch.setattr(mock_llm_server, "RATE_LIMIT_RPM", 1)
+    monkeypatch.setattr(mock_llm_server, "_bucket", {"tokens": 1.0, "updated": mock_llm_server.time.monotonic()})
+    assert client.post("/v1/chat/completions", json=few_shot_request("a")).status_code == 200
+
+    limited = client.post("/v1/chat/completions", json=few_shot_request("a"))
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "1"
+    assert limited.get_json()["error"]["type"] == "rate_limit_error"
+
+
+def test_injected_errors_are_server_errors(client, monkeypatch):
+    monkeypatch.setattr(mock_llm_server, "ERROR_RATE", 1.0)
+
+    response = client.post("/v1/chat/completions", json=few_shot_request("a"))
+
+    assert response.status_code in (500, 502, 503)
+    assert response.get_json()["error"]["type"] == "server_error"
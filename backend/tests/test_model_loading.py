@@ -0,0 +1,40 @@
+import pytest
+
+
+def test_predictions_fail_until_model_is_loaded(load_predict):
+    predict = load_predict(ready=False)
+
+    assert predict.get_load_status()["status"] == "not_loaded"
+    assert not predict.is_ready()
+    with pytest.raises(predict.ModelNotReadyError):
+        predict.predict_bias("chest pain")
+
+    predict.load_model()
+
+    assert predict.is_ready()
+    assert predict.get_load_status()["status"] == "ready"
+    assert predict.predict_bias("chest pain") == predict.predict_bias_batch(["chest pain"])[0]
+
+
+def test_background_load_becomes_ready(load_predict):
+    predict = load_predict(ready=False)
+
+    predict.start_background_loading()
+
+    assert predict.wait_until_ready(timeout=10)
+    assert predict.get_load_status()["load_seconds"] is not None
+
+
+def test_failed_load_is_reported_as_error(load_predict, monkeypatch):
+    predict = load_predict(ready=False)
+
+    def broken_load():
+        raise OSError("weights missing")
+
+    monkeypatch.setattr(predict, "load_torch_model", broken_load)
+
+    with pytest.raises(OSError):
+        predict.load_model()
+
+    assert predict.get_load_status() == {"status": "error", "error": "weights missing", "load_seconds": None}
+    assert not predict.wait_until_ready(timeout=0)
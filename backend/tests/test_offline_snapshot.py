@@ -0,0 +1,52 @@
+import pytest
+
+
+@pytest.fixture
+def offline_predict(load_predict, monkeypatch, tmp_path):
+    # Keep predict's os.environ.setdefault() calls from leaking past the test
+    monkeypatch.setenv("HF_HUB_OFFLINE", "1")
+    monkeypatch.setenv("TRANSFORMERS_OFFLINE", "1")
+    base_dir = tmp_path / "roberta-base"
+    base_dir.mkdir()
+    predict = load_predict(ready=False, MODEL_OFFLINE="1", BASE_MODEL_PATH=str(base_dir))
+    predict.base_dir = base_dir
+    return predict
+
+
+def complete_snapshot(base_dir, adapter_dir):
+    (base_dir / "config.json").write_text("{}")
+    (base_dir / "model.safetensors").write_bytes(b"")
+    (adapter_dir / "adapter_model.safetensors").write_bytes(b"")
+    (adapter_dir / "tokenizer.json").write_text("{}")
+
+
+def test_incomplete_snapshot_lists_missing_files(offline_predict, load_predict):
+    with pytest.raises(FileNotFoundError) as excinfo:
+        offline_predict.verify_offline_snapshot(str(load_predict.adapter_dir))
+
+    message = str(excinfo.value)
+    for name in ("config.json", "model.safetensors", "adapter_model.safetensors", "tokenizer.json"):
+        assert name in message
+    assert "--snapshot-base" in message
+
+
+def test_offline_load_reads_only_local_snapshot(offline_predict, load_predict):
+    adapter_dir = str(load_predict.adapter_dir)
+    complete_snapshot(offline_predict.base_dir, load_predict.adapter_dir)
+
+    offline_predict.load_model(warmup=False)
+
+    assert offline_predict.tokenizer_source(adapter_dir) == adapter_dir
+    assert load_predict.loads == [
+        ("model", str(offline_predict.base_dir)),
+        ("adapter", adapter_dir),
+        ("tokenizer", adapter_dir)
+    ]
+    assert offline_predict.get_inference_info()["offline"] is True
+
+
+def test_online_mode_uses_hub_names(load_predict):
+    predict = load_predict()
+
+    assert predict.tokenizer_source(str(load_predict.adapter_dir)) == "roberta-base"
+    assert ("model", "roberta-base") in load_predict.loads
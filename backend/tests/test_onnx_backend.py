@@ -0,0 +1,105 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from onnx_backend import ONNX_FILE_NAME, OnnxClassifier, is_onnx_export, _torchscript_exporter_options
+
+
+def test_is_onnx_export_needs_graph_and_tokenizer(tmp_path):
+    assert not is_onnx_export(str(tmp_path))
+    (tmp_path / ONNX_FILE_NAME).write_bytes(b"")
+    assert not is_onnx_export(str(tmp_path))
+    (tmp_path / "tokenizer.json").write_text("{}")
+    assert is_onnx_export(str(tmp_path))
+
+
+def test_dynamo_flag_is_only_passed_to_exporters_that_accept_it():
+    def old_export(model, args, f, input_names=None, output_names=None, dynamic_axes=None,
+                   opset_version=None, do_constant_folding=True):
+        pass
+
+    def new_export(model, args, f, *, dynamo=True, **kwargs):
+        pass
+
+    assert _torchscript_exporter_options(old_export) == {}
+    assert _torchscript_exporter_options(new_export) == {"dynamo": False}
+
+
+def test_run_logits_feeds_int64_inputs_and_returns_logits():
+    class FakeSession:
+        def run(self, outputs, feeds):
+            self.outputs, self.feeds = outputs, feeds
+            return [np.zeros((len(feeds["input_ids"]), 4), dtype=np.float32)]
+
+    classifier = OnnxClassifier.__new__(OnnxClassifier)
+    classifier.session = FakeSession()
+
+    logits = classifier.run_logits({"input_ids": [[5, 6, 7], [5, 6, 1]], "attention_mask": [[1, 1, 1], [1, 1, 0]], "token_type_ids": [[0] * 3] * 2})
+
+    assert logits.shape == (2, 4)
+    assert classifier.session.outputs == ["logits"]
+    assert set(classifier.session.feeds) == {"input_ids", "attention_mask"}
+    assert all(feed.dtype == np.int64 for feed in classifier.session.feeds.values())
+
+
+def test_export_matches_torch_logits(tmp_path):
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    from conftest import FakeTokenizer
+    from onnx_backend import export_onnx_model
+
+    torch.manual_seed(0)
+    config = transformers.RobertaConfig(
+        vocab_size=64, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, max_position_embeddings=64, pad_token_id=0, num_labels=4
+    )
+    model = transformers.RobertaForSequenceClassification(config).eval()
+    tokenizer = FakeTokenizer()
+
+    inputs = tokenizer(["a longer clinical note here", "short note"], return_tensors="pt")
+    with torch.no_grad():
+        expected = model(**inputs).logits.numpy()
+
+    export_onnx_model(model, tokenizer, str(tmp_path))
+    actual = OnnxClassifier(str(tmp_path)).run_logits(inputs)
+
+    assert is_onnx_export(str(tmp_path))
+    assert not model.training
+    assert actual.shape == (2, 4)
+    assert np.allclose(actual, expected, atol=1e-4)
+
+
+@pytest.fixture
+def onnx_predict(load_predict, monkeypatch, tmp_path):
+    import onnx_backend
+
+    exports = []
+
+    def fake_export(model, tokenizer, export_dir):
+        exports.append(export_dir)
+        (tmp_path / "onnx").mkdir(exist_ok=True)
+        (tmp_path / "onnx" / ONNX_FILE_NAME).write_bytes(b"")
+        (tmp_path / "onnx" / "tokenizer.json").write_text("{}")
+
+    monkeypatch.setattr(onnx_backend, "export_onnx_model", fake_export)
+    monkeypatch.setattr(onnx_backend, "OnnxClassifier", lambda export_dir: object())
+
+    def load():
+        predict = load_predict(ready=False, INFERENCE_BACKEND="onnx", ONNX_MODEL_PATH=str(tmp_path / "onnx"))
+        predict.load_model(warmup=False)
+        return predict
+
+    load.exports = exports
+    return load
+
+
+def test_onnx_export_is_reused_until_the_adapter_changes(onnx_predict, load_predict):
+    onnx_predict()
+    onnx_predict()
+    assert len(onnx_predict.exports) == 1
+
+    (load_predict.adapter_dir / "adapter_model.safetensors").write_bytes(b"retrained")
+    onnx_predict()
+    assert len(onnx_predict.exports) == 2
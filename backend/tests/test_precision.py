@@ -0,0 +1,39 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+
+def tiny_classifier():
+    return torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU(), torch.nn.Linear(8, 4))
+
+
+def test_int8_quantizes_linear_layers(load_predict):
+    predict = load_predict()
+    if predict.device != "cpu":
+        pytest.skip("int8 dynamic quantization is CPU only")
+
+    quantized = predict.apply_precision(tiny_classifier(), "int8")
+
+    assert not any(type(module) is torch.nn.Linear for module in quantized.modules())
+    assert quantized(torch.zeros(2, 8)).shape == (2, 4)
+
+
+@pytest.mark.parametrize("precision", ["fp32", "bf16"])
+def test_other_precisions_leave_model_unchanged(load_predict, precision):
+    predict = load_predict()
+    classifier = tiny_classifier()
+
+    assert predict.apply_precision(classifier, precision) is classifier
+
+
+def test_unknown_precision_is_rejected(load_predict):
+    with pytest.raises(ValueError, match="MODEL_PRECISION"):
+        load_predict(MODEL_PRECISION="fp16")
+
+
+def test_bf16_predictions_match_fp32_labels(load_predict):
+    texts = ["one", "two words", "three words here"]
+    fp32 = load_predict().predict_bias_batch(texts)
+    bf16 = load_predict(MODEL_PRECISION="bf16").predict_bias_batch(texts)
+
+    assert [label for label, _ in bf16] == [label for label, _ in fp32]
@@ -0,0 +1,26 @@
+import pytest
+
+TEXTS = [" ".join(["word"] * length) + f" {i}" for i, length in enumerate([9, 2, 30, 5, 5, 1, 17, 200, 3, 12])]
+
+
+@pytest.fixture
+def predict(load_predict):
+    return load_predict()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 32])
+def test_batch_results_follow_input_order(predict, chunk_size):
+    expected = [predict.predict_bias(text) for text in TEXTS]
+    assert predict.predict_bias_batch(TEXTS, chunk_size=chunk_size) == expected
+
+
+def test_chunks_are_padded_to_their_own_longest_text(predict):
+    predict.model.batch_shapes.clear()
+    predict.predict_bias_batch(TEXTS, chunk_size=4)
+
+    lengths = sorted(min(len(text.split()), predict.MAX_LENGTH) for text in TEXTS)
+    assert predict.model.batch_shapes == [(4, lengths[3]), (4, lengths[7]), (2, lengths[9])]
+
+
+def test_empty_batch(predict):
+    assert predict.predict_bias_batch([]) == []
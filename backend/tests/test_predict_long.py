@@ -0,0 +1,78 @@
+import pytest
+
+from conftest import FakeEncoding
+
+
+class WindowTokenizer:
+    """Splits every text into the given pre-built windows of (text_id, tokens)."""
+
+    def __init__(self, windows):
+        self.windows = windows
+        self.calls = []
+
+    def __call__(self, text, **kwargs):
+        import torch
+
+        self.calls.append(kwargs)
+        width = max(tokens for _, tokens in self.windows)
+        offsets, position = [], 0
+        for _, tokens in self.windows:
+            offsets.append([(position + i, position + i + 1) for i in range(tokens)] + [(0, 0)] * (width - tokens))
+            position += tokens
+        return FakeEncoding(
+            input_ids=torch.tensor([[text_id] * width for text_id, _ in self.windows]),
+            attention_mask=torch.tensor([[1] * tokens + [0] * (width - tokens) for _, tokens in self.windows]),
+            offset_mapping=torch.tensor(offsets),
+            overflow_to_sample_mapping=torch.zeros(len(self.windows), dtype=torch.long)
+        )
+
+
+@pytest.fixture
+def long_predict(load_predict):
+    predict = load_predict()
+
+    def use_windows(*windows):
+        predict.tokenizer = WindowTokenizer(list(windows))
+        return predict
+
+    return use_windows
+
+
+def test_max_risk_picks_most_confident_biased_window(long_predict):
+    # FakeModel: text id % 4 is the label, larger ids are more confident
+    predict = long_predict((7, 4), (5, 4), (10, 2))
+
+    result = predict.predict_bias_long("long note", aggregate="max", window=4, stride=1)
+
+    assert result["num_windows"] == 3
+    assert [w["predicted_label"] for w in result["windows"]] == ["no_bias", "clinical_stigma_bias", "demographic_bias"]
+    assert result["predicted_label"] == "demographic_bias"
+    assert result["confidence"] == result["windows"][2]["confidence"]
+    assert [(w["start_char"], w["end_char"]) for w in result["windows"]] == [(0, 4), (4, 8), (8, 10)]
+    assert predict.tokenizer.calls[0]["stride"] == 1
+    assert predict.tokenizer.calls[0]["return_overflowing_tokens"]
+
+
+def test_max_risk_without_biased_windows_is_least_confident_no_bias(long_predict):
+    predict = long_predict((7, 3), (3, 3))
+
+    result = predict.predict_bias_long("clean note", aggregate="max")
+
+    assert result["predicted_label"] == "no_bias"
+    assert result["confidence"] == min(w["confidence"] for w in result["windows"])
+
+
+def test_weighted_averages_window_probabilities_by_token_count(long_predict):
+    predict = long_predict((5, 3), (10, 1))
+
+    result = predict.predict_bias_long("mixed note", aggregate="weighted")
+
+    first, second = (w["scores"] for w in result["windows"])
+    expected = {label: (3 * first[label] + second[label]) / 4 for label in first}
+    assert result["predicted_label"] == max(expected, key=expected.get)
+    assert result["confidence"] == pytest.approx(max(expected.values()))
+
+
+def test_unknown_aggregation_is_rejected(load_predict):
+    with pytest.raises(ValueError):
+        load_predict().predict_bias_long("note", aggregate="mean")
@@ -0,0 +1,68 @@
+import os
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import few_shot_classifier
+from few_shot_classifier import PromptTemplate
+
+
+def write_examples(path, system_prompt, mtime_ns):
+    path.write_text(json.dumps({
+        "system_prompt": system_prompt,
+        "few_shot_examples": [
+            {"role": "user", "content": "example note"},
+            {"role": "assistant", "content": {"bias_detected": False}}
+        ]
+    }))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def examples_file(monkeypatch, tmp_path):
+    path = tmp_path / "few_shot_examples.json"
+    write_examples(path, "v1", 1_000_000_000)
+    monkeypatch.setattr(few_shot_classifier, "EXAMPLES_FILE", path)
+    monkeypatch.setattr(few_shot_classifier, "PROMPT_RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(few_shot_classifier, "_next_reload_check", 0)
+    monkeypatch.setattr(few_shot_classifier, "_template", PromptTemplate({"system_prompt": "initial"}))
+    monkeypatch.setattr(few_shot_classifier, "CONFIG", few_shot_classifier.CONFIG)
+    return path
+
+
+def test_render_appends_one_user_message_to_the_shared_prefix():
+    template = PromptTemplate({"system_prompt": "sys", "few_shot_examples": [
+        {"role": "assistant", "content": {"bias_detected": True}}
+    ]})
+
+    messages = template.render("note")
+
+    assert messages[:2] == list(template.messages)
+    assert messages[1]["content"] == '{"bias_detected": true}'
+    assert messages[2]["role"] == "user" and messages[2]["content"].endswith("\n\nnote")
+    assert "json" in messages[2]["content"].lower()
+    assert template.render("other")[:2] == messages[:2]
+
+
+def test_template_is_rebuilt_when_the_file_changes(examples_file):
+    first = few_shot_classifier.get_prompt_template()
+    assert first.messages[0]["content"] == "v1"
+    assert few_shot_classifier.get_prompt_template() is first
+
+    write_examples(examples_file, "v2", 2_000_000_000)
+    second = few_shot_classifier.get_prompt_template()
+
+    assert second.messages[0]["content"] == "v2"
+    assert second.version != first.version
+    assert few_shot_classifier.CONFIG["system_prompt"] == "v2"
+
+
+def test_unparseable_file_keeps_the_previous_template(examples_file):
+    first = few_shot_classifier.get_prompt_template()
+
+    examples_file.write_text('{"system_prompt": ')
+    os.utime(examples_file, ns=(3_000_000_000, 3_000_000_000))
+
+    assert few_shot_classifier.get_prompt_template() is first
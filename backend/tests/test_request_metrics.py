@@ -0,0 +1,72 @@
+import pytest
+
+import request_metrics
+from request_metrics import Counter, Histogram, RequestTimer
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(request_metrics, "ENABLED", True)
+
+
+def test_stages_accumulate_on_the_current_request():
+    request_metrics.start_request()
+    try:
+        request_metrics.record("forward", 0.25)
+        request_metrics.record("forward", 0.25)
+        with request_metrics.stage("tokenize"):
+            pass
+        timer = request_metrics.current_timer()
+    finally:
+        request_metrics.finish_request("/predict", "POST")
+
+    assert timer.stages["forward"] == 0.5
+    assert "tokenize" in timer.stages
+    assert timer.server_timing().startswith("forward;dur=500.0, tokenize;dur=")
+    assert request_metrics.current_timer() is None
+
+
+def test_stages_outside_a_request_are_ignored():
+    request_metrics.record("forward", 1.0)
+    with request_metrics.stage("tokenize"):
+        pass
+
+    assert request_metrics.current_timer() is None
+
+
+def test_capture_collects_stages_and_restores_the_request_timer():
+    request_metrics.start_request()
+    try:
+        outer = request_metrics.current_timer()
+        with request_metrics.capture() as batch_timer:
+            request_metrics.record("forward", 0.1)
+        outer.merge(batch_timer)
+
+        assert request_metrics.current_timer() is outer
+        assert outer.stages == {"forward": 0.1}
+    finally:
+        request_metrics.finish_request("/predict", "POST")
+
+
+def test_prometheus_exposition():
+    histogram = Histogram("latency_seconds", "Latency", ("endpoint",), (0.1, 1.0))
+    histogram.observe(("/predict",), 0.5)
+    counter = Counter("requests_total", "Requests", ("endpoint", "status"))
+    counter.inc(("/predict", "200"))
+    counter.inc(("/pre\"dict", "500"))
+
+    lines = histogram.render() + counter.render()
+
+    assert 'latency_seconds_bucket{endpoint="/predict",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{endpoint="/predict",le="1.0"} 1' in lines
+    assert 'latency_seconds_bucket{endpoint="/predict",le="+Inf"} 1' in lines
+    assert 'latency_seconds_count{endpoint="/predict"} 1' in lines
+    assert 'requests_total{endpoint="/predict",status="200"} 1' in lines
+    assert 'requests_total{endpoint="/pre\\"dict",status="500"} 1' in lines
+
+
+def test_failed_requests_count_as_5xx():
+    request_metrics.start_request()
+    request_metrics.finish_request("/metrics-test", "GET")
+
+    assert 'bias_checker_request_errors_total{endpoint="/metrics-test"} 1' in request_metrics.render_metrics().splitlines()
@@ -0,0 +1,103 @@
+import pytest
+
+import result_cache
+from result_cache import TTLCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache, "time", fake)
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    return fake
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache("test", maxsize=4, ttl=10)
+    cache.put("a", 1)
+
+    clock.now += 9.9
+    assert cache.get("a") == (True, 1)
+    clock.now += 0.2
+    assert cache.get("a") == (False, None)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["size"]) == (1, 1, 1, 0)
+
+
+def test_put_refreshes_the_ttl(clock):
+    cache = TTLCache("test", maxsize=4, ttl=10)
+    cache.put("a", 1)
+    clock.now += 8
+    cache.put("a", 2)
+    clock.now += 8
+
+    assert cache.get("a") == (True, 2)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache("test", maxsize=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1)  # "b" is now least recently used
+
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disabled_cache_stores_nothing(clock, monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", False)
+    cache = TTLCache("test", maxsize=2, ttl=10)
+    cache.put("a", 1)
+
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["size"] == 0
+
+    zero = TTLCache("zero", maxsize=0, ttl=10)
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    zero.put("a", 1)
+    assert zero.get("a") == (False, None)
+
+
+def test_keys_normalize_whitespace_and_include_identity():
+    assert make_key("  a \n b ", "torch") == make_key("a b", "torch")
+    assert make_key("a b", "torch") != make_key("a b", "onnx")
+    assert make_key("a b", "torch") != make_key("a  c", "torch")
+
+
+def test_batch_prediction_only_runs_cache_misses(load_predict, monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    predict = load_predict()
+    first = predict.predict_bias_batch(["one", "two words", "three words here"])
+    predict.model.batch_shapes.clear()
+
+    second = predict.predict_bias_batch(["three  words here", "four words in here", "one"])
+
+    assert predict.model.batch_shapes == [(1, 4)]
+    assert second[0] == first[2] and second[2] == first[0]
+    assert predict.get_cached_prediction("four words in here") == second[1]
+
+
+def test_lookup_false_recomputes_but_still_stores(load_predict, monkeypatch):
+    monkeypatch.setattr(result_cache, "ENABLED", True)
+    predict = load_predict()
+    predict.predict_bias_batch(["one", "two words"])
+    predict.model.batch_shapes.clear()
+
+    fresh = predict.predict_bias_batch(["one", "two words"], lookup=False)
+    assert predict.predict_bias("one", lookup=False) == fresh[0]
+
+    assert predict.model.batch_shapes == [(2, 2), (1, 1)]
+    assert predict.get_cached_prediction("two words") == fresh[1]
@@ -2,12 +2,13 @@
 
 import React, { useState } from "react";
 import { SourceType, BiasAnalysisResult } from "@/types";
-import { analyzeBias, checkHealth } from "@/services/api";
+import { analyzeBiasStream, checkHealth } from "@/services/api";
 import ArtifactConsole from "@/components/analyze/ArtifactConsole";
 import ExampleTabs from "@/components/analyze/ExampleTabs";
 import ExplainabilityCard from "@/components/analyze/ExplainabilityCard";
 import BiasDetailsCard from "@/components/analyze/BiasDetailsCard";
 import AuditScore from "@/components/analyze/AuditScore";
+import ServerTimingCard from "@/components/analyze/ServerTimingCard";
 import { motion, AnimatePresence } from "framer-motion";
 import { Search, AlertTriangle, Sparkles } from "lucide-react";
 
@@ -40,7 +41,24 @@ export default function BiasChecker() {
     setError(null);
 
     try {
-      const analysisResult = await analyzeBias(text);
+      // Show the analysis as it streams in, starting with the primary category
+      const analysisResult = await analyzeBiasStream(text, (partial) => {
+        if (partial.primary_category) {
+          setResult({
+            bias_detected: partial.primary_category !== "no_bias",
+            overall_bias_level: "NONE",
+            bias_free_sections: [],
+            summary: "",
+            predicted_label: partial.primary_category,
+            confidence: 0,
+            audit_score: 0,
+            compliance_rating: "",
+            rationale: "",
+            flags: [],
+            ...partial,
+          } as BiasAnalysisResult);
+        }
+      });
       setResult(analysisResult);
     } catch (err) {
       setError(
@@ -144,6 +162,7 @@ export default function BiasChecker() {
                     <div className="lg:col-span-2 h-full">
                       <ExplainabilityCard
                         rationale={result.summary || result.rationale}
+                        latencyMs={result.server_timing?.total}
                       />
                     </div>
                   </div>
@@ -154,6 +173,10 @@ export default function BiasChecker() {
                     biasLevel={result.overall_bias_level || "NONE"}
                     biasFreeSection={result.bias_free_sections || []}
                   />
+
+                  {result.server_timing && (
+                    <ServerTimingCard timings={result.server_timing} />
+                  )}
                 </motion.div>
               )}
             </AnimatePresence>
@@ -3,10 +3,12 @@ import { AlertCircle } from "lucide-react";
 
 interface ExplainabilityCardProps {
   rationale: string;
+  latencyMs?: number;
 }
 
 export default function ExplainabilityCard({
   rationale,
+  latencyMs,
 }: ExplainabilityCardProps) {
   return (
     <div className="premium-card bg-white dark:bg-neutral-800/50 rounded-3xl h-full p-8 md:p-10 flex flex-col">
@@ -30,7 +32,10 @@ export default function ExplainabilityCard({
           Analysis Source: <strong>GPT-4o (Few-Shot)</strong>
         </span>
         <span>
-          Latency: <strong>~0.8s</strong>
+          Latency:{" "}
+          <strong>
+            {latencyMs !== undefined ? `${(latencyMs / 1000).toFixed(2)}s` : "—"}
+          </strong>
         </span>
       </div>
     </div>
@@ -0,0 +1,65 @@
+import React from "react";
+import { Timer } from "lucide-react";
+import { ServerTiming } from "@/types";
+
+interface ServerTimingCardProps {
+  timings: ServerTiming;
+}
+
+const STAGE_LABELS: Record<string, string> = {
+  parse: "Request parsing",
+  tokenize: "Tokenization",
+  forward: "Model forward pass",
+  softmax: "Softmax",
+  batch_wait: "Micro-batch wait",
+  audit_score: "Audit score",
+  example_selection: "Example retrieval",
+  llm_queue: "LLM queue wait",
+  llm_network: "LLM call",
+  serialize: "Serialization",
+};
+
+function formatMs(ms: number) {
+  return ms >= 1000 ? `${(ms / 1000).toFixed(2)} s` : `${ms.toFixed(1)} ms`;
+}
+
+export default function ServerTimingCard({ timings }: ServerTimingCardProps) {
+  const { total, ...stages } = timings;
+  const entries = Object.entries(stages).sort(([, a], [, b]) => b - a);
+  const longest = Math.max(total || 0, ...entries.map(([, ms]) => ms), 1);
+
+  return (
+    <div className="premium-card bg-white dark:bg-neutral-800/50 rounded-3xl p-8 md:p-10">
+      <h3 className="text-sm font-bold text-neutral-400 uppercase tracking-widest mb-6 flex items-center gap-2">
+        <div className="p-1.5 bg-primary/10 rounded-lg">
+          <Timer className="w-4 h-4 text-primary" />
+        </div>
+        Server Timing
+        {total !== undefined && (
+          <span className="ml-auto text-xs normal-case tracking-normal text-neutral-500">
+            Total <strong>{formatMs(total)}</strong>
+          </span>
+        )}
+      </h3>
+
+      <div className="space-y-3">
+        {entries.map(([stage, ms]) => (
+          <div key={stage} className="flex items-center gap-4 text-xs">
+            <span className="w-40 shrink-0 font-medium text-neutral-600 dark:text-neutral-300">
+              {STAGE_LABELS[stage] || stage}
+            </span>
+            <div className="flex-grow h-2 rounded-full bg-neutral-100 dark:bg-black/20 overflow-hidden">
+              <div
+                className="h-full rounded-full bg-primary"
+                style={{ width: `${Math.min(100, (ms / longest) * 100)}%` }}
+              />
+            </div>
+            <span className="w-20 shrink-0 text-right font-mono text-neutral-500">
+              {formatMs(ms)}
+            </span>
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+}
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { BiasAnalysisRequest, BiasAnalysisResult } from '@/types';
+import { BiasAnalysisRequest, BiasAnalysisResult, ServerTiming } from '@/types';
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
@@ -10,6 +10,21 @@ const api = axios.create({
   },
 });
 
+/**
+ * Parse a Server-Timing header ("tokenize;dur=1.2, forward;dur=35.0, total;dur=40.3")
+ * into milliseconds per stage.
+ */
+export function parseServerTiming(header?: string | null): ServerTiming | undefined {
+  if (!header) return undefined;
+  const timings: ServerTiming = {};
+  for (const entry of header.split(',')) {
+    const [name, ...params] = entry.trim().split(';');
+    const duration = params.map((param) => param.trim()).find((param) => param.startsWith('dur='));
+    if (name && duration) timings[name] = parseFloat(duration.slice(4));
+  }
+  return Object.keys(timings).length ? timings : undefined;
+}
+
 /**
  * Analyze bias using the few-shot prompting pipeline.
  * Uses GPT-4 with 5 curated medical examples to detect:
@@ -21,7 +36,7 @@ export async function analyzeBias(text: string): Promise<BiasAnalysisResult> {
     const request: BiasAnalysisRequest = { text };
     // Use the few-shot prompting endpoint for richer analysis
     const response = await api.post<BiasAnalysisResult>('/predict-fewshot', request);
-    return response.data;
+    return { ...response.data, server_timing: parseServerTiming(response.headers['server-timing']) };
   } catch (error) {
     if (axios.isAxiosError(error)) {
       throw new Error(error.response?.data?.error || 'Failed to analyze bias. Please ensure the backend API is running.');
@@ -30,6 +45,68 @@ export async function analyzeBias(text: string): Promise<BiasAnalysisResult> {
   }
 }
 
+/**
+ * Streaming variant of analyzeBias (Server-Sent Events from /predict-fewshot-stream).
+ * onUpdate receives the partial result each time another part of the analysis
+ * arrives (primary category, bias level and audit score, each bias found);
+ * the promise resolves with the complete result. Its server_timing comes from
+ * the final event, since the headers are sent before the analysis runs.
+ */
+export async function analyzeBiasStream(
+  text: string,
+  onUpdate: (partial: Partial<BiasAnalysisResult>) => void,
+): Promise<BiasAnalysisResult> {
+  const request: BiasAnalysisRequest = { text };
+  const response = await fetch(`${API_URL}/predict-fewshot-stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(request),
+  }).catch(() => {
+    throw new Error('Failed to analyze bias. Please ensure the backend API is running.');
+  });
+
+  if (!response.ok || !response.body) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.error || 'Failed to analyze bias. Please ensure the backend API is running.');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let partial: Partial<BiasAnalysisResult> = { text, biases_found: [] };
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE messages are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      const event = message.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] || '{}');
+
+      if (event === 'error') {
+        throw new Error(data.summary || data.error || 'Failed to analyze bias.');
+      }
+      if (event === 'result') {
+        return data as BiasAnalysisResult;
+      }
+      if (event === 'bias') {
+        partial = { ...partial, biases_found: [...(partial.biases_found || []), data.bias] };
+      } else {
+        partial = { ...partial, ...data };
+      }
+      onUpdate(partial);
+    }
+  }
+
+  throw new Error('The analysis stream ended before a result was received.');
+}
+
 /**
  * Analyze bias using the fine-tuned RoBERTa model (legacy endpoint).
  */
@@ -37,7 +114,7 @@ export async function analyzeBiasLegacy(text: string): Promise<BiasAnalysisResul
   try {
     const request: BiasAnalysisRequest = { text };
     const response = await api.post<BiasAnalysisResult>('/predict', request);
-    return response.data;
+    return { ...response.data, server_timing: parseServerTiming(response.headers['server-timing']) };
   } catch (error) {
     if (axios.isAxiosError(error)) {
       throw new Error(error.response?.data?.error || 'Failed to analyze bias.');
@@ -20,6 +20,9 @@ export type BiasSubType =
 
 export type BiasLevel = "NONE" | "LOW" | "MODERATE" | "HIGH" | "CRITICAL";
 
+// Milliseconds per server-side stage (tokenize, forward, llm_network, ...) plus "total"
+export type ServerTiming = Record<string, number>;
+
 export interface BiasAnalysisRequest {
   text: string;
 }
@@ -54,6 +57,7 @@ export interface BiasAnalysisResult {
   // Metadata
   model_type?: string;
   num_biases?: number;
+  server_timing?: ServerTiming;
 }
 
 export type SourceType = "vignette";